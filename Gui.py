@@ -2,6 +2,11 @@ from tkinter import filedialog, ttk, messagebox
 from tkinter import *
 from PIL import Image, ImageTk
 from process import FunctionsProcessing
+from processors.pipeline import Recipe, apply_step
+from processors.history import History
+from processors.histogram_panel import HistogramPanel
+from processors.backing_store import BACKING_STORE, is_mapped
+from processors import display
 import os
 import cv2
 
@@ -15,13 +20,17 @@ class GUI:
         self.functions = None
         self.transformation = StringVar(value="Grayscale")
         self.code_text = ""
-        self.history = []
-        self.history_position = -1
+        self.history = History()  # memory-bounded undo/redo store
+        self.recipe = Recipe()
         self.set_code_text = StringVar(value="")
+        self.rendered_view = None  # view-pixel rectangle currently drawn on the canvas
+        self.pyramid = None  # mip-map of display_Image for zooming out, rebuilt when it changes
+        self._viewport_pending = None
 
         self.pil_image_module = Image
         self.pil_image_tk_module = ImageTk
         self.fp = FunctionsProcessing(self.pil_image_module, self.pil_image_tk_module)
+        self.display_adapter = display.DisplayAdapter(self.pil_image_module, self.pil_image_tk_module)
         # =================================================
         
         self.root = root
@@ -67,6 +76,8 @@ class GUI:
         ttk.Button(top_frame, text="Reset Image", command=self.reload_image).pack(side=LEFT, padx=5)
         ttk.Button(top_frame, text="Undo", command=self.undo).pack(side=LEFT, padx=5)
         ttk.Button(top_frame, text="Redo", command=self.redo).pack(side=LEFT, padx=5)
+        ttk.Button(top_frame, text="Save Recipe", command=self.save_recipe).pack(side=LEFT, padx=5)
+        ttk.Button(top_frame, text="Load Recipe", command=self.load_recipe).pack(side=LEFT, padx=5)
         
         # Image file info label
         self.file_info = ttk.Label(top_frame, text="No image loaded", font=("Arial", 10))
@@ -88,10 +99,12 @@ class GUI:
         self.canvas.grid(row=0, column=0, sticky="nsew")
         
         # Add scrollbars to the canvas
-        h_scrollbar = ttk.Scrollbar(canvas_container, orient=HORIZONTAL, command=self.canvas.xview)
+        h_scrollbar = ttk.Scrollbar(canvas_container, orient=HORIZONTAL,
+                                    command=lambda *args: self.on_scroll(self.canvas.xview, *args))
         h_scrollbar.grid(row=1, column=0, sticky="ew")
         
-        v_scrollbar = ttk.Scrollbar(canvas_container, orient=VERTICAL, command=self.canvas.yview)
+        v_scrollbar = ttk.Scrollbar(canvas_container, orient=VERTICAL,
+                                    command=lambda *args: self.on_scroll(self.canvas.yview, *args))
         v_scrollbar.grid(row=0, column=1, sticky="ns")
         
         # Configure the canvas
@@ -136,6 +149,10 @@ class GUI:
             ("E | D | O | C", "Morphology"),
         ])
         
+        # Live histogram of the displayed image, refreshed after every change
+        self.histogram_panel = HistogramPanel(left_panel)
+        self.histogram_panel.pack(fill=X, padx=5, pady=10)
+        
         # Sắp xếp lại các nhóm bên phải
         self.create_function_category(right_panel, "Segmentation & Edge", [
             ("Global Threshold", "Threshold"),
@@ -202,21 +219,37 @@ class GUI:
             filetypes=[("Image files", "*.jpg *.jpeg *.png *.bmp"), ("All files", "*.*")]
         )
         if self.file_path:
-            self.original_image = cv2.imread(self.file_path)
-            self.display_Image = self.original_image.copy()
-            self.code_text = f"# Load image\nimage = cv2.imread('{os.path.basename(self.file_path)}')\n"
-            self.set_code_text.set(self.code_text)
-            
-            # Update file info
-            img_h, img_w = self.display_Image.shape[:2]
-            file_name = os.path.basename(self.file_path)
-            self.file_info.config(text=f"{file_name} ({img_w}×{img_h})")
-            
-            # Reset history
-            self.history = [(self.display_Image.copy(), self.code_text)]
-            self.history_position = 0
-            
-            self.update_image()
+            self.open_image(self.file_path)
+    
+    def open_image(self, path):
+        """Load an image file and start a fresh history and recipe for it."""
+        # Very large files are memory-mapped from the backing store instead of decoded into RAM
+        image = BACKING_STORE.open_image(path)
+        if image is None:
+            messagebox.showerror("Error", f"Failed to load image: {path}")
+            return False
+        
+        self.file_path = path
+        self.original_image = image
+        self.display_Image = self.working_copy(self.original_image)
+        self.code_text = f"# Load image\nimage = cv2.imread('{os.path.basename(self.file_path)}')\n"
+        self.set_code_text.set(self.code_text)
+        
+        # Update file info
+        img_h, img_w = self.display_Image.shape[:2]
+        file_name = os.path.basename(self.file_path)
+        self.file_info.config(text=f"{file_name} ({img_w}×{img_h})")
+        
+        # Reset history
+        self.recipe = Recipe(source=self.file_path)
+        self.history.reset(self.display_Image, self.code_text)
+        
+        self.update_image()
+        return True
+    
+    def working_copy(self, image):
+        """Copy of the original to edit; mapped images are read-only and used as they are."""
+        return image if is_mapped(image) else image.copy()
     
     def save_image(self):
         if self.display_Image is None:
@@ -235,56 +268,128 @@ class GUI:
     
     def reload_image(self):
         if self.original_image is not None:
-            self.display_Image = self.original_image.copy()
+            self.display_Image = self.working_copy(self.original_image)
             self.scale = 1.0
             self.zoom_label.config(text="100%")
             self.code_text = f"# Load image\nimage = cv2.imread('{os.path.basename(self.file_path)}')\n"
             self.set_code_text.set(self.code_text)
             
             # Reset history
-            self.history = [(self.display_Image.copy(), self.code_text)]
-            self.history_position = 0
+            self.recipe = Recipe(source=self.file_path)
+            self.history.reset(self.display_Image, self.code_text)
             
             self.update_image()
         else:
             messagebox.showinfo("Info", "No image loaded")
     
+    def save_recipe(self):
+        """Save the structured list of applied steps as JSON or YAML."""
+        if not self.recipe.steps:
+            messagebox.showinfo("Info", "No operations to save")
+            return
+        
+        save_path = filedialog.asksaveasfilename(
+            title="Save Recipe",
+            defaultextension=".json",
+            filetypes=[("JSON recipe", "*.json"), ("YAML recipe", "*.yaml *.yml"), ("All files", "*.*")]
+        )
+        if save_path:
+            try:
+                self.recipe.save(save_path)
+                messagebox.showinfo("Success", f"Recipe saved to {save_path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to save recipe: {str(e)}")
+    
+    def load_recipe(self):
+        """Load a recipe and replay it on the original image."""
+        recipe_path = filedialog.askopenfilename(
+            title="Load Recipe",
+            filetypes=[("Recipe files", "*.json *.yaml *.yml"), ("All files", "*.*")]
+        )
+        if not recipe_path:
+            return
+        
+        try:
+            recipe = Recipe.load(recipe_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load recipe: {str(e)}")
+            return
+        
+        # Fall back to the image the recipe was recorded on
+        if self.original_image is None:
+            if not (recipe.source and os.path.exists(recipe.source) and self.open_image(recipe.source)):
+                messagebox.showinfo("Info", "Please load an image first")
+                return
+        
+        self.reload_image()
+        for step in recipe.steps:
+            try:
+                self.push_result(apply_step(self.display_Image, step))
+            except Exception as e:
+                messagebox.showerror("Error", f"Recipe step '{step['op']}' failed: {str(e)}")
+                break
+        self.update_image()
+    
     def update_image(self):
         if self.display_Image is None:
             return
-            
-        # Scale the image
-        h, w = self.display_Image.shape[:2]
-        scaled_w, scaled_h = int(w * self.scale), int(h * self.scale)
-        resized_image = cv2.resize(self.display_Image, (scaled_w, scaled_h))
         
-        # Convert to RGB for display
-        if len(resized_image.shape) == 2:  # Grayscale
-            image_rgb = cv2.cvtColor(resized_image, cv2.COLOR_GRAY2RGB)
-        else:  # Color (BGR)
-            image_rgb = cv2.cvtColor(resized_image, cv2.COLOR_BGR2RGB)
-            
-        img = self.pil_image_module.fromarray(image_rgb)  # <-- Dùng module đã truyền
-        img_tk = self.pil_image_tk_module.PhotoImage(img) # <-- Dùng module đã truyền
+        # The scrollregion spans the whole zoomed image, but only the part
+        # in the viewport is resized and converted
+        self.update_scrollregion()
+        self.render_viewport()
         
-        # Update canvas
+        # Redrawn after the canvas, from a cached subsample
+        self.histogram_panel.show(self.display_Image, self.recipe.color_space)
+    
+    def image_origin(self):
+        """Canvas position of the zoomed image, centered when it is smaller than the canvas."""
+        h, w = self.display_Image.shape[:2]
+        scaled_w, scaled_h = int(w * self.scale), int(h * self.scale)
+        x_pos = max(0, (self.canvas.winfo_width() - scaled_w) // 2)
+        y_pos = max(0, (self.canvas.winfo_height() - scaled_h) // 2)
+        return x_pos, y_pos
+    
+    def viewport(self):
+        """(left, top, width, height) of the visible canvas area in zoomed-image pixels."""
+        x_pos, y_pos = self.image_origin()
+        return (self.canvas.canvasx(0) - x_pos, self.canvas.canvasy(0) - y_pos,
+                self.canvas.winfo_width(), self.canvas.winfo_height())
+    
+    def render_viewport(self):
+        """Draw the visible part of the zoomed image (plus a margin) on the canvas."""
+        self._viewport_pending = None
         self.canvas.delete("all")
+        self.rendered_view = None
+        if self.display_Image is None:
+            return
         
-        # Store the image object to prevent garbage collection
-        self.current_image_tk = img_tk
-        
-        # Create image in the center of canvas
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        
-        # Calculate position to center the image
-        x_pos = max(0, (canvas_width - scaled_w) // 2)
-        y_pos = max(0, (canvas_height - scaled_h) // 2)
+        if self.pyramid is None or self.pyramid.image is not self.display_Image:
+            self.pyramid = display.DisplayPyramid(self.display_Image)
+        rendered = self.pyramid.render(self.scale, self.viewport())
+        if rendered is None:
+            return
+        pixels, (left, top) = rendered
         
-        self.canvas.create_image(x_pos, y_pos, anchor='nw', image=self.current_image_tk)
+        # Refills the same PhotoImage while the rendered size is unchanged;
+        # keep a reference to prevent garbage collection
+        self.current_image_tk = self.display_adapter.photo_image(pixels)
         
-        # Update scrollregion to encompass the image
-        self.update_scrollregion()
+        x_pos, y_pos = self.image_origin()
+        self.canvas.create_image(x_pos + left, y_pos + top, anchor='nw', image=self.current_image_tk)
+        self.rendered_view = (left, top, left + pixels.shape[1], top + pixels.shape[0])
+    
+    def schedule_viewport(self):
+        """Render the viewport once the event loop is idle, unless it is already drawn."""
+        if self.display_Image is None or self._viewport_pending is not None:
+            return
+        h, w = self.display_Image.shape[:2]
+        if not display.covers(self.rendered_view, self.viewport(), (w * self.scale, h * self.scale)):
+            self._viewport_pending = self.root.after_idle(self.render_viewport)
+    
+    def on_scroll(self, view_method, *args):
+        view_method(*args)
+        self.schedule_viewport()
     
     def zoom_in(self):
         self.scale *= 1.2
@@ -318,18 +423,23 @@ class GUI:
         self.update_image()
     
     def undo(self):
-        if self.history_position > 0:
-            self.history_position -= 1
-            self.display_Image, self.code_text = self.history[self.history_position]
-            self.set_code_text.set(self.code_text)
-            self.update_image()
+        if self.history.can_undo():
+            self.restore_state(self.history.undo)
     
     def redo(self):
-        if self.history_position < len(self.history) - 1:
-            self.history_position += 1
-            self.display_Image, self.code_text = self.history[self.history_position]
-            self.set_code_text.set(self.code_text)
-            self.update_image()
+        if self.history.can_redo():
+            self.restore_state(self.history.redo)
+    
+    def restore_state(self, move):
+        # Older states may have to be rebuilt by replaying their recipe steps
+        try:
+            self.display_Image, self.code_text, steps = move()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to restore history state: {str(e)}")
+            return
+        self.recipe.steps = steps
+        self.set_code_text.set(self.code_text)
+        self.update_image()
     
     def apply_transformation(self, transformation):
         if self.display_Image is None:
@@ -375,35 +485,37 @@ class GUI:
         
         result = func_map[transformation](self.display_Image)
         if result:
-            temp_image, code = result
-            self.code_text += code
-            self.display_Image = temp_image
-            self.set_code_text.set(self.code_text)
-            
-            # Add to history
-            self.history = self.history[:self.history_position+1]  # Truncate forward history
-            self.history.append((self.display_Image.copy(), self.code_text))
-            self.history_position = len(self.history) - 1
-            
+            self.push_result(result)
             self.update_image()
     
+    def push_result(self, result):
+        """Make an operation result current and record it in history and the recipe."""
+        temp_image, code = result
+        self.code_text += code
+        self.display_Image = temp_image
+        self.set_code_text.set(self.code_text)
+        
+        step = getattr(result, "step", None)
+        if step is not None:
+            self.recipe.steps.append(step)
+        
+        # Add to history (truncates forward history)
+        self.history.push(self.display_Image, self.code_text, self.recipe.steps)
+    
     def on_canvas_configure(self, event):
-        # Update scrollregion when canvas is resized
+        # Update scrollregion when canvas is resized; the image may have to be recentered
         self.update_scrollregion()
+        self.rendered_view = None
+        self.schedule_viewport()
     
     def update_scrollregion(self):
         # Update scrollregion to match image size at current scale
         if self.display_Image is not None:
             h, w = self.display_Image.shape[:2]
             scaled_w, scaled_h = int(w * self.scale), int(h * self.scale)
-            
-            canvas_width = self.canvas.winfo_width()
-            canvas_height = self.canvas.winfo_height()
+            x_pos, y_pos = self.image_origin()
             
             # Bbox is (left, top, right, bottom)
-            x_pos = max(0, (canvas_width - scaled_w) // 2)
-            y_pos = max(0, (canvas_height - scaled_h) // 2)
-            
             self.canvas.config(scrollregion=(x_pos, y_pos, x_pos + scaled_w, y_pos + scaled_h))
         else:
             self.canvas.config(scrollregion=self.canvas.bbox("all"))
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Backing Store Benchmark
+
+Opens a large image and runs a tiled Gaussian blur on it the way the GUI
+does (working copy, History.reset on open, History.push of the result),
+each variant in a fresh process, and reports peak memory: total RSS, and anonymous RSS
+(private memory; memory-mapped file pages are not counted, since the
+kernel can drop and re-read them at any time). Variants:
+
+    ram      cv2.imread plus the GUI's working copy, result in RAM
+    decode   first BackingStore.open_image: decode into the store, then map
+    mapped   BackingStore.open_image of an already decoded file
+
+The test image is a mosaic of the `example-data/uav` frames written to a
+temporary directory. Linux only (reads /proc/self/status).
+
+Usage:
+    python -m benchmarks.backing_store [--mosaic 6x6]
+"""
+
+import argparse
+import glob
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+def memory_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+class PeakSampler(threading.Thread):
+    """Samples anonymous RSS every few milliseconds and keeps the peak."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            self.peak = max(self.peak, memory_kb("RssAnon"))
+            time.sleep(0.002)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, memory_kb("RssAnon"))
+
+
+def child(mode, path, store_dir):
+    from processors import pipeline
+    from processors.backing_store import BackingStore, is_mapped
+    from processors.history import History
+
+    baseline = memory_kb("RssAnon")
+    sampler = PeakSampler()
+    sampler.start()
+    start = time.perf_counter()
+    if mode == "ram":
+        original = cv2.imread(path)
+    else:
+        original = BackingStore(store_dir, min_pixels=0).open_image(path)
+    image = original if is_mapped(original) else original.copy()  # Gui.working_copy
+    history = History()
+    history.reset(image, "")
+    loaded = time.perf_counter() - start
+    result, _ = pipeline.run_op("gaussian_blur", image, ksize=15)
+    history.push(result, "")
+    checksum = int(result[::97, ::89].sum())
+    elapsed = time.perf_counter() - start
+    sampler.stop()
+    print(f"{loaded:.2f} {elapsed:.2f} {memory_kb('VmHWM')} {sampler.peak - baseline} {type(result).__name__} {checksum}")
+
+
+def make_mosaic(paths, rows, cols, out_path):
+    frames = [cv2.imread(p) for p in paths[:rows * cols]]
+    h, w = frames[0].shape[:2]
+    frames = [cv2.resize(f, (w, h)) for f in frames]
+    frames += frames[:rows * cols - len(frames)]
+    image = np.vstack([np.hstack([frames[(r * cols + c) % len(frames)] for c in range(cols)])
+                       for r in range(rows)])
+    cv2.imwrite(out_path, image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+    return image.shape
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.backing_store")
+    parser.add_argument("--images", default="example-data/uav/*.jpg")
+    parser.add_argument("--mosaic", default="6x6", help="Frames per column x per row of the test image")
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "PATH", "STORE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        child(*args.child)
+        return
+
+    paths = sorted(glob.glob(args.images))
+    if not paths:
+        parser.error(f"no images match {args.images}")
+    rows, cols = (int(v) for v in args.mosaic.lower().split("x"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "mosaic.jpg")
+        h, w = make_mosaic(paths, rows, cols, path)[:2]
+        store = os.path.join(tmp, "store")
+        print(f"{w}x{h} ({w * h / 1e6:.0f} MP, {w * h * 3 / 2 ** 20:.0f} MB decoded), Gaussian blur 15x15")
+        print("  variant   load s  total s   peak RSS MB   peak anonymous MB   result")
+        checksums = set()
+        for mode in ("ram", "decode", "mapped"):
+            out = subprocess.run([sys.executable, "-m", "benchmarks.backing_store", "--child", mode, path, store],
+                                 capture_output=True, text=True, check=True).stdout.split()
+            loaded, elapsed, hwm, anon, kind, checksum = out
+            checksums.add(checksum)
+            print(f"  {mode:<8} {float(loaded):7.2f} {float(elapsed):8.2f}   {int(hwm) / 1024:11.0f}"
+                  f"   {int(anon) / 1024:17.0f}   {kind}")
+        assert len(checksums) == 1, "results differ"
+
+
+if __name__ == "__main__":
+    main()
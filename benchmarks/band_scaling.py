@@ -0,0 +1,76 @@
+"""
+Row-Band Scaling Benchmark
+
+Times the NumPy path of the log and power-law transforms (used for
+non-uint8 images; uint8 goes through a lookup table) on a large float32
+image. The one-expression formula it replaced is compared against the
+row-band version run on 1 to N threads, with a parity check at every point.
+Speedups are relative to the one-expression formula.
+
+Usage:
+    python -m benchmarks.band_scaling [image] [--size 3840x2160] [--max-workers 8]
+"""
+
+import argparse
+import os
+import timeit
+
+import cv2
+import numpy as np
+
+from processors import ops
+
+from .viewport import parse_size
+
+
+def log_direct(image, c):
+    normalized = image.astype(np.float32) / 255.0
+    return np.clip(c * np.log1p(normalized) * 255, 0, 255).astype(np.uint8)
+
+
+def power_direct(image, gamma, c):
+    normalized = image.astype(np.float32) / 255.0
+    return np.clip(c * np.power(normalized, gamma) * 255, 0, 255).astype(np.uint8)
+
+
+CASES = [
+    ("log", log_direct, ops._log_values, (1.8,)),
+    ("power", power_direct, ops._power_values, (0.6, 1.1)),
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.band_scaling")
+    parser.add_argument("image", nargs="?", default="image/649639.jpg")
+    parser.add_argument("--size", type=parse_size, default=(3840, 2160), help="Resize the image first")
+    parser.add_argument("--max-workers", type=int, default=max(4, os.cpu_count() or 1))
+    parser.add_argument("-n", "--number", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    image = cv2.imread(args.image)
+    if image is None:
+        parser.error(f"failed to load {args.image}")
+    # Float input with some values outside [0, 255] exercises the clipping
+    image = cv2.resize(image, args.size).astype(np.float32) * 1.1
+
+    workers = [1]
+    while workers[-1] * 2 <= args.max_workers:
+        workers.append(workers[-1] * 2)
+    if workers[-1] != args.max_workers:
+        workers.append(args.max_workers)
+
+    h, w = image.shape[:2]
+    print(f"{w}x{h}x{image.shape[2]} float32, {os.cpu_count()} CPU(s)")
+    for name, direct, banded, params in CASES:
+        expected = direct(image, *params)
+        t_direct = min(timeit.repeat(lambda: direct(image, *params), number=1, repeat=args.number))
+        print(f"  {name:<6} one expression {t_direct * 1000:8.1f} ms")
+        for n in workers:
+            assert np.array_equal(banded(image, *params, workers=n), expected), f"{name}: output differs"
+            t = min(timeit.repeat(lambda: banded(image, *params, workers=n), number=1, repeat=args.number))
+            print(f"         {n:2d} thread{'s' if n > 1 else ' '}     {t * 1000:8.1f} ms   {t_direct / t:5.2f}x")
+    print("outputs identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Display Adapter Benchmark
+
+Redraws of the main view while scrolling at 100% zoom, in frames per
+second. The old path converts every frame with cv2.cvtColor to a new RGB
+array (grayscale expanded to three channels), copies it into PIL with
+Image.fromarray and creates a new ImageTk.PhotoImage. The new one uses
+`display.DisplayAdapter`. Both paths are checked to give the same pixels.
+
+When no display is available the Tk step is skipped, so only the
+conversion up to the PIL image is timed.
+
+Usage:
+    python -m benchmarks.display_fps [image] [--size 3840x2160] [--canvas 1000x600]
+"""
+
+import argparse
+import time
+import tkinter as tk
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+from processors import display
+
+from .viewport import parse_size
+
+
+def frames(image, canvas, count):
+    """Viewport renders for `count` scroll positions across the image at 100%."""
+    h, w = image.shape[:2]
+    cw, ch = canvas
+    for i in range(count):
+        view = ((w - cw) * i / max(1, count - 1), (h - ch) / 2, cw, ch)
+        region = display.visible_region((w, h), 1.0, view)
+        yield display.render_region(image, 1.0, region)[0]
+
+
+def old_path(pixels, with_tk):
+    img = Image.fromarray(display.to_rgb(pixels))
+    return ImageTk.PhotoImage(img) if with_tk else img
+
+
+def new_path(adapter, pixels, with_tk):
+    return adapter.photo_image(pixels) if with_tk else adapter.pil_image(pixels)
+
+
+def fps(draw, image, canvas, count):
+    rendered = list(frames(image, canvas, count))
+    start = time.perf_counter()
+    for pixels in rendered:
+        draw(pixels)
+    return count / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.display_fps")
+    parser.add_argument("image", nargs="?", default="image/649639.jpg")
+    parser.add_argument("--size", type=parse_size, default=(3840, 2160), help="Resize the image first")
+    parser.add_argument("--canvas", type=parse_size, default=(1000, 600), help="Viewport size")
+    parser.add_argument("-n", "--frames", type=int, default=60)
+    args = parser.parse_args(argv)
+
+    image = cv2.imread(args.image)
+    if image is None:
+        parser.error(f"failed to load {args.image}")
+    image = cv2.resize(image, args.size)
+
+    try:
+        root = tk.Tk()
+        root.withdraw()
+        with_tk = True
+    except tk.TclError:
+        root, with_tk = None, False
+        print("no display: timing conversion to a PIL image only (PhotoImage step skipped)")
+
+    for name, sample in (("color", image), ("gray", cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))):
+        adapter = display.DisplayAdapter(Image, ImageTk)
+        pixels = next(frames(sample, args.canvas, 1))
+        expected = np.asarray(old_path(pixels, False).convert("RGB"))
+        actual = np.asarray(adapter.pil_image(pixels).convert("RGB"))
+        assert np.array_equal(expected, actual), f"{name}: adapter output differs"
+
+        old = fps(lambda p: old_path(p, with_tk), sample, args.canvas, args.frames)
+        new = fps(lambda p: new_path(adapter, p, with_tk), sample, args.canvas, args.frames)
+        print(f"  {name:5s} old {old:7.1f} fps   adapter {new:8.1f} fps   ({new / old:.1f}x)")
+
+    if root is not None:
+        root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Display Pyramid Benchmark
+
+Walks through the main window's zoom-out steps (100% down to about 10% in
+steps of 0.8x, then Fit) and times each redraw drawn with bilinear
+resizing from full resolution against `display.DisplayPyramid`. Pyramid
+times include building each level the first time it is needed. Each result is also
+compared with an area-interpolated downscale of the full image (PSNR, in
+dB; higher means less aliasing), and the pyramid renders are checked to
+cover the viewport.
+
+Usage:
+    python -m benchmarks.display_pyramid [image] [--size 3840x2160] [--canvas 1000x600]
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from processors import display
+
+from .viewport import parse_size
+
+
+def bilinear(image, scale, view):
+    h, w = image.shape[:2]
+    region = display.visible_region((w, h), scale, view)
+    return display.render_region(image, scale, region)
+
+
+def psnr(a, b):
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255 ** 2 / mse)
+
+
+def reference(image, scale, pixels, origin):
+    """Area-interpolated downscale of the full image, cropped like `pixels`."""
+    h, w = image.shape[:2]
+    full = cv2.resize(image, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+    x, y = origin
+    ph, pw = pixels.shape[:2]
+    crop = full[y:y + ph, x:x + pw]
+    return crop, pixels[:crop.shape[0], :crop.shape[1]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.display_pyramid")
+    parser.add_argument("image", nargs="?", default="image/649639.jpg")
+    parser.add_argument("--size", type=parse_size, default=(3840, 2160), help="Resize the image first")
+    parser.add_argument("--canvas", type=parse_size, default=(1000, 600), help="Viewport size")
+    args = parser.parse_args(argv)
+
+    image = cv2.imread(args.image)
+    if image is None:
+        parser.error(f"failed to load {args.image}")
+    image = cv2.resize(image, args.size)
+    h, w = image.shape[:2]
+    cw, ch = args.canvas
+
+    scales = [0.8 ** k for k in range(11)]
+    scales.append(min(cw / w, ch / h) * 0.95)  # GUI.zoom_fit
+    pyramid = display.DisplayPyramid(image)
+
+    print(f"{w}x{h} image, {cw}x{ch} viewport")
+    print("   zoom   bilinear ms  pyramid ms   PSNR bilinear / pyramid")
+    totals = [0.0, 0.0]
+    for scale in scales:
+        view = ((w * scale - cw) / 2, (h * scale - ch) / 2, cw, ch)
+
+        start = time.perf_counter()
+        old, old_origin = bilinear(image, scale, view)
+        t_old = time.perf_counter() - start
+        start = time.perf_counter()
+        new, new_origin = pyramid.render(scale, view)
+        t_new = time.perf_counter() - start
+        totals[0] += t_old
+        totals[1] += t_new
+
+        rendered = new_origin + (new_origin[0] + new.shape[1], new_origin[1] + new.shape[0])
+        assert display.covers(rendered, view, (w * scale, h * scale)), (scale, rendered)
+        q_old = psnr(*reference(image, scale, old, old_origin))
+        q_new = psnr(*reference(image, scale, new, new_origin))
+        print(f"  {scale * 100:4.0f}%  {t_old * 1000:10.1f}  {t_new * 1000:10.1f}   {q_old:6.1f} / {q_new:6.1f}")
+
+    print(f"  total {totals[0] * 1000:9.1f}  {totals[1] * 1000:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Histogram Statistics Benchmark
+
+Compares the Histogram Viewer's old statistics (a calcHist plus separate
+np.mean/np.std/np.min/np.max passes per channel) with `ops.image_statistics`,
+which derives everything from one histogram per channel, and checks that
+both report the same numbers.
+
+Usage:
+    python -m benchmarks.histogram_stats [image] [--scale 2]
+"""
+
+import argparse
+import timeit
+
+import cv2
+import numpy as np
+
+from processors import ops
+
+
+def separate_passes(image):
+    channels = [image] if image.ndim == 2 else cv2.split(image)
+    hists, stats = [], []
+    for i, channel in enumerate(channels):
+        hists.append(cv2.calcHist([image], [i], None, [256], [0, 256]))
+        stats.append((np.mean(channel), np.std(channel), np.min(channel), np.max(channel)))
+    return hists, stats
+
+
+def check_parity(image):
+    hists, stats = ops.image_statistics(image)
+    old_hists, old_stats = separate_passes(image)
+    for hist, old_hist, s, (mean, std, lo, hi) in zip(hists, old_hists, stats, old_stats):
+        assert np.array_equal(hist, old_hist.ravel()), "histograms differ"
+        assert abs(s.mean - mean) < 1e-6 and abs(s.std - std) < 1e-6, (s, mean, std)
+        assert (s.min, s.max) == (lo, hi), (s, lo, hi)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.histogram_stats")
+    parser.add_argument("image", nargs="?", default="image/649639.jpg")
+    parser.add_argument("--scale", type=float, default=1.0, help="Resize the image before timing")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    image = cv2.imread(args.image)
+    if image is None:
+        parser.error(f"failed to load {args.image}")
+    if args.scale != 1.0:
+        image = cv2.resize(image, None, fx=args.scale, fy=args.scale)
+
+    for name, sample in (("color", image), ("gray", cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))):
+        check_parity(sample)
+        old = min(timeit.repeat(lambda: separate_passes(sample), number=1, repeat=args.repeat))
+        new = min(timeit.repeat(lambda: ops.image_statistics(sample), number=1, repeat=args.repeat))
+        h, w = sample.shape[:2]
+        print(f"{name:5s} {w}x{h}: separate passes {old * 1000:7.1f} ms   "
+              f"from histogram {new * 1000:6.1f} ms   ({old / new:.1f}x)")
+    print("statistics match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Image Loading Benchmark
+
+Compares what the stitching dialog used to do before opening, a serial
+`cv2.imread` of every file followed by resizing to thumbnails, with the
+loader service: reduced-resolution thumbnail decodes on the thread pool,
+the same served from a warm on-disk thumbnail cache (a temporary one, so
+the user's cache is untouched), and full-resolution decodes on the pool.
+
+Usage:
+    python -m benchmarks.image_loading [folder] [--size 120] [--workers N]
+"""
+
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+import cv2
+
+from processors.loader import MAX_WORKERS, ImageLoader
+from processors.thumbnail_cache import ThumbnailCache
+
+
+def serial(paths, size):
+    thumbs = []
+    for path in paths:
+        img = cv2.imread(path)
+        h, w = img.shape[:2]
+        scale = min(size / w, size / h)
+        thumbs.append(cv2.resize(img, (int(w * scale), int(h * scale))))
+    return thumbs
+
+
+def best_of(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.image_loading")
+    parser.add_argument("folder", nargs="?", default="example-data/CMU0")
+    parser.add_argument("--size", type=int, default=120, help="Thumbnail size")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args(argv)
+
+    paths = sorted(p for p in glob.glob(os.path.join(args.folder, "*")) if p.lower().endswith((".jpg", ".png")))
+    if not paths:
+        parser.error(f"no images in {args.folder}")
+    loader = ImageLoader(args.workers)
+    megabytes = sum(os.path.getsize(p) for p in paths) / 1e6
+
+    t_serial = best_of(lambda: serial(paths, args.size))
+    t_thumbs = best_of(lambda: loader.thumbnails(paths, args.size))
+    t_full = best_of(lambda: loader.load_all(paths))
+    with tempfile.TemporaryDirectory() as directory:
+        cached = ImageLoader(args.workers, thumbnail_cache=ThumbnailCache(directory))
+        cached.thumbnails(paths, args.size)  # warm the cache
+        t_cached = best_of(lambda: cached.thumbnails(paths, args.size))
+
+    print(f"{args.folder}: {len(paths)} files, {megabytes:.1f} MB, {args.workers} workers, {os.cpu_count()} cores")
+    print(f"  serial imread + resize:         {t_serial * 1000:8.1f} ms")
+    print(f"  loader thumbnails (reduced):    {t_thumbs * 1000:8.1f} ms  ({t_serial / t_thumbs:.1f}x faster)")
+    print(f"  thumbnails from disk cache:     {t_cached * 1000:8.1f} ms  ({t_serial / t_cached:.1f}x faster)")
+    print(f"  loader full resolution:         {t_full * 1000:8.1f} ms  (in the background once the dialog is open)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Matcher Backend Benchmark
+
+Times kNN matching with brute force against FLANN (KD-trees for SIFT, LSH
+for ORB) and compares how many matches pass the ratio test and how many of
+those are RANSAC inliers. Features are detected once per image and are not
+part of the timing.
+
+Pairs are building0/building1 plus consecutive images from each
+example-data sequence.
+
+Usage:
+    python -m benchmarks.matchers [--pairs-per-set 2] [--checks 50] [--trees 5]
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from processors import ops
+
+
+def image_pairs(pairs_per_set):
+    pairs = [("image/building0.jpg", "image/building1.jpg")]
+    for folder in sorted(glob.glob("example-data/*/")):
+        paths = sorted(glob.glob(os.path.join(folder, "*.jpg")) + glob.glob(os.path.join(folder, "*.png")))
+        pairs.extend(zip(paths, paths[1:]))  # consecutive frames overlap
+        del pairs[len(pairs) - max(0, len(paths) - 1 - pairs_per_set):]
+    return pairs
+
+
+def evaluate(reference, image, method, matcher, ratio, checks, trees, repeat):
+    pts1, des1 = ops.detect_features(reference, method)
+    pts2, des2 = ops.detect_features(image, method)
+    if des1 is None or des2 is None:
+        return None
+
+    knn = ops.create_matcher(method, matcher, checks, trees)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        raw = knn.knnMatch(des2, des1, k=2)
+        best = min(best, time.perf_counter() - start)
+
+    matches = ops.knn_arrays(raw)
+    good = ops.ratio_test(matches, ratio)
+    inliers = 0
+    if np.count_nonzero(good) >= 4:
+        src = pts2[matches.query_idx[good]].reshape(-1, 1, 2)
+        dst = pts1[matches.train_idx[good]].reshape(-1, 1, 2)
+        _, mask = cv2.findHomography(src, dst, cv2.RANSAC, 5.0)
+        inliers = int(mask.sum()) if mask is not None else 0
+    return best, int(np.count_nonzero(good)), inliers, len(des2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.matchers")
+    parser.add_argument("--pairs-per-set", type=int, default=2, help="Consecutive pairs per example-data folder")
+    parser.add_argument("--ratio", type=float, default=0.75)
+    parser.add_argument("--checks", type=int, default=50)
+    parser.add_argument("--trees", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    totals = {}
+    print(f"{'pair':<42} {'method':<5} {'matcher':<6} {'desc':>6} {'ms':>8} {'good':>6} {'inliers':>8}")
+    for ref_path, mov_path in image_pairs(args.pairs_per_set):
+        reference, image = cv2.imread(ref_path), cv2.imread(mov_path)
+        if reference is None or image is None:
+            continue
+        name = f"{os.path.basename(os.path.dirname(ref_path))}/{os.path.basename(ref_path)}"
+        for method in ("orb", "sift"):
+            for matcher in ("bf", "flann"):
+                row = evaluate(reference, image, method, matcher, args.ratio, args.checks, args.trees, args.repeat)
+                if row is None:
+                    continue
+                secs, good, inliers, count = row
+                print(f"{name:<42} {method:<5} {matcher:<6} {count:>6} {secs * 1000:>8.2f} {good:>6} {inliers:>8}")
+                total = totals.setdefault((method, matcher), [0.0, 0, 0])
+                total[0] += secs
+                total[1] += good
+                total[2] += inliers
+
+    print("\nTotals")
+    for method in ("orb", "sift"):
+        bf, flann = totals.get((method, "bf")), totals.get((method, "flann"))
+        if not bf or not flann:
+            continue
+        print(f"  {method.upper():<5} brute force {bf[0] * 1000:8.1f} ms, {bf[2]} inliers | "
+              f"FLANN {flann[0] * 1000:8.1f} ms, {flann[2]} inliers | "
+              f"speedup {bf[0] / flann[0]:.2f}x, inlier ratio {flann[2] / max(1, bf[2]):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Point Operation Fusion Benchmark
+
+Replays a chain of point operations (Negative -> Log -> Gamma -> Contrast ->
+Truncate threshold by default) over every image in a folder, once step by
+step and once with the runs fused into a single lookup table, checks that
+the outputs are identical and compares the time spent. Decoding is done up
+front and not timed.
+
+Usage:
+    python -m benchmarks.pipeline_fusion [folder] [--recipe recipe.json] [--repeat 3]
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from processors.pipeline import load_pipeline, run_pipeline
+
+
+DEFAULT_STEPS = [
+    {"op": "negative", "params": {}},
+    {"op": "log_transform", "params": {"c": 1.2}},
+    {"op": "power_transform", "params": {"gamma": 0.8, "c": 1.0}},
+    {"op": "linear_contrast", "params": {"alpha": 1.3, "beta": -10}},
+    {"op": "threshold", "params": {"thresh": 200, "maxval": 255, "thresh_type": cv2.THRESH_TRUNC}},
+]
+
+
+def timed(images, steps, fuse, repeat):
+    best, outputs = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [run_pipeline(img, steps, fuse=fuse)[0] for img in images]
+        best = min(best, time.perf_counter() - start)
+    return best, outputs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.pipeline_fusion")
+    parser.add_argument("folder", nargs="?", default="example-data/CMU0")
+    parser.add_argument("--recipe", help="Pipeline/recipe file to replay instead of the default chain")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    steps = load_pipeline(args.recipe) if args.recipe else DEFAULT_STEPS
+    paths = sorted(p for p in glob.glob(os.path.join(args.folder, "*")) if p.lower().endswith((".jpg", ".png")))
+    images = [img for img in (cv2.imread(p) for p in paths) if img is not None]
+    if not images:
+        parser.error(f"no images in {args.folder}")
+    megapixels = sum(img.shape[0] * img.shape[1] for img in images) / 1e6
+
+    t_steps, expected = timed(images, steps, False, args.repeat)
+    t_fused, actual = timed(images, steps, True, args.repeat)
+    assert all(np.array_equal(a, b) for a, b in zip(expected, actual)), "fused output differs"
+
+    print(f"{args.folder}: {len(images)} images, {megapixels:.1f} MP, {len(steps)} steps "
+          f"({', '.join(s['op'] for s in steps)})")
+    print(f"  step by step: {t_steps * 1000:8.1f} ms  ({megapixels / t_steps:7.1f} MP/s)")
+    print(f"  fused:        {t_fused * 1000:8.1f} ms  ({megapixels / t_fused:7.1f} MP/s)  "
+          f"{t_steps / t_fused:.1f}x faster, identical output")
+
+
+if __name__ == "__main__":
+    main()
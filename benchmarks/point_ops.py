@@ -0,0 +1,96 @@
+"""
+Point Operation LUT Benchmark
+
+Checks that the lookup-table versions of the log and power-law transforms
+in `ops`, and the table built for linear contrast, give exactly the same
+output as the direct formulas, over the dialogs' whole parameter ranges and
+every uint8 value, then times both on a large image.
+
+Usage:
+    python -m benchmarks.point_ops [image] [--scale 2]
+"""
+
+import argparse
+import timeit
+
+import cv2
+import numpy as np
+
+from processors import ops
+
+
+def log_direct(image, c):
+    normalized = image.astype(np.float32) / 255.0
+    log_img = c * np.log1p(normalized)
+    return np.clip(log_img * 255, 0, 255).astype(np.uint8)
+
+
+def power_direct(image, gamma, c):
+    normalized = image.astype(np.float32) / 255.0
+    power_img = c * np.power(normalized, gamma)
+    return np.clip(power_img * 255, 0, 255).astype(np.uint8)
+
+
+def contrast_direct(image, alpha, beta):
+    return cv2.convertScaleAbs(image, alpha=alpha, beta=beta)
+
+
+def contrast_lut(image, alpha, beta):
+    return cv2.LUT(image, ops.linear_contrast_lut(alpha, beta)), None
+
+
+CASES = [
+    ("log", log_direct, ops.log_transform, [(c,) for c in np.linspace(0.1, 5.0, 50)]),
+    ("power", power_direct, ops.power_transform,
+     [(g, c) for g in np.linspace(0.1, 5.0, 25) for c in np.linspace(0.1, 2.0, 8)]),
+    ("contrast", contrast_direct, contrast_lut,
+     [(a, b) for a in np.linspace(0.1, 3.0, 30) for b in range(-100, 101, 25)]),
+]
+
+
+def check_parity(samples):
+    checked = 0
+    for name, direct, lut_version, grid in CASES:
+        for params in grid:
+            params = tuple(float(p) for p in params)
+            for sample in samples:
+                expected = direct(sample, *params)
+                actual, _ = lut_version(sample, *params)
+                if not np.array_equal(expected, actual):
+                    diff = np.argwhere(expected != actual)[0]
+                    raise AssertionError(f"{name}{params}: outputs differ at {tuple(diff)}")
+                checked += 1
+    return checked
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.point_ops")
+    parser.add_argument("image", nargs="?", default="image/649639.jpg")
+    parser.add_argument("--scale", type=float, default=1.0, help="Resize the image before timing")
+    parser.add_argument("-n", "--number", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    image = cv2.imread(args.image)
+    if image is None:
+        parser.error(f"failed to load {args.image}")
+    if args.scale != 1.0:
+        image = cv2.resize(image, None, fx=args.scale, fy=args.scale)
+
+    # Every uint8 value, in gray and color layouts and at odd lengths, plus a crop of the image
+    ramp = np.arange(256, dtype=np.uint8)
+    samples = [ramp.reshape(16, 16), np.dstack([ramp, ramp[::-1], np.roll(ramp, 7)]).reshape(16, 16, 3),
+               np.tile(ramp, 3)[:700].reshape(7, 100), image[:257, :301]]
+    checked = check_parity(samples)
+    print(f"parity: {checked} parameter/sample combinations identical")
+
+    print(f"{image.shape[1]}x{image.shape[0]} ({image.nbytes / 1e6:.1f} MB)")
+    for name, direct, lut_version, grid in CASES:
+        params = tuple(float(p) for p in grid[len(grid) // 2])
+        t_direct = min(timeit.repeat(lambda: direct(image, *params), number=args.number, repeat=3)) / args.number
+        t_lut = min(timeit.repeat(lambda: lut_version(image, *params), number=args.number, repeat=3)) / args.number
+        print(f"  {name:<9} direct {t_direct * 1000:8.2f} ms   LUT {t_lut * 1000:7.2f} ms   "
+              f"{t_direct / t_lut:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Pyramid Registration Benchmark
+
+Times full resolution registration (`ops.find_homography`) against the
+coarse-to-fine mode (`ops.find_homography_pyramid`) and reports how far
+apart the two homographies put the corners of the moving image. For a
+synthetic pair, a large image warped by a known homography, the error of
+each against the ground truth is shown as well. The feature cache is
+cleared before every run so each timing includes detection.
+
+Usage:
+    python -m benchmarks.pyramid_registration [--method orb|sift|both] [--coarse-size 1024]
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from processors import ops
+
+
+PAIRS = [
+    ("image/01.jpg", "image/01_missing_hole_01.jpg"),
+    ("image/building0.jpg", "image/building1.jpg"),
+]
+SYNTHETIC = "image/649639.jpg"
+SYNTHETIC_H = np.float64([[1.02, 0.03, -40.0], [-0.02, 0.99, 25.0], [1e-6, 0.0, 1.0]])
+
+
+def corner_error(H1, H2, shape):
+    """Largest distance between the corners of `shape` mapped by H1 and by H2."""
+    h, w = shape[:2]
+    corners = np.float32([[0, 0], [w, 0], [w, h], [0, h]]).reshape(-1, 1, 2)
+    a = cv2.perspectiveTransform(corners, H1)
+    b = cv2.perspectiveTransform(corners, H2)
+    return float(np.linalg.norm(a - b, axis=2).max())
+
+
+def timed(estimate, reference, image, method, **kwargs):
+    ops.FEATURE_CACHE.clear()
+    start = time.perf_counter()
+    H, _ = estimate(reference, image, method, **kwargs)
+    return H, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.pyramid_registration")
+    parser.add_argument("--method", default="both", choices=["orb", "sift", "both"])
+    parser.add_argument("--coarse-size", type=int, default=1024, help="Long side of the matched level")
+    args = parser.parse_args(argv)
+    methods = ("orb", "sift") if args.method == "both" else (args.method,)
+
+    cases = []
+    for ref_path, mov_path in PAIRS:
+        reference, image = cv2.imread(ref_path), cv2.imread(mov_path)
+        if reference is not None and image is not None:
+            cases.append((ref_path.split("/")[-1], reference, image, None))
+    synthetic = cv2.imread(SYNTHETIC)
+    if synthetic is not None:
+        h, w = synthetic.shape[:2]
+        moved = cv2.warpPerspective(synthetic, np.linalg.inv(SYNTHETIC_H), (w, h))
+        cases.append((SYNTHETIC.split("/")[-1] + " (synthetic)", synthetic, moved, SYNTHETIC_H))
+
+    print(f"{'pair':<26} {'size':>10} {'method':<5} {'full ms':>9} {'pyramid ms':>11} {'speedup':>8} "
+          f"{'diff px':>8} {'truth px':>15}")
+    for name, reference, image, truth in cases:
+        size = f"{image.shape[1]}x{image.shape[0]}"
+        for method in methods:
+            H_full, t_full = timed(ops.find_homography, reference, image, method)
+            H_pyr, t_pyr = timed(ops.find_homography_pyramid, reference, image, method,
+                                 coarse_size=args.coarse_size)
+            diff = corner_error(H_full, H_pyr, image.shape)
+            against = ""
+            if truth is not None:
+                against = f"{corner_error(H_full, truth, image.shape):.2f} / {corner_error(H_pyr, truth, image.shape):.2f}"
+            print(f"{name:<26} {size:>10} {method:<5} {t_full * 1000:>9.0f} {t_pyr * 1000:>11.0f} "
+                  f"{t_full / t_pyr:>7.1f}x {diff:>8.2f} {against:>15}")
+
+    print("\ndiff: corner distance between the two estimates; truth: full / pyramid error vs the known warp")
+
+
+if __name__ == "__main__":
+    main()
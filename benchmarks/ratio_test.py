@@ -0,0 +1,84 @@
+"""
+Ratio Test Micro-Benchmark
+
+Compares the per-DMatch Python loop registration used to run on every
+preview with the masked array version in `ops.find_homography`: ratio
+filtering plus gathering the src/dst point arrays handed to RANSAC.
+Detection and matching are done once up front and are not timed.
+
+Usage:
+    python -m benchmarks.ratio_test [reference] [moving] [--method orb|sift] [--ratio 0.75]
+"""
+
+import argparse
+import timeit
+
+import cv2
+import numpy as np
+
+from processors import ops
+
+
+def loop_version(matches, kp1, kp2, ratio):
+    good_matches = []
+    for match_pair in matches:
+        if len(match_pair) == 2:
+            m, n = match_pair
+            if m.distance < ratio * n.distance:
+                good_matches.append(m)
+    src_pts = np.float32([kp2[m.queryIdx].pt for m in good_matches]).reshape(-1, 1, 2)
+    dst_pts = np.float32([kp1[m.trainIdx].pt for m in good_matches]).reshape(-1, 1, 2)
+    return src_pts, dst_pts
+
+
+def array_version(matches, pts1, pts2, ratio):
+    good = ops.ratio_test(matches, ratio)
+    src_pts = pts2[matches.query_idx[good]].reshape(-1, 1, 2)
+    dst_pts = pts1[matches.train_idx[good]].reshape(-1, 1, 2)
+    return src_pts, dst_pts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.ratio_test")
+    parser.add_argument("reference", nargs="?", default="image/building0.jpg")
+    parser.add_argument("moving", nargs="?", default="image/building1.jpg")
+    parser.add_argument("--method", default="orb", choices=["orb", "sift"])
+    parser.add_argument("--ratio", type=float, default=0.75)
+    parser.add_argument("-n", "--number", type=int, default=50, help="Repetitions per timing")
+    args = parser.parse_args(argv)
+
+    reference, moving = cv2.imread(args.reference), cv2.imread(args.moving)
+    if reference is None or moving is None:
+        parser.error("failed to load input images")
+
+    # Raw DMatch lists and keypoints for the loop version
+    detector = cv2.ORB_create(nfeatures=5000) if args.method == "orb" else cv2.SIFT_create()
+    norm = cv2.NORM_HAMMING if args.method == "orb" else cv2.NORM_L2
+    kp1, des1 = detector.detectAndCompute(cv2.cvtColor(reference, cv2.COLOR_BGR2GRAY), None)
+    kp2, des2 = detector.detectAndCompute(cv2.cvtColor(moving, cv2.COLOR_BGR2GRAY), None)
+    raw = cv2.BFMatcher(norm).knnMatch(des2, des1, k=2)
+
+    # Array form, converted once
+    pts1 = np.float32([kp.pt for kp in kp1])
+    pts2 = np.float32([kp.pt for kp in kp2])
+    matches = ops.knn_arrays(raw)
+
+    loop_src, loop_dst = loop_version(raw, kp1, kp2, args.ratio)
+    arr_src, arr_dst = array_version(matches, pts1, pts2, args.ratio)
+    assert np.array_equal(loop_src, arr_src) and np.array_equal(loop_dst, arr_dst), "results differ"
+
+    t_loop = min(timeit.repeat(lambda: loop_version(raw, kp1, kp2, args.ratio),
+                               number=args.number, repeat=5)) / args.number
+    t_array = min(timeit.repeat(lambda: array_version(matches, pts1, pts2, args.ratio),
+                                number=args.number, repeat=5)) / args.number
+    t_convert = min(timeit.repeat(lambda: ops.knn_arrays(raw), number=5, repeat=3)) / 5
+
+    print(f"{args.method.upper()}: {len(kp1)}/{len(kp2)} keypoints, {len(raw)} kNN pairs, "
+          f"{len(arr_src)} pass ratio {args.ratio}")
+    print(f"  Python loop:        {t_loop * 1000:8.3f} ms")
+    print(f"  NumPy masked:       {t_array * 1000:8.3f} ms  ({t_loop / t_array:.0f}x faster)")
+    print(f"  one-off conversion: {t_convert * 1000:8.3f} ms  (cached with the matches)")
+
+
+if __name__ == "__main__":
+    main()
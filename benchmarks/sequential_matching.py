@@ -0,0 +1,78 @@
+"""
+Sequential Matching Benchmark
+
+Stitches ordered sweeps (example-data/CMU0 and NSH by default) once with
+every image pair matched and once matching each image only with its next
+k neighbors, optionally with loop closure. Reports the number of matched
+pairs, the time spent in pairwise matching (taken from the pipeline's
+progress reports), the total time, and how many images made it into the
+panorama.
+
+Usage:
+    python -m benchmarks.sequential_matching [folders...] [--neighbors 2] [--loop-closure] [--mode panorama]
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import cv2
+
+from processors.stitching import StitchPipeline
+
+
+class StageTimer:
+    """Progress callback that records how long each reported stage took."""
+
+    def __init__(self):
+        self.stages = {}
+        self._current = None
+        self._start = None
+
+    def __call__(self, fraction=None, message=""):
+        now = time.perf_counter()
+        if self._current is not None:
+            self.stages[self._current] = self.stages.get(self._current, 0.0) + now - self._start
+        self._current = message.split(" ")[0]
+        self._start = now
+
+
+def load(folder):
+    paths = sorted(p for p in glob.glob(os.path.join(folder, "*")) if p.lower().endswith((".jpg", ".png")))
+    return [img for img in (cv2.imread(p) for p in paths) if img is not None]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.sequential_matching")
+    parser.add_argument("folders", nargs="*", default=["example-data/CMU0", "example-data/NSH"])
+    parser.add_argument("--neighbors", type=int, default=2)
+    parser.add_argument("--loop-closure", action="store_true")
+    parser.add_argument("--mode", default="panorama", choices=["panorama", "scans"])
+    parser.add_argument("--compositing-mp", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    print(f"{'folder':<22} {'matching':<14} {'pairs':>6} {'match s':>8} {'total s':>8} {'kept':>6} {'size':>11}")
+    for folder in args.folders:
+        images = load(folder)
+        if len(images) < 2:
+            continue
+        for label, neighbors in (("all pairs", 0), (f"next {args.neighbors}", args.neighbors)):
+            pipeline = StitchPipeline(images)
+            pairs = len(pipeline.pairs(neighbors, args.loop_closure))
+            timer = StageTimer()
+            start = time.perf_counter()
+            try:
+                panorama = pipeline.stitch(args.mode, compositing_mp=args.compositing_mp, neighbors=neighbors,
+                                           loop_closure=args.loop_closure, progress=timer)
+                size = f"{panorama.shape[1]}x{panorama.shape[0]}"
+                kept = f"{len(pipeline.kept)}/{len(images)}"
+            except ValueError as e:
+                size, kept = str(e), "-"
+            total = time.perf_counter() - start
+            print(f"{os.path.basename(folder.rstrip('/')):<22} {label:<14} {pairs:>6} "
+                  f"{timer.stages.get('Matching', 0.0):>8.2f} {total:>8.2f} {kept:>6} {size:>11}")
+
+
+if __name__ == "__main__":
+    main()
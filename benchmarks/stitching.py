@@ -0,0 +1,77 @@
+"""
+Stitching Pipeline Benchmark
+
+Times the staged stitcher (`processors.stitching.StitchPipeline`) the way
+the stitching dialog uses it: a first preview, the same preview again, a
+switch to the other mode and back, and a higher compositing resolution.
+The one-shot `cv2.Stitcher` at the same resolutions is timed for reference;
+it redoes every stage on each call.
+
+Usage:
+    python -m benchmarks.stitching [folder] [--mode scans|panorama] [--compositing-mp 0.3]
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import cv2
+
+from processors.stitching import DEFAULT_REGISTRATION_MP, DEFAULT_SEAM_MP, StitchPipeline
+
+
+def load(folder):
+    paths = sorted(glob.glob(os.path.join(folder, "*.jpg")) + glob.glob(os.path.join(folder, "*.png")))
+    return [img for img in (cv2.imread(p) for p in paths) if img is not None]
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    value = func(*args, **kwargs)
+    return value, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.stitching")
+    parser.add_argument("folder", nargs="?", default="example-data/uav")
+    parser.add_argument("--mode", default="scans", choices=["scans", "panorama"])
+    parser.add_argument("--compositing-mp", type=float, default=0.3, help="Preview compositing resolution")
+    args = parser.parse_args(argv)
+
+    images = load(args.folder)
+    if len(images) < 2:
+        parser.error(f"need at least 2 images in {args.folder}")
+    other = "panorama" if args.mode == "scans" else "scans"
+    print(f"{args.folder}: {len(images)} images, {images[0].shape[1]}x{images[0].shape[0]}, mode {args.mode}")
+
+    stitcher_mode = cv2.Stitcher_SCANS if args.mode == "scans" else cv2.Stitcher_PANORAMA
+    reference = cv2.Stitcher_create(stitcher_mode)
+    reference.setRegistrationResol(DEFAULT_REGISTRATION_MP)
+    reference.setSeamEstimationResol(DEFAULT_SEAM_MP)
+    reference.setCompositingResol(args.compositing_mp)
+    (status, _), t_reference = timed(reference.stitch, images)
+    print(f"  cv2.Stitcher, every call:       {t_reference:8.2f} s  (status {status})")
+
+    pipeline = StitchPipeline(images)
+    runs = [
+        ("first preview", args.mode, args.compositing_mp),
+        ("same preview again", args.mode, args.compositing_mp),
+        (f"switch to {other}", other, args.compositing_mp),
+        (f"back to {args.mode}", args.mode, args.compositing_mp),
+        (f"compositing {args.compositing_mp * 2:g} MP", args.mode, args.compositing_mp * 2),
+    ]
+    first = None
+    for label, mode, compositing_mp in runs:
+        try:
+            panorama, seconds = timed(pipeline.stitch, mode, compositing_mp=compositing_mp)
+        except ValueError as e:
+            print(f"  {label + ':':<32} failed: {e}")
+            continue
+        first = first or seconds
+        print(f"  {label + ':':<32} {seconds:8.2f} s  ({seconds / first:6.1%} of first)  "
+              f"{panorama.shape[1]}x{panorama.shape[0]}")
+
+
+if __name__ == "__main__":
+    main()
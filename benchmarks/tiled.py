@@ -0,0 +1,96 @@
+"""
+Tiled Execution Benchmark
+
+Checks that `tiles.run_tiled` gives bit-identical output to a single call
+for every tiled operation over a range of kernel sizes, iteration counts
+and tile sizes (including tiles smaller than the halo and sizes that do not
+divide the image), on color and grayscale inputs. Then it times a large
+mosaic made of the `example-data/uav` frames, whole versus tiled.
+
+Usage:
+    python -m benchmarks.tiled [--mosaic 3x3] [--tile 1024]
+"""
+
+import argparse
+import glob
+import time
+
+import cv2
+import numpy as np
+
+from processors import ops, tiles
+from processors.pipeline import OPERATIONS
+
+
+def cases():
+    for ksize in (1, 3, 4, 9, 31):
+        yield "gaussian_blur", {"ksize": ksize}
+    for ksize in (3, 5, 9):
+        yield "median_blur", {"ksize": ksize}
+    for _, op in ops.MORPH_OPERATIONS:
+        for ksize, iterations in ((3, 1), (5, 3), (15, 2)):
+            yield "morphology", {"op": op, "ksize": ksize, "iterations": iterations}
+    for method in (cv2.ADAPTIVE_THRESH_MEAN_C, cv2.ADAPTIVE_THRESH_GAUSSIAN_C):
+        for block_size in (3, 11, 51):
+            yield "adaptive_threshold", {"method": method, "thresh_type": cv2.THRESH_BINARY,
+                                         "block_size": block_size, "c": 2}
+
+
+def check_parity(samples, tile_sizes):
+    checked = 0
+    for op, params in cases():
+        func = OPERATIONS[op]
+        halo = tiles.HALOS[op](**params)
+        for sample in samples:
+            expected, expected_code = func(sample, **params)
+            for tile_size in tile_sizes:
+                actual, code = tiles.run_tiled(func, sample, halo, tile_size=tile_size, **params)
+                if not np.array_equal(expected, actual) or code != expected_code:
+                    raise AssertionError(f"{op} {params} tile {tile_size} on {sample.shape}: output differs")
+                checked += 1
+    return checked
+
+
+def mosaic(paths, rows, cols):
+    frames = [cv2.imread(p) for p in paths[:rows * cols]]
+    h, w = frames[0].shape[:2]
+    frames = [cv2.resize(f, (w, h)) for f in frames]
+    return np.vstack([np.hstack(frames[r * cols:(r + 1) * cols]) for r in range(rows)])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.tiled")
+    parser.add_argument("--images", default="example-data/uav/*.jpg")
+    parser.add_argument("--mosaic", default="3x3", help="Frames per column x per row of the timed image")
+    parser.add_argument("--tile", type=int, default=tiles.TILE_SIZE)
+    args = parser.parse_args(argv)
+
+    paths = sorted(glob.glob(args.images))
+    if not paths:
+        parser.error(f"no images match {args.images}")
+    rows, cols = (int(v) for v in args.mosaic.lower().split("x"))
+    sample = cv2.imread(paths[0])[:613, :977]
+    samples = [sample, cv2.cvtColor(sample, cv2.COLOR_BGR2GRAY)]
+    checked = check_parity(samples, (7, 64, 200, 4096))
+    print(f"parity: {checked} operation/tile-size combinations identical")
+
+    image = mosaic(paths, rows, cols)
+    h, w = image.shape[:2]
+    print(f"{w}x{h} mosaic ({w * h / 1e6:.0f} MP), {args.tile} px tiles, {tiles.TILE_WORKERS} workers")
+    for op, params in (("gaussian_blur", {"ksize": 15}),
+                       ("morphology", {"op": cv2.MORPH_OPEN, "ksize": 5, "iterations": 2}),
+                       ("adaptive_threshold", {"method": cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                               "thresh_type": cv2.THRESH_BINARY, "block_size": 31, "c": 2})):
+        func = OPERATIONS[op]
+        start = time.perf_counter()
+        whole, _ = func(image, **params)
+        t_whole = time.perf_counter() - start
+        start = time.perf_counter()
+        tiled, _ = tiles.run_tiled(func, image, tiles.HALOS[op](**params), tile_size=args.tile, **params)
+        t_tiled = time.perf_counter() - start
+        assert np.array_equal(whole, tiled)
+        print(f"  {op:<19} whole {t_whole * 1000:8.1f} ms   tiled {t_tiled * 1000:8.1f} ms   identical")
+
+
+if __name__ == "__main__":
+    main()
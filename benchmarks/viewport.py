@@ -0,0 +1,84 @@
+"""
+Viewport Rendering Benchmark
+
+Times one main-canvas redraw at several zoom levels: the old full-frame
+path (resize the whole image, convert it to RGB and hand it to PIL) against
+rendering only the viewport plus margin with `processors.display`. It also
+checks that the viewport render covers the visible area for scroll
+positions across the image.
+
+Usage:
+    python -m benchmarks.viewport [image] [--size 3840x2160] [--canvas 1000x600]
+"""
+
+import argparse
+import timeit
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from processors import display
+
+
+def full_frame(image, scale):
+    h, w = image.shape[:2]
+    resized = cv2.resize(image, (int(w * scale), int(h * scale)))
+    return Image.fromarray(display.to_rgb(resized))
+
+
+def viewport(image, scale, view):
+    h, w = image.shape[:2]
+    region = display.visible_region((w, h), scale, view)
+    pixels, origin = display.render_region(image, scale, region)
+    return Image.fromarray(display.to_rgb(pixels)), origin
+
+
+def check_coverage(image, scale, canvas):
+    h, w = image.shape[:2]
+    view_size = (w * scale, h * scale)
+    for fx in np.linspace(0, 1, 7):
+        for fy in np.linspace(0, 1, 7):
+            left = max(0.0, view_size[0] - canvas[0]) * fx
+            top = max(0.0, view_size[1] - canvas[1]) * fy
+            view = (left, top) + canvas
+            img, (x, y) = viewport(image, scale, view)
+            rendered = (x, y, x + img.width, y + img.height)
+            assert display.covers(rendered, view, view_size), (scale, view, rendered)
+
+
+def parse_size(text):
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.viewport")
+    parser.add_argument("image", nargs="?", default="image/649639.jpg")
+    parser.add_argument("--size", type=parse_size, default=(3840, 2160), help="Resize the image first")
+    parser.add_argument("--canvas", type=parse_size, default=(1000, 600), help="Viewport size")
+    parser.add_argument("-n", "--number", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    image = cv2.imread(args.image)
+    if image is None:
+        parser.error(f"failed to load {args.image}")
+    image = cv2.resize(image, args.size)
+    h, w = image.shape[:2]
+
+    print(f"{w}x{h} image, {args.canvas[0]}x{args.canvas[1]} viewport")
+    for scale in (0.25, 0.5, 1.0, 2.0, 4.0):
+        check_coverage(image, scale, args.canvas)
+        # Viewport in the middle of the zoomed image
+        view = ((w * scale - args.canvas[0]) / 2, (h * scale - args.canvas[1]) / 2) + args.canvas
+        t_full = min(timeit.repeat(lambda: full_frame(image, scale), number=1, repeat=args.number))
+        t_view = min(timeit.repeat(lambda: viewport(image, scale, view), number=1, repeat=args.number))
+        frame_mb = int(w * scale) * int(h * scale) * 3 / 1e6
+        rendered, _ = viewport(image, scale, view)
+        print(f"  zoom {scale * 100:4.0f}%  full frame {t_full * 1000:8.1f} ms ({frame_mb:6.1f} MB)   "
+              f"viewport {t_view * 1000:6.1f} ms ({rendered.width}x{rendered.height})")
+    print("viewport renders cover the visible area")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,26 +2,40 @@
 Image Processing Modules
 
 This package contains specialized processors for different image processing operations.
+The compute-only modules (`ops`, `pipeline`) do not depend on Tkinter and can be
+imported on headless machines; the dialog processors are only exported when
+Tkinter is available.
 """
 
-from .base_processor import BaseProcessor
-from .color_processor import ColorProcessor
-from .geometric_processor import GeometricProcessor
-from .filter_processor import FilterProcessor
-from .segmentation_processor import SegmentationProcessor
-from .morphology_processor import MorphologyProcessor
-from .intensity_processor import IntensityProcessor
-from .advanced_processor import AdvancedProcessor
-from .drawing_processor import DrawingProcessor
+from . import ops
+from . import pipeline
 
 __all__ = [
-    'BaseProcessor',
-    'ColorProcessor',
-    'GeometricProcessor',
-    'FilterProcessor',
-    'SegmentationProcessor',
-    'MorphologyProcessor',
-    'IntensityProcessor',
-    'AdvancedProcessor',
-    'DrawingProcessor',
+    'ops',
+    'pipeline',
 ]
+
+try:
+    from .base_processor import BaseProcessor
+    from .color_processor import ColorProcessor
+    from .geometric_processor import GeometricProcessor
+    from .filter_processor import FilterProcessor
+    from .segmentation_processor import SegmentationProcessor
+    from .morphology_processor import MorphologyProcessor
+    from .intensity_processor import IntensityProcessor
+    from .advanced_processor import AdvancedProcessor
+    from .drawing_processor import DrawingProcessor
+except ImportError:  # No Tkinter, headless use only
+    pass
+else:
+    __all__ += [
+        'BaseProcessor',
+        'ColorProcessor',
+        'GeometricProcessor',
+        'FilterProcessor',
+        'SegmentationProcessor',
+        'MorphologyProcessor',
+        'IntensityProcessor',
+        'AdvancedProcessor',
+        'DrawingProcessor',
+    ]
@@ -7,8 +7,11 @@ This imports the original implementations from process_monolithic_backup.py
 import cv2
 import tkinter as tk
 from tkinter import ttk, messagebox
-import numpy as np
+from . import ops, pipeline
 from .base_processor import BaseProcessor
+from .loader import LOADER
+from .stitching import StitchPipeline
+from .tasks import BackgroundTask
 
 class AdvancedProcessor(BaseProcessor):
     """Processor for advanced operations - wraps original implementation."""
@@ -33,13 +36,17 @@ class AdvancedProcessor(BaseProcessor):
         result = None
         dialog = tk.Toplevel()
         dialog.title("Image Registration")
-        self.center_window(dialog, "900x700")
+        self.center_window(dialog, "900x780")
         dialog.resizable(False, False)
         dialog.grab_set()
 
         # Variables
         method_var = tk.StringVar(value="orb")
         match_threshold = tk.DoubleVar(value=0.75)
+        matcher_var = tk.StringVar(value="bf")
+        checks_var = tk.IntVar(value=50)
+        trees_var = tk.IntVar(value=5)
+        pyramid_var = tk.BooleanVar(value=True)
 
         # Preview
         preview_frame = ttk.Frame(dialog)
@@ -72,56 +79,54 @@ class AdvancedProcessor(BaseProcessor):
         threshold_scale.grid(row=1, column=1, columnspan=2, sticky=tk.EW, pady=5)
         ttk.Label(controls_frame, textvariable=match_threshold, width=6).grid(row=1, column=3, padx=5)
 
+        ttk.Label(controls_frame, text="Matcher:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        for col, (text, value) in enumerate(ops.MATCHERS, start=1):
+            ttk.Radiobutton(controls_frame, text=text, variable=matcher_var, value=value).grid(row=2, column=col, sticky=tk.W)
+
+        # FLANN tuning: KD-trees (SIFT) or LSH tables (ORB), and leaves checked per query
+        flann_frame = ttk.Frame(controls_frame)
+        flann_frame.grid(row=3, column=0, columnspan=4, sticky=tk.W, pady=5)
+        ttk.Label(flann_frame, text="Trees / Tables:").pack(side=tk.LEFT, padx=5)
+        trees_spin = ttk.Spinbox(flann_frame, from_=1, to=16, textvariable=trees_var, width=5)
+        trees_spin.pack(side=tk.LEFT, padx=5)
+        ttk.Label(flann_frame, text="Checks:").pack(side=tk.LEFT, padx=5)
+        checks_spin = ttk.Spinbox(flann_frame, from_=1, to=512, increment=16, textvariable=checks_var, width=5)
+        checks_spin.pack(side=tk.LEFT, padx=5)
+
+        def matcher_params():
+            try:
+                return dict(matcher=matcher_var.get(), checks=max(1, checks_var.get()), trees=max(1, trees_var.get()))
+            except tk.TclError:  # Spinbox being edited
+                return dict(matcher=matcher_var.get())
+
+        def update_flann_state(*args):
+            state = "normal" if matcher_var.get() == "flann" else "disabled"
+            trees_spin.config(state=state)
+            checks_spin.config(state=state)
+        matcher_var.trace("w", update_flann_state)
+        update_flann_state()
+
+        # Applies to the full resolution run; previews already use small copies
+        ttk.Checkbutton(controls_frame, text="Coarse-to-fine (faster on large images)",
+                        variable=pyramid_var).grid(row=4, column=0, columnspan=4, sticky=tk.W, pady=5)
+
         info_label = ttk.Label(controls_frame, text="", foreground="blue")
-        info_label.grid(row=2, column=0, columnspan=4, pady=10)
+        info_label.grid(row=5, column=0, columnspan=4, pady=10)
+
+        # Previews register downscaled copies; the canvases are smaller still,
+        # but feature detection needs some detail to find matches.
+        ref_proxy, _ = self._make_proxy(reference, (640, 480))
+        moving_proxy, _ = self._make_proxy(image, (640, 480))
 
         def perform_registration():
             try:
-                # Convert to grayscale
-                ref_gray = cv2.cvtColor(reference, cv2.COLOR_BGR2GRAY)
-                moving_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-                # Detect features
-                if method_var.get() == "orb":
-                    detector = cv2.ORB_create(nfeatures=5000)
-                    kp1, des1 = detector.detectAndCompute(ref_gray, None)
-                    kp2, des2 = detector.detectAndCompute(moving_gray, None)
-                    matcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=False)
-                else:  # SIFT
-                    detector = cv2.SIFT_create()
-                    kp1, des1 = detector.detectAndCompute(ref_gray, None)
-                    kp2, des2 = detector.detectAndCompute(moving_gray, None)
-                    matcher = cv2.BFMatcher(cv2.NORM_L2, crossCheck=False)
-
-                # Match features
-                matches = matcher.knnMatch(des2, des1, k=2)
-                
-                # Apply ratio test
-                good_matches = []
-                for match_pair in matches:
-                    if len(match_pair) == 2:
-                        m, n = match_pair
-                        if m.distance < match_threshold.get() * n.distance:
-                            good_matches.append(m)
-
-                info_label.config(text=f"Found {len(good_matches)} good matches")
-
-                if len(good_matches) < 4:
-                    return None, "Not enough matches found"
-
-                # Extract matched points
-                src_pts = np.float32([kp2[m.queryIdx].pt for m in good_matches]).reshape(-1, 1, 2)
-                dst_pts = np.float32([kp1[m.trainIdx].pt for m in good_matches]).reshape(-1, 1, 2)
-
-                # Find homography
-                H, mask = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, 5.0)
-
-                if H is None:
-                    return None, "Failed to compute homography"
+                H, good_count = ops.find_homography(ref_proxy, moving_proxy, method_var.get(), match_threshold.get(),
+                                                    **matcher_params())
+                info_label.config(text=f"Found {good_count} good matches")
 
                 # Warp image
-                h, w = reference.shape[:2]
-                registered = cv2.warpPerspective(image, H, (w, h))
+                h, w = ref_proxy.shape[:2]
+                registered = cv2.warpPerspective(moving_proxy, H, (w, h))
 
                 return registered, None
 
@@ -131,54 +136,75 @@ class AdvancedProcessor(BaseProcessor):
         def update_preview(*args):
             registered, error = perform_registration()
             
-            self._update_preview_canvas(ref_canvas, reference, reference)
-            self._update_preview_canvas(moving_canvas, image, image)
+            self._update_preview_canvas(ref_canvas, ref_proxy, ref_proxy)
+            self._update_preview_canvas(moving_canvas, moving_proxy, moving_proxy)
             
             if registered is not None:
-                self._update_preview_canvas(result_canvas, registered, reference)
+                self._update_preview_canvas(result_canvas, registered, ref_proxy)
             else:
                 info_label.config(text=f"Error: {error}", foreground="red")
 
+        # Full resolution registration runs on a worker thread (see tasks.py)
+        task = None
+
+        def register_full(method, ratio, params, pyramid, progress):
+            if pyramid:
+                progress(None, "Matching features coarse-to-fine...")
+                estimate = ops.find_homography_pyramid
+            else:
+                progress(None, "Matching features at full resolution...")
+                estimate = ops.find_homography
+            H, good_count = estimate(reference, image, method, ratio, **params)
+            progress(None, f"Found {good_count} good matches, warping...")
+            h, w = reference.shape[:2]
+            return cv2.warpPerspective(image, H, (w, h))
+
         def apply_registration():
-            nonlocal result
-            registered, error = perform_registration()
-            
-            if registered is not None:
-                method_name = method_var.get().upper()
-                code = f"# Image registration using {method_name}\n"
-                code += f"import numpy as np\n"
-                code += f"ref_gray = cv2.cvtColor(reference, cv2.COLOR_BGR2GRAY)\n"
-                code += f"moving_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)\n\n"
-                
-                if method_var.get() == "orb":
-                    code += f"detector = cv2.ORB_create(nfeatures=5000)\n"
-                    code += f"matcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=False)\n"
-                else:
-                    code += f"detector = cv2.SIFT_create()\n"
-                    code += f"matcher = cv2.BFMatcher(cv2.NORM_L2, crossCheck=False)\n"
-                
-                code += f"kp1, des1 = detector.detectAndCompute(ref_gray, None)\n"
-                code += f"kp2, des2 = detector.detectAndCompute(moving_gray, None)\n"
-                code += f"matches = matcher.knnMatch(des2, des1, k=2)\n\n"
-                code += f"good_matches = [m for m, n in matches if m.distance < {match_threshold.get():.2f} * n.distance]\n"
-                code += f"src_pts = np.float32([kp2[m.queryIdx].pt for m in good_matches]).reshape(-1, 1, 2)\n"
-                code += f"dst_pts = np.float32([kp1[m.trainIdx].pt for m in good_matches]).reshape(-1, 1, 2)\n"
-                code += f"H, mask = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, 5.0)\n"
-                code += f"h, w = reference.shape[:2]\n"
-                code += f"registered = cv2.warpPerspective(image, H, (w, h))\n"
-                
-                result = (registered, code)
+            nonlocal task
+            method, ratio, params = method_var.get(), match_threshold.get(), matcher_params()
+            pyramid = pyramid_var.get()
+
+            def finish(registered):
+                nonlocal result
+                code = ops.registration_code(method, ratio, pyramid=pyramid, **params)
+                step = {"op": "register",
+                        "params": {"reference": ref_path, "method": method, "ratio": ratio, **params,
+                                   "pyramid": pyramid}}
+                result = pipeline.StepResult(registered, code, step)
                 dialog.destroy()
-            else:
+
+            def failed(error):
+                apply_button.config(state="normal")
+                info_label.config(text="", foreground="blue")
                 messagebox.showerror("Error", f"Registration failed: {error}")
 
-        method_var.trace("w", update_preview)
-        match_threshold.trace("w", update_preview)
+            apply_button.config(state="disabled")
+            task = BackgroundTask(dialog, register_full, method, ratio, params, pyramid, on_done=finish, on_error=failed,
+                                  on_progress=lambda fraction, message: info_label.config(text=message,
+                                                                                          foreground="blue"))
+            task.start()
+
+        def cancel():
+            # First press stops a running registration, second closes the dialog
+            if task is not None and task.running:
+                task.cancel()
+                apply_button.config(state="normal")
+                info_label.config(text="Cancelled", foreground="red")
+            else:
+                dialog.destroy()
+
+        schedule_preview = self._preview_scheduler(dialog, update_preview)
+        method_var.trace("w", schedule_preview)
+        match_threshold.trace("w", schedule_preview)
+        matcher_var.trace("w", schedule_preview)
+        checks_var.trace("w", schedule_preview)
+        trees_var.trace("w", schedule_preview)
 
         buttons_frame = ttk.Frame(dialog)
         buttons_frame.pack(fill=tk.X, padx=20, pady=10)
-        ttk.Button(buttons_frame, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
-        ttk.Button(buttons_frame, text="Apply", command=apply_registration).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(buttons_frame, text="Cancel", command=cancel).pack(side=tk.RIGHT, padx=5)
+        apply_button = ttk.Button(buttons_frame, text="Apply", command=apply_registration)
+        apply_button.pack(side=tk.RIGHT, padx=5)
 
         update_preview()
         dialog.wait_window()
@@ -196,22 +222,25 @@ class AdvancedProcessor(BaseProcessor):
         
         if not file_paths:
             return None
-        
-        # Load all images
-        images = [image]  # Start with current image
-        for path in file_paths:
-            img = cv2.imread(path)
-            if img is not None:
-                images.append(img)
-        
-        if len(images) < 2:
+
+        # Only reduced-size thumbnails are decoded before the dialog opens;
+        # the full images decode in the background and are waited for by the
+        # first stitching run (see loader.py)
+        thumbnail_size = 120
+        thumbnails = LOADER.thumbnails(file_paths, thumbnail_size)
+        file_paths = [path for path, (thumb, _) in zip(file_paths, thumbnails) if thumb is not None]
+        thumbnails = [t for t in thumbnails if t[0] is not None]
+        full_images = [LOADER.load(path) for path in file_paths]
+
+        if not file_paths:
             messagebox.showinfo("Info", "Need at least 2 images to stitch")
             return None
+        image_count = len(file_paths) + 1
         
         result = None
         dialog = tk.Toplevel()
         dialog.title("Image Stitching")
-        self.center_window(dialog, "1000x800")
+        self.center_window(dialog, "1000x910")
         dialog.resizable(False, False)
         dialog.grab_set()
 
@@ -219,7 +248,7 @@ class AdvancedProcessor(BaseProcessor):
         main_frame = ttk.Frame(dialog, padding=10)
         main_frame.pack(fill=tk.BOTH, expand=True)
 
-        ttk.Label(main_frame, text=f"Image Stitching - {len(images)} images selected", 
+        ttk.Label(main_frame, text=f"Image Stitching - {image_count} images selected", 
                  font=("Arial", 14, "bold")).pack(pady=5)
 
         # === PREVIEW SELECTED IMAGES ===
@@ -243,19 +272,17 @@ class AdvancedProcessor(BaseProcessor):
         preview_canvas.create_window((0, 0), window=images_inner_frame, anchor='nw')
 
         # Display each image as thumbnail
-        thumbnail_size = 120
         image_photos = []  # Keep references to prevent garbage collection
-        
-        for idx, img in enumerate(images):
+
+        h, w = image.shape[:2]
+        scale = min(thumbnail_size / w, thumbnail_size / h)
+        current_thumb = cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+
+        for idx, (thumb, (w, h)) in enumerate([(current_thumb, (w, h))] + thumbnails):
             img_frame = ttk.Frame(images_inner_frame, relief=tk.RIDGE, borderwidth=2)
             img_frame.pack(side=tk.LEFT, padx=5, pady=5)
 
-            # Resize image to thumbnail
-            h, w = img.shape[:2]
-            scale = min(thumbnail_size / w, thumbnail_size / h)
-            thumb_w, thumb_h = int(w * scale), int(h * scale)
-            
-            thumb = cv2.resize(img, (thumb_w, thumb_h))
+            thumb_h, thumb_w = thumb.shape[:2]
             if len(thumb.shape) == 2:
                 thumb_rgb = cv2.cvtColor(thumb, cv2.COLOR_GRAY2RGB)
             else:
@@ -307,6 +334,43 @@ class AdvancedProcessor(BaseProcessor):
 
         # Variables
         mode_var = tk.StringVar(value="panorama")
+        registration_mp = tk.DoubleVar(value=ops.DEFAULT_REGISTRATION_MP)
+        seam_mp = tk.DoubleVar(value=ops.DEFAULT_SEAM_MP)
+        compositing_mp = tk.DoubleVar(value=0)
+        sequential_var = tk.BooleanVar(value=False)
+        neighbors_var = tk.IntVar(value=2)
+        loop_closure_var = tk.BooleanVar(value=False)
+
+        # Working resolutions, as megapixels per input image
+        resolution_frame = ttk.LabelFrame(main_frame, text="Resolution (megapixels per image)")
+        resolution_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(resolution_frame, text="Registration:").pack(side=tk.LEFT, padx=5, pady=5)
+        ttk.Spinbox(resolution_frame, from_=0.1, to=5.0, increment=0.1, textvariable=registration_mp,
+                    width=6).pack(side=tk.LEFT, padx=5)
+        ttk.Label(resolution_frame, text="Seams:").pack(side=tk.LEFT, padx=5)
+        ttk.Spinbox(resolution_frame, from_=0.01, to=1.0, increment=0.05, textvariable=seam_mp,
+                    width=6).pack(side=tk.LEFT, padx=5)
+        ttk.Label(resolution_frame, text="Compositing (0 = original):").pack(side=tk.LEFT, padx=5)
+        ttk.Spinbox(resolution_frame, from_=0, to=50, increment=0.5, textvariable=compositing_mp,
+                    width=6).pack(side=tk.LEFT, padx=5)
+
+        # Ordered sweeps only need each image matched with its next few
+        matching_frame = ttk.LabelFrame(main_frame, text="Matching")
+        matching_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Checkbutton(matching_frame, text="Sequential (images are in order), neighbors:",
+                        variable=sequential_var).pack(side=tk.LEFT, padx=5, pady=5)
+        neighbors_spin = ttk.Spinbox(matching_frame, from_=1, to=10, textvariable=neighbors_var, width=4)
+        neighbors_spin.pack(side=tk.LEFT, padx=5)
+        loop_check = ttk.Checkbutton(matching_frame, text="Loop closure (last images overlap the first)",
+                                     variable=loop_closure_var)
+        loop_check.pack(side=tk.LEFT, padx=10)
+
+        def update_matching_state(*args):
+            state = "normal" if sequential_var.get() else "disabled"
+            neighbors_spin.config(state=state)
+            loop_check.config(state=state)
+        sequential_var.trace("w", update_matching_state)
+        update_matching_state()
 
         # Controls
         controls_frame = ttk.Frame(main_frame)
@@ -322,90 +386,163 @@ class AdvancedProcessor(BaseProcessor):
         progress_label = ttk.Label(controls_frame, text="")
         progress_label.pack(side=tk.LEFT, padx=10)
 
-        def perform_stitching():
-            try:
-                info_label.config(text="Processing...", foreground="blue")
-                progress_label.config(text="Detecting features and matching...")
-                dialog.update()
-
-                # Create stitcher
-                if mode_var.get() == "panorama":
-                    stitcher = cv2.Stitcher_create(cv2.Stitcher_PANORAMA)
-                else:
-                    stitcher = cv2.Stitcher_create(cv2.Stitcher_SCANS)
-
-                # Perform stitching
-                status, panorama = stitcher.stitch(images)
-
-                if status == cv2.Stitcher_OK:
-                    info_label.config(text="Stitching successful!", foreground="green")
-                    progress_label.config(text=f"Result size: {panorama.shape[1]}x{panorama.shape[0]}")
-                    return panorama, None
-                else:
-                    error_msgs = {
-                        cv2.Stitcher_ERR_NEED_MORE_IMGS: "Need more images",
-                        cv2.Stitcher_ERR_HOMOGRAPHY_EST_FAIL: "Homography estimation failed",
-                        cv2.Stitcher_ERR_CAMERA_PARAMS_ADJUST_FAIL: "Camera parameters adjustment failed"
-                    }
-                    error_msg = error_msgs.get(status, f"Stitching failed with status {status}")
-                    info_label.config(text=error_msg, foreground="red")
-                    return None, error_msg
+        progress_bar = ttk.Progressbar(controls_frame, mode="determinate", maximum=1.0, length=150)
+        progress_bar.pack(side=tk.RIGHT, padx=5)
 
-            except Exception as e:
-                error_msg = str(e)
-                info_label.config(text=f"Error: {error_msg}", foreground="red")
-                return None, error_msg
+        # Stitching runs on a worker thread so the dialog stays responsive and
+        # can be cancelled. The pipeline keeps every stage's results, so
+        # previewing again or switching mode only redoes what changed; previews
+        # composite at a low resolution, Stitch at the chosen one.
+        task = None
+        stitcher = None
+        retry = None  # after() id of a deferred start_stitching
+        preview_mp = 0.3
+        preview_delay_ms = 400  # spinbox clicks closer than this are previewed once
 
-        def update_preview(*args):
-            panorama, error = perform_stitching()
+        def resolutions(final):
+            try:
+                settings = dict(registration_mp=max(0.01, registration_mp.get()), seam_mp=max(0.01, seam_mp.get()),
+                                compositing_mp=compositing_mp.get())
+                if sequential_var.get():
+                    settings.update(neighbors=max(1, neighbors_var.get()), loop_closure=loop_closure_var.get())
+            except tk.TclError:  # Spinbox being edited
+                return None
+            if not final and not 0 < settings["compositing_mp"] < preview_mp:
+                settings["compositing_mp"] = preview_mp
+            return settings
+
+        def set_busy(busy):
+            state = "disabled" if busy else "normal"
+            stitch_button.config(state=state)
+            preview_button.config(state=state)
+
+        def on_progress(fraction, message):
+            if fraction is not None:
+                progress_bar["value"] = fraction
+            progress_label.config(text=message)
+
+        def make_stitcher():
+            # Created once, here on the UI thread, so workers never race to
+            # build it; None until the loader has decoded every full image
+            nonlocal stitcher
+            if stitcher is None and all(f.done() for f in full_images):
+                loaded = [image] + [img for img in (f.result() for f in full_images) if img is not None]
+                stitcher = StitchPipeline(loaded)
+            return stitcher
+
+        def run_stitching(stitcher, mode, settings, progress):
+            return ops.stitch(stitcher.images, mode, stitcher=stitcher, progress=progress, **settings)
+
+        def cancel_retry():
+            nonlocal retry
+            if retry is not None:
+                dialog.after_cancel(retry)
+                retry = None
+
+        def start_stitching(on_done, final=False):
+            nonlocal task, retry
+            cancel_retry()
+            mode, settings = mode_var.get(), resolutions(final)
+            if settings is None:
+                return
+            if task is not None:
+                task.cancel()
+
+            # A cancelled run keeps the pipeline's lock until its current
+            # OpenCV call returns; wait for it (and for the images to decode)
+            # without blocking the dialog, so only one worker ever stitches
+            if make_stitcher() is None or (task is not None and task.alive):
+                set_busy(True)
+                waiting = "Loading images..." if stitcher is None else "Stopping previous run..."
+                info_label.config(text=waiting, foreground="blue")
+                retry = dialog.after(100, lambda: start_stitching(on_done, final))
+                return
+
+            def done(value):
+                panorama, code = value
+                set_busy(False)
+                used = ""
+                if len(stitcher.kept) < len(stitcher.images):
+                    used = f" ({len(stitcher.kept)} of {len(stitcher.images)} images used)"
+                info_label.config(text=f"Stitching successful!{used}", foreground="green")
+                progress_label.config(text=f"Result size: {panorama.shape[1]}x{panorama.shape[0]}")
+                on_done(panorama, code, settings)
+
+            def failed(error):
+                set_busy(False)
+                progress_bar["value"] = 0
+                info_label.config(text=f"Error: {error}", foreground="red")
+                progress_label.config(text="")
+
+            set_busy(True)
+            progress_bar["value"] = 0
+            info_label.config(text="Processing...", foreground="blue")
+            task = BackgroundTask(dialog, run_stitching, stitcher, mode, settings,
+                                  on_done=done, on_error=failed, on_progress=on_progress).start()
+
+        def show_panorama(panorama, code, settings):
+            # Display panorama
+            h, w = panorama.shape[:2]
+            max_display_w, max_display_h = 950, 330
+            scale = min(max_display_w / w, max_display_h / h, 1.0)  # Don't upscale
+            display_w, display_h = int(w * scale), int(h * scale)
+            
+            resized = cv2.resize(panorama, (display_w, display_h), interpolation=cv2.INTER_AREA)
             
-            if panorama is not None:
-                # Display panorama
-                h, w = panorama.shape[:2]
-                max_display_w, max_display_h = 950, 330
-                scale = min(max_display_w / w, max_display_h / h, 1.0)  # Don't upscale
-                display_w, display_h = int(w * scale), int(h * scale)
-                
-                resized = cv2.resize(panorama, (display_w, display_h))
-                
-                if len(resized.shape) == 2:
-                    rgb = cv2.cvtColor(resized, cv2.COLOR_GRAY2RGB)
-                else:
-                    rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
-                
-                pil_img = self.Image.fromarray(rgb)
-                photo = self.ImageTk.PhotoImage(pil_img)
-                
-                result_canvas.delete("all")
-                result_canvas.create_image(0, 0, anchor='nw', image=photo)
-                result_canvas.image = photo
-                result_canvas.config(scrollregion=(0, 0, display_w, display_h))
+            if len(resized.shape) == 2:
+                rgb = cv2.cvtColor(resized, cv2.COLOR_GRAY2RGB)
+            else:
+                rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+            
+            pil_img = self.Image.fromarray(rgb)
+            photo = self.ImageTk.PhotoImage(pil_img)
+            
+            result_canvas.delete("all")
+            result_canvas.create_image(0, 0, anchor='nw', image=photo)
+            result_canvas.image = photo
+            result_canvas.config(scrollregion=(0, 0, display_w, display_h))
 
-        def apply_stitching():
+        def update_preview(*args):
+            start_stitching(show_panorama)
+
+        def finish(panorama, code, settings):
             nonlocal result
-            panorama, error = perform_stitching()
-            
-            if panorama is not None:
-                mode_name = "PANORAMA" if mode_var.get() == "panorama" else "SCANS"
-                code = f"# Image stitching\n"
-                code += f"stitcher = cv2.Stitcher_create(cv2.Stitcher_{mode_name})\n"
-                code += f"# images = [image1, image2, ...] # List of images to stitch\n"
-                code += f"status, panorama = stitcher.stitch(images)\n"
-                code += f"if status == cv2.Stitcher_OK:\n"
-                code += f"    result = panorama\n"
-                
-                result = (panorama, code)
-                dialog.destroy()
+            step = {"op": "stitch", "params": {"images": list(file_paths), "mode": mode_var.get(), **settings}}
+            result = pipeline.StepResult(panorama, code, step)
+            dialog.destroy()
+
+        def apply_stitching():
+            start_stitching(finish, final=True)
+
+        def cancel():
+            # First press stops a running (or waiting) stitch, second closes the dialog
+            if retry is not None or (task is not None and task.running):
+                cancel_retry()
+                if task is not None:
+                    task.cancel()
+                set_busy(False)
+                progress_bar["value"] = 0
+                info_label.config(text="Cancelled", foreground="red")
+                progress_label.config(text="")
             else:
-                messagebox.showerror("Error", f"Stitching failed: {error}")
+                dialog.destroy()
 
-        mode_var.trace("w", update_preview)
+        dialog.bind("<Destroy>", lambda e: cancel_retry() if e.widget is dialog else None, add="+")
+        schedule_preview = self._preview_scheduler(dialog, update_preview, preview_delay_ms)
+        mode_var.trace("w", schedule_preview)
+        registration_mp.trace("w", schedule_preview)
+        seam_mp.trace("w", schedule_preview)
+        sequential_var.trace("w", schedule_preview)
+        neighbors_var.trace("w", schedule_preview)
+        loop_closure_var.trace("w", schedule_preview)
 
         buttons_frame = ttk.Frame(dialog)
         buttons_frame.pack(fill=tk.X, padx=20, pady=10)
-        ttk.Button(buttons_frame, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
-        ttk.Button(buttons_frame, text="Stitch", command=apply_stitching).pack(side=tk.RIGHT, padx=5)
-        ttk.Button(buttons_frame, text="Preview", command=update_preview).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(buttons_frame, text="Cancel", command=cancel).pack(side=tk.RIGHT, padx=5)
+        stitch_button = ttk.Button(buttons_frame, text="Stitch", command=apply_stitching)
+        stitch_button.pack(side=tk.RIGHT, padx=5)
+        preview_button = ttk.Button(buttons_frame, text="Preview", command=update_preview)
+        preview_button.pack(side=tk.RIGHT, padx=5)
 
         dialog.wait_window()
         return result
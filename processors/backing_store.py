@@ -0,0 +1,161 @@
+"""
+Backing Store
+
+Keeps very large images on disk instead of in RAM. A source file is
+decoded once into a raw .npy file (NumPy's format: a small header with the
+shape and dtype, then the pixels) and from then on opened as a read-only
+memory map, so only the parts actually read (the viewport, the tile being
+processed) are paged in, and the kernel can drop them again under memory
+pressure. Decoded files are keyed by a hash of the source contents, so
+reopening the same image skips decoding altogether.
+
+Results of tiled operations on mapped images go to anonymous scratch maps
+(`scratch()`), which are deleted as soon as nothing references them.
+
+The store is capped in bytes; the least recently opened decoded files are
+deleted first. Filesystem errors make `open()` fall back to a plain decode.
+"""
+
+import os
+import tempfile
+import threading
+
+import cv2
+import numpy as np
+
+from .loader import image_size
+from .thumbnail_cache import file_digest
+
+
+DEFAULT_MAX_GB = 16
+
+# Files with at least this many pixels (by their header) are opened mapped
+MAPPED_MIN_PIXELS = 1 << 26
+
+
+def default_directory():
+    """Per-user directory for decoded images, next to the thumbnail cache."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "image-processing-studio", "images")
+
+
+def is_mapped(image):
+    """Whether `image` lives in a memory map rather than in RAM."""
+    # memmap.copy() is still an np.memmap but owns RAM and has no mapping,
+    # so look for a live mapping anywhere along the chain of views
+    while image is not None:
+        if getattr(image, "_mmap", None) is not None:
+            return True
+        image = getattr(image, "base", None)
+    return False
+
+
+class BackingStore:
+    """
+    Decoded images as read-only memory maps, plus scratch maps for results.
+
+    Args:
+        directory: Where decoded images are stored; created on first use
+        max_gb: Total size allowed for decoded images
+        min_pixels: `open_image` maps files at least this large and
+            decodes smaller ones normally
+    """
+
+    def __init__(self, directory=None, max_gb=DEFAULT_MAX_GB, min_pixels=MAPPED_MIN_PIXELS):
+        self.directory = directory or default_directory()
+        self.max_bytes = int(max_gb * 1024 ** 3)
+        self.min_pixels = min_pixels
+        self._lock = threading.Lock()
+
+    def open_image(self, path):
+        """
+        Load `path` like cv2.imread, mapped from the store if it is large.
+
+        Returns:
+            ndarray: A read-only memmap for large images, an ordinary array
+            otherwise, or None if the file cannot be read
+        """
+        size = image_size(path)
+        if size is None or size[0] * size[1] < self.min_pixels:
+            return cv2.imread(path)
+        try:
+            return self.open(path)
+        except OSError:
+            return cv2.imread(path)
+
+    def open(self, path):
+        """Read-only memmap of the decoded image at `path`, decoding it into the store first if needed."""
+        entry = os.path.join(self.directory, file_digest(path) + ".npy")
+        with self._lock:
+            if not os.path.exists(entry):
+                if not self._decode(path, entry):
+                    return None
+                self._evict(keep=entry)
+            os.utime(entry)  # mark as recently used
+        return np.load(entry, mmap_mode="r")
+
+    def scratch(self, shape, dtype):
+        """Writable memmap backed by an anonymous temporary file, deleted with the array."""
+        os.makedirs(self.directory, exist_ok=True)
+        with tempfile.TemporaryFile(dir=self.directory) as f:
+            # The map keeps its own handle, so the file lives as long as the array
+            return np.memmap(f, dtype=dtype, mode="w+", shape=shape)
+
+    def clear(self):
+        """Delete every decoded image."""
+        with self._lock:
+            for path, _, _ in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _decode(self, path, entry):
+        image = cv2.imread(path)
+        if image is None:
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        # Write under a temporary name so a crash never leaves half an entry
+        fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        os.close(fd)
+        try:
+            mapped = np.lib.format.open_memmap(tmp, mode="w+", dtype=image.dtype, shape=image.shape)
+            mapped[:] = image
+            mapped.flush()
+            del mapped
+            os.replace(tmp, entry)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return True
+
+    def _entries(self):
+        """(path, bytes, last use) for every decoded image."""
+        entries = []
+        try:
+            for item in os.scandir(self.directory):
+                if item.name.endswith(".npy"):
+                    stat = item.stat()
+                    entries.append((item.path, stat.st_size, stat.st_mtime))
+        except OSError:
+            pass
+        return entries
+
+    def _evict(self, keep):
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+
+# Shared by the GUI and the pipeline
+BACKING_STORE = BackingStore()
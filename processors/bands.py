@@ -0,0 +1,65 @@
+"""
+Row-Band Execution
+
+NumPy ufuncs run on a single core. For per-pixel NumPy code, this module
+splits the array into horizontal bands and processes them on a thread pool;
+ufuncs release the GIL while they work on a band, so the bands really run
+in parallel. Each band writes into its own slice of a preallocated output
+and only needs band-sized scratch buffers, so no full-size temporaries are
+created along the way either.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Default thread count, read at call time (batch workers lower it to 1)
+BAND_WORKERS = os.cpu_count() or 4
+
+# Rows per band are chosen so a band holds about this many values
+# (1 MB of float32 scratch), which keeps each band's passes in cache
+BAND_VALUES = 1 << 18
+
+
+def band_ranges(shape, band_values=BAND_VALUES):
+    """(y0, y1) row ranges splitting an array of `shape` into bands of about `band_values` values."""
+    h = shape[0]
+    per_row = 1
+    for n in shape[1:]:
+        per_row *= n
+    rows = max(1, band_values // max(1, per_row))
+    return [(y, min(y + rows, h)) for y in range(0, h, rows)]
+
+
+def run_bands(func, image, out, workers=None, band_values=BAND_VALUES):
+    """
+    Call `func(image_band, out_band)` for every horizontal band of `image`.
+
+    Args:
+        func: Writes the result for one band of rows into the matching
+            band of `out`; must not depend on other rows
+        image: Input array, split along its first axis
+        out: Preallocated output with as many rows as `image`
+        workers: Number of threads (default BAND_WORKERS; 1 runs the
+            bands inline)
+        band_values: Approximate number of values per band
+
+    Returns:
+        ndarray: `out`
+    """
+    bands = band_ranges(image.shape, band_values)
+    workers = workers or BAND_WORKERS
+
+    def process(band):
+        y0, y1 = band
+        func(image[y0:y1], out[y0:y1])
+
+    if workers <= 1 or len(bands) == 1:
+        for band in bands:
+            process(band)
+        return out
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="band") as pool:
+        for _ in pool.map(process, bands):
+            pass  # re-raises the first failure
+    return out
@@ -4,11 +4,60 @@ Base Processor Module
 Contains base class and helper functions shared across all processors.
 """
 
+import time
+import weakref
+
 import cv2
 import tkinter as tk
 from tkinter import ttk
 import numpy as np
 
+from .display import DisplayAdapter
+
+
+# Minimum gap between two live preview renders while a control is moving
+PREVIEW_DELAY_MS = 30
+
+# Default proxy bounds, matching the canvas of _create_basic_preview_dialog
+PROXY_SIZE = (650, 300)
+
+
+class PreviewScheduler:
+    """
+    Coalesces rapid preview requests into a single render of the latest state.
+
+    Instances are used directly as `Variable.trace` callbacks. A request only
+    schedules a render if none is pending; the render reads the controls when
+    it runs, so every change made in between is picked up at once and the
+    intermediate states are never computed. The gap between renders grows to
+    match the last render time, which keeps the event loop responsive when a
+    preview is slower than the slider events arriving.
+    """
+
+    def __init__(self, widget, render, delay_ms=PREVIEW_DELAY_MS):
+        self.widget = widget
+        self.render = render
+        self.delay_ms = delay_ms
+        self._pending = None
+        self._last_ms = 0
+        widget.bind("<Destroy>", lambda e: self.cancel() if e.widget is widget else None, add="+")
+
+    def __call__(self, *args):
+        if self._pending is None:
+            self._pending = self.widget.after(max(self.delay_ms, int(self._last_ms)), self._run)
+
+    def cancel(self):
+        """Drop the pending render, if any."""
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+
+    def _run(self):
+        self._pending = None
+        start = time.perf_counter()
+        self.render()
+        self._last_ms = (time.perf_counter() - start) * 1000
+
 
 class BaseProcessor:
     """
@@ -26,6 +75,7 @@ class BaseProcessor:
         """
         self.Image = pil_image_module
         self.ImageTk = pil_image_tk_module
+        self._proxy_cache = None
     
     def center_window(self, window, geometry=None):
         """
@@ -51,6 +101,77 @@ class BaseProcessor:
         
         window.geometry(f'{width}x{height}+{x}+{y}')
 
+    def _make_proxy(self, image, max_size=PROXY_SIZE):
+        """
+        Downsample an image to the size it will be previewed at.
+        
+        Previews run on the proxy, so their cost does not depend on the source
+        resolution; Apply still runs on the full image. The last proxy is
+        cached, so reopening a dialog on the same image reuses it. The cache
+        holds the source only weakly, so it does not keep a replaced image
+        alive.
+        
+        Args:
+            image: Full resolution image
+            max_size: (width, height) the proxy must fit in
+            
+        Returns:
+            tuple: (proxy, factor) where factor is proxy size / image size (<= 1.0)
+        """
+        cache = self._proxy_cache
+        if cache is not None and cache[0]() is image and cache[1] == max_size:
+            return (image if cache[2] is None else cache[2]), cache[3]
+        
+        h, w = image.shape[:2]
+        factor = min(max_size[0] / w, max_size[1] / h, 1.0)
+        if factor < 1.0:
+            size = (max(1, round(w * factor)), max(1, round(h * factor)))
+            proxy = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        else:
+            proxy = image
+        # A proxy that is the image itself is not stored, or it would hold the image
+        self._proxy_cache = (weakref.ref(image), max_size, None if proxy is image else proxy, factor)
+        return proxy, factor
+    
+    @staticmethod
+    def _proxy_length(value, factor):
+        """Scale a length in pixels (offset, radius, thickness) to proxy resolution.
+        
+        Non-zero lengths never collapse to zero, so a thin line stays visible
+        and OpenCV's negative "filled" thickness keeps its meaning.
+        """
+        scaled = int(round(value * factor))
+        if value > 0:
+            return max(1, scaled)
+        if value < 0:
+            return min(-1, scaled)
+        return 0
+    
+    @staticmethod
+    def _proxy_kernel(ksize, factor, minimum=1):
+        """Scale a kernel size to proxy resolution, keeping it odd and >= minimum."""
+        k = max(minimum, int(round(int(ksize) * factor)))
+        return k if k % 2 == 1 else k + 1
+    
+    @staticmethod
+    def _proxy_point(point, factor):
+        """Scale an (x, y) image coordinate to proxy resolution."""
+        return tuple(int(round(v * factor)) for v in point)
+
+    def _preview_scheduler(self, dialog, update_preview, delay_ms=PREVIEW_DELAY_MS):
+        """
+        Wrap a dialog's preview function so slider drags render only the latest values.
+        
+        Args:
+            dialog: Dialog window; pending renders are dropped when it closes
+            update_preview: Function that renders the preview from the current controls
+            delay_ms: Minimum gap between renders
+            
+        Returns:
+            PreviewScheduler: Callable to register with `trace` instead of update_preview
+        """
+        return PreviewScheduler(dialog, update_preview, delay_ms)
+
     def _create_basic_preview_dialog(self, title, geometry="700x500"):
         """
         Create a standard preview dialog with canvas and control buttons.
@@ -111,15 +232,15 @@ class BaseProcessor:
         scale = min(canvas_w / w, canvas_h / h, 1.0)
         display_w, display_h = int(w * scale), int(h * scale)
         
-        resized = cv2.resize(image, (display_w, display_h))
-        
-        if len(resized.shape) == 2:
-            rgb = cv2.cvtColor(resized, cv2.COLOR_GRAY2RGB)
-        else:
-            rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+        # Proxies usually have the preview size already
+        if image.shape[:2] != (display_h, display_w):
+            image = cv2.resize(image, (display_w, display_h))
         
-        pil_img = self.Image.fromarray(rgb)
-        photo = self.ImageTk.PhotoImage(pil_img)
+        # One adapter per canvas, so its PhotoImage is refilled on every preview
+        adapter = getattr(canvas, "display_adapter", None)
+        if adapter is None:
+            adapter = canvas.display_adapter = DisplayAdapter(self.Image, self.ImageTk)
+        photo = adapter.photo_image(image)
         
         canvas.delete("all")
         canvas.create_image(canvas_w // 2, canvas_h // 2, anchor='center', image=photo)
@@ -0,0 +1,161 @@
+"""
+Batch Processing CLI
+
+Replays a saved pipeline over every image matching a glob, using a process
+pool sized to the machine, and writes results to an output directory. Each
+result keeps its input's path relative to the inputs' common directory, so
+files with the same name from different directories do not overwrite each
+other.
+
+Usage:
+    python -m processors.batch pipeline.json "example-data/CMU0/*.jpg" -o output/
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+from . import bands, tiles
+from .pipeline import load_pipeline, run_pipeline
+
+
+def _init_worker():
+    # One process per core already saturates the CPU; letting every worker
+    # spawn its own OpenCV, tile and band thread pools on top only adds
+    # contention (cpu_count threads per worker, cpu_count squared in all).
+    cv2.setNumThreads(1)
+    tiles.TILE_WORKERS = 1
+    bands.BAND_WORKERS = 1
+
+
+def output_paths(paths, output_dir, ext=None):
+    """
+    Where each input's result is written.
+
+    Args:
+        paths: Input files
+        output_dir: Output directory
+        ext: Output extension, or None to keep each input's
+
+    Returns:
+        dict: Input path -> output path, mirroring the inputs' layout below
+        their common directory
+
+    Raises:
+        ValueError: If two different inputs would be written to the same file
+    """
+    paths = list(dict.fromkeys(paths))  # the same file matched by two patterns
+    if not paths:
+        return {}
+    base = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+
+    outputs, sources = {}, {}
+    for path in paths:
+        name, orig_ext = os.path.splitext(os.path.relpath(os.path.abspath(path), base))
+        out_path = os.path.join(output_dir, name + (ext or orig_ext))
+        key = os.path.normcase(out_path)
+        if key in sources:
+            raise ValueError(f"{sources[key]} and {path} would both be written to {out_path}")
+        sources[key] = path
+        outputs[path] = out_path
+    return outputs
+
+
+def process_file(path, steps, out_path):
+    """
+    Run the pipeline on one file and write the result to `out_path`.
+
+    Returns:
+        tuple: (input_path, output_path, seconds, megapixels)
+    """
+    start = time.perf_counter()
+    image = cv2.imread(path)
+    if image is None:
+        raise ValueError(f"Failed to load image: {path}")
+
+    result, _ = run_pipeline(image, steps)
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    if not cv2.imwrite(out_path, result):
+        raise ValueError(f"Failed to write image: {out_path}")
+
+    megapixels = image.shape[0] * image.shape[1] / 1e6
+    return path, out_path, time.perf_counter() - start, megapixels
+
+
+def run_batch(steps, paths, output_dir, workers=None, ext=None):
+    """
+    Process files in parallel, printing a line per finished image.
+
+    Returns:
+        tuple: (succeeded, failed, total_megapixels, wall_seconds)
+
+    Raises:
+        ValueError: If two inputs would be written to the same file
+    """
+    outputs = output_paths(paths, output_dir, ext)
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    succeeded, failed, total_mp = 0, 0, 0.0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(process_file, p, steps, out_path): p for p, out_path in outputs.items()}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                _, out_path, seconds, megapixels = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"FAILED {path}: {e}", file=sys.stderr)
+                continue
+            succeeded += 1
+            total_mp += megapixels
+            print(f"{os.path.basename(path)} -> {out_path}  "
+                  f"{seconds * 1000:.1f} ms  {megapixels / seconds:.1f} MP/s")
+
+    return succeeded, failed, total_mp, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m processors.batch",
+        description="Replay a saved pipeline over a set of images.")
+    parser.add_argument("pipeline", help="Pipeline JSON file")
+    parser.add_argument("inputs", nargs="+", help="Input files or glob patterns")
+    parser.add_argument("-o", "--output", required=True, help="Output directory")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Worker processes (default: number of cores)")
+    parser.add_argument("--ext", default=None,
+                        help="Output extension, e.g. .png (default: keep input extension)")
+    args = parser.parse_args(argv)
+
+    try:
+        steps = load_pipeline(args.pipeline)
+    except (ValueError, OSError) as e:
+        parser.error(f"cannot load pipeline {args.pipeline}: {e}")
+
+    paths = []
+    for pattern in args.inputs:
+        matches = sorted(glob.glob(pattern))
+        paths.extend(matches if matches else [pattern])
+    if not paths:
+        parser.error("no input files")
+
+    try:
+        succeeded, failed, total_mp, wall = run_batch(steps, paths, args.output, args.workers, args.ext)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"\nProcessed {succeeded} image(s), {failed} failed, in {wall:.2f} s "
+          f"({succeeded / wall:.2f} images/s, {total_mp / wall:.1f} MP/s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,7 @@ Color Space Conversion Processor
 Handles color space transformations like RGB, HSV, Grayscale, and Negative.
 """
 
-import cv2
+from . import pipeline
 from .base_processor import BaseProcessor
 
 
@@ -21,9 +21,7 @@ class ColorProcessor(BaseProcessor):
         Returns:
             tuple: (processed_image, code_string)
         """
-        result = cv2.bitwise_not(image)
-        code = "# Convert to negative\nresult = cv2.bitwise_not(image)\n"
-        return result, code
+        return pipeline.run_op("negative", image)
 
     def cvt_HSV(self, image):
         """
@@ -35,9 +33,7 @@ class ColorProcessor(BaseProcessor):
         Returns:
             tuple: (hsv_image, code_string)
         """
-        result = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-        code = "# Convert BGR to HSV\nresult = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)\n"
-        return result, code
+        return pipeline.run_op("hsv", image)
 
     def cvt_GRAY(self, image):
         """
@@ -49,6 +45,4 @@ class ColorProcessor(BaseProcessor):
         Returns:
             tuple: (gray_image, code_string)
         """
-        result = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        code = "# Convert BGR to Grayscale\nresult = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)\n"
-        return result, code
+        return pipeline.run_op("gray", image)
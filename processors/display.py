@@ -0,0 +1,222 @@
+"""
+Display Path
+
+Turns the current image into what the main canvas shows. Only the part of
+the zoomed image inside the canvas viewport (plus a margin, so small scrolls
+do not need a new render) is ever resized and converted, so the cost of a
+redraw is bounded by the canvas size whatever the zoom level. At 4x on a
+3840x2160 image that is a crop of about 1.5 MP instead of a 133 MP frame.
+
+Zooming out is served from a mip-map (DisplayPyramid): the image halved
+repeatedly with area interpolation, built lazily and only as deep as the
+zoom requires. A zoom below 100% is resampled bilinearly from the nearest
+level at or above it, which never shrinks by more than 2x, so it does not
+alias the way bilinear downscaling from full resolution does. (Area
+interpolation is only used for the exact halvings: at arbitrary ratios it
+costs several times more than bilinear for about 1 dB of PSNR.)
+
+The last step, DisplayAdapter, hands frames to Tk with one conversion:
+grayscale goes to PIL as mode "L" without a copy, color is channel-swapped
+into a reusable RGBA buffer that PIL shares, and the same PhotoImage is
+refilled with paste() for as long as the frame size stays the same.
+
+Coordinates are in "view" pixels: the zoomed image with its top-left
+corner at (0, 0). This module imports neither Tk nor PIL (the adapter is
+given the PIL modules, like the processors), so it can be benchmarked headless.
+"""
+
+import math
+
+import cv2
+import numpy as np
+
+
+# Extra view pixels rendered around the viewport on every side
+VIEW_MARGIN = 256
+
+
+def _axes(scale):
+    """(x_scale, y_scale) from a single zoom factor or a pair."""
+    return scale if isinstance(scale, tuple) else (scale, scale)
+
+
+def visible_region(image_size, scale, view, margin=VIEW_MARGIN):
+    """
+    Source pixels needed to draw a viewport of the zoomed image.
+
+    Args:
+        image_size: (width, height) of the source image
+        scale: Zoom factor, or (x, y) factors
+        view: (left, top, width, height) of the viewport in view pixels
+        margin: View pixels to add on every side
+
+    Returns:
+        tuple: (x0, y0, x1, y1) source rectangle, or None if the viewport
+        does not overlap the image
+    """
+    w, h = image_size
+    sx, sy = _axes(scale)
+    left, top, width, height = view
+    vx0 = max(0.0, left - margin)
+    vy0 = max(0.0, top - margin)
+    vx1 = min(w * sx, left + width + margin)
+    vy1 = min(h * sy, top + height + margin)
+    if vx1 <= vx0 or vy1 <= vy0:
+        return None
+
+    x0, y0 = int(vx0 / sx), int(vy0 / sy)
+    x1 = min(w, max(x0 + 1, math.ceil(vx1 / sx)))
+    y1 = min(h, max(y0 + 1, math.ceil(vy1 / sy)))
+    return x0, y0, x1, y1
+
+
+def view_rect(region, scale):
+    """(x0, y0, x1, y1) in view pixels covered by a source `region` at `scale`."""
+    x0, y0, x1, y1 = region
+    sx, sy = _axes(scale)
+    return round(x0 * sx), round(y0 * sy), round(x1 * sx), round(y1 * sy)
+
+
+def covers(rendered, view, view_size):
+    """
+    Whether a `rendered` view rectangle already shows everything in `view`.
+
+    Args:
+        rendered: (x0, y0, x1, y1) drawn so far, or None
+        view: (left, top, width, height) of the viewport
+        view_size: (width, height) of the whole zoomed image
+    """
+    if rendered is None:
+        return False
+    left, top, width, height = view
+    # Only the part of the viewport inside the image needs pixels; allow
+    # a pixel of rounding at the image edges
+    x0, y0 = max(0, left), max(0, top)
+    x1, y1 = min(view_size[0], left + width), min(view_size[1], top + height)
+    return (rendered[0] <= x0 and rendered[1] <= y0
+            and x1 <= rendered[2] + 1 and y1 <= rendered[3] + 1)
+
+
+def render_region(image, scale, region, interpolation=cv2.INTER_LINEAR):
+    """
+    Resize the `region` of `image` to its size at `scale` (a factor or an (x, y) pair).
+
+    Returns:
+        tuple: (pixels, (left, top)) where (left, top) is the position of
+        the result in view pixels
+    """
+    x0, y0, x1, y1 = region
+    vx0, vy0, vx1, vy1 = view_rect(region, scale)
+    crop = image[y0:y1, x0:x1]
+    size = (max(1, vx1 - vx0), max(1, vy1 - vy0))
+    if size != (x1 - x0, y1 - y0):
+        crop = cv2.resize(crop, size, interpolation=interpolation)
+    return crop, (vx0, vy0)
+
+
+def to_rgb(image):
+    """RGB copy of a BGR or grayscale image for PIL."""
+    if len(image.shape) == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+class DisplayAdapter:
+    """
+    Turns uint8 BGR or grayscale frames into a Tk PhotoImage for one canvas.
+
+    Grayscale frames are wrapped as PIL mode "L" in place. Color frames are
+    converted with a single cv2.cvtColor into an RGBA buffer kept between
+    frames, which PIL wraps without copying (PIL stores RGB with four bytes
+    per pixel, so an RGB array would be copied again). The PhotoImage is
+    reused through paste() while the frame size and mode stay the same.
+
+    Args:
+        image_module: PIL.Image
+        image_tk_module: PIL.ImageTk
+    """
+
+    def __init__(self, image_module, image_tk_module):
+        self.Image = image_module
+        self.ImageTk = image_tk_module
+        self.photo = None
+        self._key = None  # (mode, size) of self.photo
+        self._buffer = None
+
+    def pil_image(self, image):
+        """PIL image sharing memory with `image` (grayscale) or with the adapter's buffer (color)."""
+        h, w = image.shape[:2]
+        if len(image.shape) == 2:
+            return self.Image.frombuffer("L", (w, h), np.ascontiguousarray(image), "raw", "L", 0, 1)
+
+        if self._buffer is None or self._buffer.shape[:2] != (h, w):
+            self._buffer = np.empty((h, w, 4), dtype=np.uint8)
+        code = cv2.COLOR_BGRA2RGBA if image.shape[2] == 4 else cv2.COLOR_BGR2RGBA
+        cv2.cvtColor(image, code, dst=self._buffer)
+        return self.Image.frombuffer("RGBA", (w, h), self._buffer, "raw", "RGBA", 0, 1)
+
+    def photo_image(self, image):
+        """
+        PhotoImage showing `image`.
+
+        The same object is returned, with new contents, while frames keep
+        their size and mode, so canvas items showing it update as well.
+        """
+        pil_img = self.pil_image(image)
+        key = (pil_img.mode, pil_img.size)
+        if self.photo is not None and key == self._key:
+            self.photo.paste(pil_img)
+        else:
+            self.photo = self.ImageTk.PhotoImage(pil_img)
+            self._key = key
+        return self.photo
+
+
+class DisplayPyramid:
+    """
+    Lazily built mip-map of one image, for drawing it below 100% zoom.
+
+    Level 0 is the image itself and level k is the image reduced 2**k times
+    with area interpolation, made from the nearest finer level built so far.
+    Levels are only built when a zoom first needs them, so fitting a huge
+    (possibly memory-mapped) image reads it once and keeps only a small
+    level in RAM. A new pyramid is made whenever the displayed image changes
+    (callers compare `pyramid.image is image`).
+
+    Args:
+        image: Image to display
+    """
+
+    def __init__(self, image):
+        self.image = image
+        self._levels = {0: image}
+        self._depth = int(math.log2(min(image.shape[:2])))  # deepest level with at least one pixel
+
+    def level(self, scale):
+        """The pyramid level to draw `scale` from (built if needed): the smallest one at least that large."""
+        k = int(math.floor(math.log2(1 / scale) + 1e-9)) if scale < 1 else 0
+        k = min(k, self._depth)
+        if k not in self._levels:
+            finer = max(j for j in self._levels if j < k)
+            h, w = self.image.shape[:2]
+            size = (-(-w // 2 ** k), -(-h // 2 ** k))  # halving k times, rounding up
+            self._levels[k] = cv2.resize(self._levels[finer], size, interpolation=cv2.INTER_AREA)
+        return self._levels[k]
+
+    def render(self, scale, view, margin=VIEW_MARGIN):
+        """
+        Draw the part of the image under `view` at zoom `scale`.
+
+        Returns:
+            tuple: (pixels, (left, top)) as from render_region, or None if
+            the viewport does not overlap the image
+        """
+        level = self.level(scale)
+        h, w = self.image.shape[:2]
+        lh, lw = level.shape[:2]
+        # Per-axis factors keep the level aligned with the full-size view when halving rounds up
+        level_scale = (scale * w / lw, scale * h / lh)
+        region = visible_region((lw, lh), level_scale, view, margin)
+        if region is None:
+            return None
+        return render_region(level, level_scale, region)
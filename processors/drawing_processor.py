@@ -7,6 +7,7 @@ This imports the original implementations from process_monolithic_backup.py
 import cv2
 import tkinter as tk
 from tkinter import ttk, messagebox, colorchooser
+from . import ops, pipeline
 from .base_processor import BaseProcessor
 
 
@@ -57,6 +58,7 @@ class DrawingProcessor(BaseProcessor):
         h, w = image.shape[:2]
         scale = min(500/w, 300/h)
         preview_w, preview_h = int(w*scale), int(h*scale)
+        proxy, factor = self._make_proxy(image, (preview_w, preview_h))
         
         canvas = tk.Canvas(preview_frame, width=preview_w, height=preview_h, bg="lightgray", bd=1, relief=tk.SOLID)
         canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -104,7 +106,7 @@ class DrawingProcessor(BaseProcessor):
             if rgb_color[1]:
                 color.set(rgb_color[1])
                 color_preview.config(bg=rgb_color[1])
-                update_preview()
+                schedule_preview()
         
         ttk.Button(color_frame, text="Select Color", command=choose_color).pack(side=tk.LEFT, padx=2)
         
@@ -116,12 +118,12 @@ class DrawingProcessor(BaseProcessor):
             bgr_color = (b, g, r)
             
             # Draw line on copy
-            img_copy = image.copy()
+            img_copy = proxy.copy()
             cv2.line(img_copy, 
-                    (pt1_x.get(), pt1_y.get()), 
-                    (pt2_x.get(), pt2_y.get()), 
+                    self._proxy_point((pt1_x.get(), pt1_y.get()), factor), 
+                    self._proxy_point((pt2_x.get(), pt2_y.get()), factor), 
                     bgr_color, 
-                    thickness.get())
+                    self._proxy_length(thickness.get(), factor))
             
             # Scale and display
             preview_img = cv2.resize(img_copy, (preview_w, preview_h))
@@ -147,12 +149,13 @@ class DrawingProcessor(BaseProcessor):
                 canvas.create_text(preview_w//2, preview_h//2, text=f"Preview error: {e}")
         
         # Register trace callbacks
-        pt1_x.trace("w", update_preview)
-        pt1_y.trace("w", update_preview)
-        pt2_x.trace("w", update_preview)
-        pt2_y.trace("w", update_preview)
-        thickness.trace("w", update_preview)
-        color.trace("w", update_preview)
+        schedule_preview = self._preview_scheduler(dialog, update_preview)
+        pt1_x.trace("w", schedule_preview)
+        pt1_y.trace("w", schedule_preview)
+        pt2_x.trace("w", schedule_preview)
+        pt2_y.trace("w", schedule_preview)
+        thickness.trace("w", schedule_preview)
+        color.trace("w", schedule_preview)
         
         # Add label update to trace
         def update_labels(*args):
@@ -171,14 +174,8 @@ class DrawingProcessor(BaseProcessor):
                 r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
                 bgr_color = (b, g, r)
                 
-                new_img = image.copy()
-                cv2.line(new_img, 
-                        (pt1_x.get(), pt1_y.get()), 
-                        (pt2_x.get(), pt2_y.get()), 
-                        bgr_color, 
-                        thickness.get())
-                
-                result = (new_img, f"cv2.line(image, pt1=({pt1_x.get()}, {pt1_y.get()}), pt2=({pt2_x.get()}, {pt2_y.get()}), color={bgr_color}, thickness={thickness.get()})\n")
+                result = pipeline.run_op("line", image, pt1=(pt1_x.get(), pt1_y.get()), pt2=(pt2_x.get(), pt2_y.get()),
+                                         color=bgr_color, thickness=thickness.get())
                 dialog.destroy()
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to draw line: {str(e)}")
@@ -230,6 +227,7 @@ class DrawingProcessor(BaseProcessor):
         h, w = image.shape[:2]
         scale = min(500/w, 300/h)
         preview_w, preview_h = int(w*scale), int(h*scale)
+        proxy, factor = self._make_proxy(image, (preview_w, preview_h))
         
         canvas = tk.Canvas(preview_frame, width=preview_w, height=preview_h, bg="lightgray", bd=1, relief=tk.SOLID)
         canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -278,7 +276,7 @@ class DrawingProcessor(BaseProcessor):
             if rgb_color[1]:
                 color.set(rgb_color[1])
                 color_preview.config(bg=rgb_color[1])
-                update_preview()
+                schedule_preview()
         
         ttk.Button(color_frame, text="Select Color", command=choose_color).pack(side=tk.LEFT, padx=2)
         
@@ -290,14 +288,14 @@ class DrawingProcessor(BaseProcessor):
             bgr_color = (b, g, r)
             
             # Draw rectangle on copy
-            img_copy = image.copy()
+            img_copy = proxy.copy()
             
             # If filled, set thickness to -1
-            thick = -1 if filled.get() else thickness.get()
+            thick = -1 if filled.get() else self._proxy_length(thickness.get(), factor)
             
             cv2.rectangle(img_copy, 
-                        (pt1_x.get(), pt1_y.get()), 
-                        (pt2_x.get(), pt2_y.get()), 
+                        self._proxy_point((pt1_x.get(), pt1_y.get()), factor), 
+                        self._proxy_point((pt2_x.get(), pt2_y.get()), factor), 
                         bgr_color, 
                         thick)
             
@@ -325,13 +323,14 @@ class DrawingProcessor(BaseProcessor):
                 canvas.create_text(preview_w//2, preview_h//2, text=f"Preview error: {e}")
         
         # Register trace callbacks
-        pt1_x.trace("w", update_preview)
-        pt1_y.trace("w", update_preview)
-        pt2_x.trace("w", update_preview)
-        pt2_y.trace("w", update_preview)
-        thickness.trace("w", update_preview)
-        color.trace("w", update_preview)
-        filled.trace("w", update_preview)
+        schedule_preview = self._preview_scheduler(dialog, update_preview)
+        pt1_x.trace("w", schedule_preview)
+        pt1_y.trace("w", schedule_preview)
+        pt2_x.trace("w", schedule_preview)
+        pt2_y.trace("w", schedule_preview)
+        thickness.trace("w", schedule_preview)
+        color.trace("w", schedule_preview)
+        filled.trace("w", schedule_preview)
         
         def update_labels(*args):
             thick_label.config(text=str(int(thickness.get())))
@@ -349,19 +348,8 @@ class DrawingProcessor(BaseProcessor):
                 r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
                 bgr_color = (b, g, r)
                 
-                new_img = image.copy()
-                
-                # If filled, set thickness to -1
-                thick = -1 if filled.get() else thickness.get()
-                
-                cv2.rectangle(new_img, 
-                            (pt1_x.get(), pt1_y.get()), 
-                            (pt2_x.get(), pt2_y.get()), 
-                            bgr_color, 
-                            thick)
-                
-                fill_text = "filled " if filled.get() else ""
-                result = (new_img, f"cv2.rectangle(image, pt1=({pt1_x.get()}, {pt1_y.get()}), pt2=({pt2_x.get()}, {pt2_y.get()}), color={bgr_color}, thickness={thick})  # {fill_text}rectangle\n")
+                result = pipeline.run_op("rectangle", image, pt1=(pt1_x.get(), pt1_y.get()), pt2=(pt2_x.get(), pt2_y.get()),
+                                         color=bgr_color, thickness=thickness.get(), filled=filled.get())
                 dialog.destroy()
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to draw rectangle: {str(e)}")
@@ -412,6 +400,7 @@ class DrawingProcessor(BaseProcessor):
         h, w = image.shape[:2]
         scale = min(500/w, 300/h)
         preview_w, preview_h = int(w*scale), int(h*scale)
+        proxy, factor = self._make_proxy(image, (preview_w, preview_h))
         
         canvas = tk.Canvas(preview_frame, width=preview_w, height=preview_h, bg="lightgray", bd=1, relief=tk.SOLID)
         canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -459,7 +448,7 @@ class DrawingProcessor(BaseProcessor):
             if rgb_color[1]:
                 color.set(rgb_color[1])
                 color_preview.config(bg=rgb_color[1])
-                update_preview()
+                schedule_preview()
         
         ttk.Button(color_frame, text="Select Color", command=choose_color).pack(side=tk.LEFT, padx=2)
         
@@ -471,14 +460,14 @@ class DrawingProcessor(BaseProcessor):
             bgr_color = (b, g, r)
             
             # Draw circle on copy
-            img_copy = image.copy()
+            img_copy = proxy.copy()
             
             # If filled, set thickness to -1
-            thick = -1 if filled.get() else thickness.get()
+            thick = -1 if filled.get() else self._proxy_length(thickness.get(), factor)
             
             cv2.circle(img_copy, 
-                      (center_x.get(), center_y.get()), 
-                      radius.get(), 
+                      self._proxy_point((center_x.get(), center_y.get()), factor), 
+                      self._proxy_length(radius.get(), factor), 
                       bgr_color, 
                       thick)
             
@@ -506,12 +495,13 @@ class DrawingProcessor(BaseProcessor):
                 canvas.create_text(preview_w//2, preview_h//2, text=f"Preview error: {e}")
         
         # Register trace callbacks
-        center_x.trace("w", update_preview)
-        center_y.trace("w", update_preview)
-        radius.trace("w", update_preview)
-        thickness.trace("w", update_preview)
-        color.trace("w", update_preview)
-        filled.trace("w", update_preview)
+        schedule_preview = self._preview_scheduler(dialog, update_preview)
+        center_x.trace("w", schedule_preview)
+        center_y.trace("w", schedule_preview)
+        radius.trace("w", schedule_preview)
+        thickness.trace("w", schedule_preview)
+        color.trace("w", schedule_preview)
+        filled.trace("w", schedule_preview)
         
         def update_labels(*args):
             rad_label.config(text=str(int(radius.get())))
@@ -531,19 +521,8 @@ class DrawingProcessor(BaseProcessor):
                 r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
                 bgr_color = (b, g, r)
                 
-                new_img = image.copy()
-                
-                # If filled, set thickness to -1
-                thick = -1 if filled.get() else thickness.get()
-                
-                cv2.circle(new_img, 
-                          (center_x.get(), center_y.get()), 
-                          radius.get(), 
-                          bgr_color, 
-                          thick)
-                
-                fill_text = "filled " if filled.get() else ""
-                result = (new_img, f"cv2.circle(image, center=({center_x.get()}, {center_y.get()}), radius={radius.get()}, color={bgr_color}, thickness={thick})  # {fill_text}circle\n")
+                result = pipeline.run_op("circle", image, center=(center_x.get(), center_y.get()), radius=radius.get(),
+                                         color=bgr_color, thickness=thickness.get(), filled=filled.get())
                 dialog.destroy()
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to draw circle: {str(e)}")
@@ -595,6 +574,7 @@ class DrawingProcessor(BaseProcessor):
         h, w = image.shape[:2]
         scale = min(500/w, 300/h)
         preview_w, preview_h = int(w*scale), int(h*scale)
+        proxy, factor = self._make_proxy(image, (preview_w, preview_h))
         
         canvas = tk.Canvas(preview_frame, width=preview_w, height=preview_h, bg="lightgray", bd=1, relief=tk.SOLID)
         canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -637,16 +617,7 @@ class DrawingProcessor(BaseProcessor):
         font_frame = ttk.Frame(controls_grid)
         font_frame.grid(row=4, column=1, sticky=tk.W, padx=5, pady=5)
         
-        fonts = [
-            ("Simplex", cv2.FONT_HERSHEY_SIMPLEX),
-            ("Plain", cv2.FONT_HERSHEY_PLAIN),
-            ("Duplex", cv2.FONT_HERSHEY_DUPLEX),
-            ("Complex", cv2.FONT_HERSHEY_COMPLEX),
-            ("Triplex", cv2.FONT_HERSHEY_TRIPLEX),
-            ("Complex Small", cv2.FONT_HERSHEY_COMPLEX_SMALL),
-            ("Script Simplex", cv2.FONT_HERSHEY_SCRIPT_SIMPLEX),
-            ("Script Complex", cv2.FONT_HERSHEY_SCRIPT_COMPLEX)
-        ]
+        fonts = ops.FONTS
         
         font_combo = ttk.Combobox(font_frame, width=20, state="readonly")
         font_combo['values'] = [name for name, _ in fonts]
@@ -658,7 +629,7 @@ class DrawingProcessor(BaseProcessor):
             for name, value in fonts:
                 if name == selected_name:
                     font_face.set(value)
-                    update_preview()
+                    schedule_preview()
                     break
         
         font_combo.bind("<<ComboboxSelected>>", font_selected)
@@ -676,7 +647,7 @@ class DrawingProcessor(BaseProcessor):
             if rgb_color[1]:
                 color.set(rgb_color[1])
                 color_preview.config(bg=rgb_color[1])
-                update_preview()
+                schedule_preview()
         
         ttk.Button(color_frame, text="Select Color", command=choose_color).pack(side=tk.LEFT, padx=2)
         
@@ -688,15 +659,15 @@ class DrawingProcessor(BaseProcessor):
             bgr_color = (b, g, r)
             
             # Draw text on copy
-            img_copy = image.copy()
+            img_copy = proxy.copy()
             
             cv2.putText(img_copy, 
                       text.get(), 
-                      (pos_x.get(), pos_y.get()), 
+                      self._proxy_point((pos_x.get(), pos_y.get()), factor), 
                       font_face.get(), 
-                      font_scale.get(), 
+                      font_scale.get() * factor, 
                       bgr_color, 
-                      thickness.get(),
+                      self._proxy_length(thickness.get(), factor),
                       cv2.LINE_AA)
             
             # Scale and display
@@ -723,13 +694,14 @@ class DrawingProcessor(BaseProcessor):
                 canvas.create_text(preview_w//2, preview_h//2, text=f"Preview error: {e}")
         
         # Register trace callbacks
-        text.trace("w", update_preview)
-        pos_x.trace("w", update_preview)
-        pos_y.trace("w", update_preview)
-        font_scale.trace("w", update_preview)
-        thickness.trace("w", update_preview)
-        color.trace("w", update_preview)
-        font_face.trace("w", update_preview)
+        schedule_preview = self._preview_scheduler(dialog, update_preview)
+        text.trace("w", schedule_preview)
+        pos_x.trace("w", schedule_preview)
+        pos_y.trace("w", schedule_preview)
+        font_scale.trace("w", schedule_preview)
+        thickness.trace("w", schedule_preview)
+        color.trace("w", schedule_preview)
+        font_face.trace("w", schedule_preview)
         
         def update_labels(*args):
             scale_label.config(text=f"{font_scale.get():.1f}")
@@ -749,21 +721,9 @@ class DrawingProcessor(BaseProcessor):
                 r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
                 bgr_color = (b, g, r)
                 
-                new_img = image.copy()
-                
-                # Get font name for code comment
-                font_name = next(name for name, val in fonts if val == font_face.get())
-                
-                cv2.putText(new_img, 
-                          text.get(), 
-                          (pos_x.get(), pos_y.get()), 
-                          font_face.get(), 
-                          font_scale.get(), 
-                          bgr_color, 
-                          thickness.get(),
-                          cv2.LINE_AA)
-                
-                result = (new_img, f'cv2.putText(image, "{text.get()}", ({pos_x.get()}, {pos_y.get()}), cv2.FONT_HERSHEY_{font_name.upper().replace(" ", "_")}, fontScale={font_scale.get()}, color={bgr_color}, thickness={thickness.get()}, lineType=cv2.LINE_AA)  # Text: {text.get()}\n')
+                result = pipeline.run_op("put_text", image, text=text.get(), org=(pos_x.get(), pos_y.get()),
+                                         font_face=font_face.get(), font_scale=font_scale.get(),
+                                         color=bgr_color, thickness=thickness.get())
                 dialog.destroy()
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to add text: {str(e)}")
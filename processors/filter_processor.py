@@ -7,6 +7,7 @@ Handles blur operations, histogram equalization, and image enhancement.
 import cv2
 import tkinter as tk
 from tkinter import ttk, messagebox
+from . import ops, pipeline
 from .base_processor import BaseProcessor
 
 
@@ -48,26 +49,17 @@ class FilterProcessor(BaseProcessor):
     
     def equalized_image(self, image):
         """Apply histogram equalization to enhance contrast."""
-        if len(image.shape) > 2 and image.shape[2] > 1:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            equalized = cv2.equalizeHist(gray)
-            code = "# Convert to grayscale and equalize histogram\n"
-            code += "gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)\n"
-            code += "result = cv2.equalizeHist(gray)\n"
-            return equalized, code
-        else:
-            try:
-                equalized = cv2.equalizeHist(image)
-                code = "# Equalize histogram\nresult = cv2.equalizeHist(image)\n"
-                return equalized, code
-            except Exception:
-                messagebox.showerror("Error", "Failed to equalize histogram. Image format not supported.")
-                return None
+        try:
+            return pipeline.run_op("equalize", image)
+        except Exception:
+            messagebox.showerror("Error", "Failed to equalize histogram. Image format not supported.")
+            return None
 
     def gaussian_blur_dialog(self, image):
         """Apply Gaussian blur with adjustable kernel size."""
         result = None
         dialog, canvas, controls, buttons = self._create_basic_preview_dialog("Gaussian Blur")
+        proxy, factor = self._make_proxy(image)
         
         k_size = tk.IntVar(value=5)
         
@@ -86,20 +78,18 @@ class FilterProcessor(BaseProcessor):
             k_label.config(text=f"{k}x{k}")
             
             try:
-                blurred = cv2.GaussianBlur(image, (k, k), 0)
-                self._update_preview_canvas(canvas, blurred, image)
+                blurred, _ = ops.gaussian_blur(proxy, self._proxy_kernel(k, factor))
+                self._update_preview_canvas(canvas, blurred, proxy)
             except Exception as e:
                 canvas.delete("all")
                 canvas.create_text(250, 150, text=str(e), fill="red")
         
-        k_size.trace("w", update_preview)
+        schedule_preview = self._preview_scheduler(dialog, update_preview)
+        k_size.trace("w", schedule_preview)
         
         def apply_blur():
             nonlocal result
-            k = k_size.get()
-            if k % 2 == 0: k += 1
-            blurred = cv2.GaussianBlur(image, (k, k), 0)
-            result = (blurred, f"blurred = cv2.GaussianBlur(image, ({k}, {k}), 0)\n")
+            result = pipeline.run_op("gaussian_blur", image, ksize=k_size.get())
             dialog.destroy()
             
         ttk.Button(buttons, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
@@ -113,6 +103,7 @@ class FilterProcessor(BaseProcessor):
         """Apply median blur for salt-and-pepper noise reduction."""
         result = None
         dialog, canvas, controls, buttons = self._create_basic_preview_dialog("Median Blur")
+        proxy, factor = self._make_proxy(image)
         
         k_size = tk.IntVar(value=5)
         
@@ -131,20 +122,18 @@ class FilterProcessor(BaseProcessor):
             k_label.config(text=f"{k}x{k}")
             
             try:
-                blurred = cv2.medianBlur(image, k)
-                self._update_preview_canvas(canvas, blurred, image)
+                blurred, _ = ops.median_blur(proxy, self._proxy_kernel(k, factor))
+                self._update_preview_canvas(canvas, blurred, proxy)
             except Exception as e:
                 canvas.delete("all")
                 canvas.create_text(250, 150, text=str(e), fill="red")
         
-        k_size.trace("w", update_preview)
+        schedule_preview = self._preview_scheduler(dialog, update_preview)
+        k_size.trace("w", schedule_preview)
         
         def apply_blur():
             nonlocal result
-            k = k_size.get()
-            if k % 2 == 0: k += 1
-            blurred = cv2.medianBlur(image, k)
-            result = (blurred, f"blurred = cv2.medianBlur(image, {k})\n")
+            result = pipeline.run_op("median_blur", image, ksize=k_size.get())
             dialog.destroy()
             
         ttk.Button(buttons, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
@@ -210,6 +199,7 @@ class FilterProcessor(BaseProcessor):
         h, w = image.shape[:2]
         scale = min(350/w, 250/h)
         preview_w, preview_h = int(w*scale), int(h*scale)
+        proxy, _ = self._make_proxy(image, (preview_w, preview_h))
         
         original_canvas = tk.Canvas(original_frame, width=preview_w, height=preview_h, bg="lightgray", bd=1, relief=tk.SOLID)
         original_canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -267,20 +257,14 @@ class FilterProcessor(BaseProcessor):
                 t2_label.config(text=str(t2))
 
                 # Apply Canny edge detection
-                edges = cv2.Canny(
-                    image, 
-                    t1, 
-                    t2,
-                    apertureSize=aperture_size.get(),
-                    L2gradient=l2gradient.get()
-                )
+                edges, _ = ops.canny(proxy, t1, t2, aperture_size.get(), l2gradient.get())
                 
                 # === SỬA PIL IMPORT ===
                 # Display original image
-                if len(image.shape) > 2 and image.shape[2] > 1:
-                    display_img = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+                if len(proxy.shape) > 2 and proxy.shape[2] > 1:
+                    display_img = cv2.cvtColor(proxy, cv2.COLOR_BGR2RGB)
                 else:
-                    display_img = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+                    display_img = cv2.cvtColor(proxy, cv2.COLOR_GRAY2RGB)
                 
                 display_img_resized = cv2.resize(display_img, (preview_w, preview_h))
                 img1 = self.Image.fromarray(display_img_resized)
@@ -310,10 +294,11 @@ class FilterProcessor(BaseProcessor):
                 edge_canvas.create_text(preview_w//2, preview_h//2, text=str(e), fill="red")
         
         # Register callbacks
-        threshold1.trace("w", update_preview)
-        threshold2.trace("w", update_preview)
-        aperture_size.trace("w", update_preview)
-        l2gradient.trace("w", update_preview)
+        schedule_preview = self._preview_scheduler(dialog, update_preview)
+        threshold1.trace("w", schedule_preview)
+        threshold2.trace("w", schedule_preview)
+        aperture_size.trace("w", schedule_preview)
+        l2gradient.trace("w", schedule_preview)
         
         # Update preview initially
         update_preview()
@@ -323,18 +308,8 @@ class FilterProcessor(BaseProcessor):
             nonlocal result
             try:
                 # Apply Canny edge detection
-                edges = cv2.Canny(
-                    image, 
-                    threshold1.get(), 
-                    threshold2.get(),
-                    apertureSize=aperture_size.get(),
-                    L2gradient=l2gradient.get()
-                )
-                
-                # Create code string
-                code = f"edges = cv2.Canny(image, {threshold1.get()}, {threshold2.get()}, apertureSize={aperture_size.get()}, L2gradient={l2gradient.get()})\n"
-                
-                result = (edges, code)
+                result = pipeline.run_op("canny", image, threshold1=threshold1.get(), threshold2=threshold2.get(),
+                                         aperture_size=aperture_size.get(), l2_gradient=l2gradient.get())
                 dialog.destroy()
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to apply Canny edge detection: {str(e)}")
@@ -8,7 +8,7 @@ This imports the original implementations from process_monolithic_backup.py
 import cv2
 import tkinter as tk
 from tkinter import ttk, messagebox
-import numpy as np
+from . import ops, pipeline
 from .base_processor import BaseProcessor
 
 
@@ -18,15 +18,15 @@ class GeometricProcessor(BaseProcessor):
     # Quick operations (no dialog)
     def rotate_image(self, image):
         """Rotate image by 90 degrees clockwise."""
-        return cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE), "cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)\n"
+        return pipeline.run_op("rotate_90", image)
     
     def flip_Horizontal_image(self, image):
         """Flip image horizontally."""
-        return cv2.flip(image, 1), "cv2.flip(image, 1)  # Horizontal flip\n"
+        return pipeline.run_op("flip", image, mode=1)
     
     def flip_Vertical_image(self, image):
         """Flip image vertically."""
-        return cv2.flip(image, 0), "cv2.flip(image, 0)  # Vertical flip\n"
+        return pipeline.run_op("flip", image, mode=0)
     
     # Dialog operations - delegate to original
     def resize_image(self, image):
@@ -157,8 +157,7 @@ class GeometricProcessor(BaseProcessor):
                     messagebox.showerror("Error", "Width and height must be positive values")
                     return
                 
-                resized = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
-                result = (resized, f"cv2.resize(image, ({new_width}, {new_height}), interpolation=cv2.INTER_AREA)\n")
+                result = pipeline.run_op("resize", image, width=new_width, height=new_height)
                 dialog.destroy()
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to resize image: {str(e)}")
@@ -206,9 +205,7 @@ class GeometricProcessor(BaseProcessor):
         def flip_ok():
             nonlocal result
             try:
-                mode = flip_mode.get()
-                flipped = cv2.flip(image, mode)
-                result = (flipped, f"cv2.flip(image, {mode})  # {['Vertical', 'Horizontal', 'Both'][mode+1]} flip\n")
+                result = pipeline.run_op("flip", image, mode=flip_mode.get())
                 dialog.destroy()
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to flip image: {str(e)}")
@@ -259,6 +256,7 @@ class GeometricProcessor(BaseProcessor):
         # Canvases for image display
         scale = min(300/w, 200/h)
         preview_w, preview_h = int(w*scale), int(h*scale)
+        proxy, factor = self._make_proxy(image, (preview_w, preview_h))
         
         orig_canvas = tk.Canvas(orig_frame, width=preview_w, height=preview_h, bg="lightgray")
         orig_canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -295,15 +293,14 @@ class GeometricProcessor(BaseProcessor):
         def update_preview(*args):
             try:
                 # Calculate translation matrix and apply it
-                M = np.array([[1, 0, tx.get()], [0, 1, ty.get()]], dtype=np.float32)
-                moved = cv2.warpAffine(image, M, (w, h))
+                moved, _ = ops.translate(proxy, tx.get() * factor, ty.get() * factor)
                 
                 # === SỬA PIL IMPORT ===
                 # Show original image
-                if len(image.shape) > 2:
-                    orig_img = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+                if len(proxy.shape) > 2:
+                    orig_img = cv2.cvtColor(proxy, cv2.COLOR_BGR2RGB)
                 else:
-                    orig_img = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+                    orig_img = cv2.cvtColor(proxy, cv2.COLOR_GRAY2RGB)
                 
                 orig_resized = cv2.resize(orig_img, (preview_w, preview_h))
                 orig_tk = self.ImageTk.PhotoImage(self.Image.fromarray(orig_resized))
@@ -334,21 +331,15 @@ class GeometricProcessor(BaseProcessor):
             nonlocal result
             try:
                 # Apply the transformation
-                M = np.array([[1, 0, tx.get()], [0, 1, ty.get()]], dtype=np.float32)
-                moved_img = cv2.warpAffine(image, M, (w, h))
-                
-                # Generate code representation
-                code = f"M = np.array([[1, 0, {tx.get()}], [0, 1, {ty.get()}]], dtype=np.float32)\n"
-                code += f"moved_img = cv2.warpAffine(image, M, ({w}, {h}))\n"
-                
-                result = (moved_img, code)
+                result = pipeline.run_op("translate", image, tx=tx.get(), ty=ty.get())
                 dialog.destroy()
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to move image: {str(e)}")
         
         # Register callbacks and show initial preview
-        tx.trace("w", update_preview)
-        ty.trace("w", update_preview)
+        schedule_preview = self._preview_scheduler(dialog, update_preview)
+        tx.trace("w", schedule_preview)
+        ty.trace("w", schedule_preview)
         
         def update_labels(*args):
             tx_label.config(text=str(int(tx.get())))
@@ -403,6 +394,7 @@ class GeometricProcessor(BaseProcessor):
         # Canvases for image display
         scale_factor = min(300/w, 200/h)
         preview_w, preview_h = int(w*scale_factor), int(h*scale_factor)
+        proxy, factor = self._make_proxy(image, (preview_w, preview_h))
         
         orig_canvas = tk.Canvas(orig_frame, width=preview_w, height=preview_h, bg="lightgray")
         orig_canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -466,19 +458,18 @@ class GeometricProcessor(BaseProcessor):
         def update_preview(*args):
             try:
                 # Apply rotation
-                center = (center_x.get(), center_y.get())
-                M = cv2.getRotationMatrix2D(center, angle.get(), scale.get())
-                rotated = cv2.warpAffine(image, M, (w, h))
+                center = self._proxy_point((center_x.get(), center_y.get()), factor)
+                rotated, _ = ops.rotate(proxy, angle.get(), scale.get(), center)
                 
                 # === SỬA PIL IMPORT ===
                 # Show original image with center point
-                if len(image.shape) > 2:
-                    orig_img = cv2.cvtColor(image.copy(), cv2.COLOR_BGR2RGB)
+                if len(proxy.shape) > 2:
+                    orig_img = cv2.cvtColor(proxy, cv2.COLOR_BGR2RGB)
                 else:
-                    orig_img = cv2.cvtColor(image.copy(), cv2.COLOR_GRAY2RGB)
+                    orig_img = cv2.cvtColor(proxy, cv2.COLOR_GRAY2RGB)
                 
                 # Draw center point on original
-                cv2.circle(orig_img, center, 5, (255, 0, 0), -1)
+                cv2.circle(orig_img, center, 3, (255, 0, 0), -1)
                 
                 orig_resized = cv2.resize(orig_img, (preview_w, preview_h))
                 orig_tk = self.ImageTk.PhotoImage(self.Image.fromarray(orig_resized))
@@ -510,25 +501,18 @@ class GeometricProcessor(BaseProcessor):
             try:
                 # Apply the transformation
                 center = (center_x.get(), center_y.get())
-                M = cv2.getRotationMatrix2D(center, angle.get(), scale.get())
-                rotated_img = cv2.warpAffine(image, M, (w, h))
-                
-                # Generate code representation
-                code = f"# Rotate image around ({center[0]}, {center[1]}) by {angle.get()} degrees with scale {scale.get()}\n"
-                code += f"M = cv2.getRotationMatrix2D(({center[0]}, {center[1]}), {angle.get()}, {scale.get()})\n"
-                code += f"rotated_img = cv2.warpAffine(image, M, ({w}, {h}))\n"
-                
-                result = (rotated_img, code)
+                result = pipeline.run_op("rotate", image, angle=angle.get(), scale=scale.get(), center=center)
                 dialog.destroy()
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to rotate image: {str(e)}")
         
         # Register callbacks and show initial preview
         use_center.trace("w", update_center_state)
-        angle.trace("w", update_preview)
-        scale.trace("w", update_preview)
-        center_x.trace("w", update_preview)
-        center_y.trace("w", update_preview)
+        schedule_preview = self._preview_scheduler(dialog, update_preview)
+        angle.trace("w", schedule_preview)
+        scale.trace("w", schedule_preview)
+        center_x.trace("w", schedule_preview)
+        center_y.trace("w", schedule_preview)
         
         def update_labels(*args):
             angle_label.config(text=f"{angle.get():.1f}")
@@ -606,6 +590,7 @@ class GeometricProcessor(BaseProcessor):
         # Canvas for previews
         scale_factor = min(350/w, 250/h)
         preview_w, preview_h = int(w*scale_factor), int(h*scale_factor)
+        proxy, factor = self._make_proxy(image, (preview_w, preview_h))
         
         src_canvas = tk.Canvas(src_frame, width=preview_w, height=preview_h, bg="lightgray")
         src_canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -730,42 +715,31 @@ class GeometricProcessor(BaseProcessor):
         def update_preview(*args):
             try:
                 # Get points
-                src_pts = np.array([
-                    [src_x_vars[i].get(), src_y_vars[i].get()] for i in range(4)
-                ], dtype=np.float32)
+                src_pts = [[src_x_vars[i].get(), src_y_vars[i].get()] for i in range(4)]
+                dst_pts = [[dst_x_vars[i].get(), dst_y_vars[i].get()] for i in range(4)]
                 
-                dst_pts = np.array([
-                    [dst_x_vars[i].get(), dst_y_vars[i].get()] for i in range(4)
-                ], dtype=np.float32)
-                
-                # Apply perspective transform
-                M = cv2.getPerspectiveTransform(src_pts, dst_pts)
-                warped = cv2.warpPerspective(image, M, (w, h))
+                # Apply perspective transform on the proxy
+                proxy_src = [self._proxy_point(pt, factor) for pt in src_pts]
+                proxy_dst = [self._proxy_point(pt, factor) for pt in dst_pts]
+                warped, _ = ops.perspective(proxy, proxy_src, proxy_dst)
                 
                 # === SỬA PIL IMPORT ===
                 # Display source image with points
-                if len(image.shape) > 2:
-                    src_img = cv2.cvtColor(image.copy(), cv2.COLOR_BGR2RGB)
+                if len(proxy.shape) > 2:
+                    src_img = cv2.cvtColor(proxy, cv2.COLOR_BGR2RGB)
                 else:
-                    src_img = cv2.cvtColor(image.copy(), cv2.COLOR_GRAY2RGB)
+                    src_img = cv2.cvtColor(proxy, cv2.COLOR_GRAY2RGB)
                 
                 # Draw points and lines on source image
                 colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)]
-                for i in range(4):
-                    pt = (src_x_vars[i].get(), src_y_vars[i].get())
-                    cv2.circle(src_img, pt, 5, colors[i], -1)
-                    cv2.putText(src_img, str(i+1), (pt[0]+5, pt[1]+5), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, colors[i], 2)
+                for i, pt in enumerate(proxy_src):
+                    cv2.circle(src_img, pt, 3, colors[i], -1)
+                    cv2.putText(src_img, str(i+1), (pt[0]+4, pt[1]+4), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.4, colors[i], 1)
                 
                 # Draw lines connecting the points
-                cv2.line(src_img, (src_x_vars[0].get(), src_y_vars[0].get()), 
-                        (src_x_vars[1].get(), src_y_vars[1].get()), (255, 255, 255), 1)
-                cv2.line(src_img, (src_x_vars[1].get(), src_y_vars[1].get()), 
-                        (src_x_vars[3].get(), src_y_vars[3].get()), (255, 255, 255), 1)
-                cv2.line(src_img, (src_x_vars[3].get(), src_y_vars[3].get()), 
-                        (src_x_vars[2].get(), src_y_vars[2].get()), (255, 255, 255), 1)
-                cv2.line(src_img, (src_x_vars[2].get(), src_y_vars[2].get()), 
-                        (src_x_vars[0].get(), src_y_vars[0].get()), (255, 255, 255), 1)
+                for a, b in ((0, 1), (1, 3), (3, 2), (2, 0)):
+                    cv2.line(src_img, proxy_src[a], proxy_src[b], (255, 255, 255), 1)
                 
                 src_resized = cv2.resize(src_img, (preview_w, preview_h))
                 src_tk = self.ImageTk.PhotoImage(self.Image.fromarray(src_resized))
@@ -797,26 +771,11 @@ class GeometricProcessor(BaseProcessor):
             nonlocal result
             try:
                 # Get points
-                src_pts = np.array([
-                    [src_x_vars[i].get(), src_y_vars[i].get()] for i in range(4)
-                ], dtype=np.float32)
-                
-                dst_pts = np.array([
-                    [dst_x_vars[i].get(), dst_y_vars[i].get()] for i in range(4)
-                ], dtype=np.float32)
+                src_pts = [[src_x_vars[i].get(), src_y_vars[i].get()] for i in range(4)]
+                dst_pts = [[dst_x_vars[i].get(), dst_y_vars[i].get()] for i in range(4)]
                 
                 # Apply perspective transform
-                M = cv2.getPerspectiveTransform(src_pts, dst_pts)
-                warped = cv2.warpPerspective(image, M, (w, h))
-                
-                # Generate code
-                code = "# Perspective transform\n"
-                code += f"src_points = np.float32({src_pts.tolist()})\n"
-                code += f"dst_points = np.float32({dst_pts.tolist()})\n"
-                code += "M = cv2.getPerspectiveTransform(src_points, dst_points)\n"
-                code += f"warped = cv2.warpPerspective(image, M, ({w}, {h}))\n"
-                
-                result = (warped, code)
+                result = pipeline.run_op("perspective", image, src_points=src_pts, dst_points=dst_pts)
                 dialog.destroy()
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to apply perspective transform: {str(e)}")
@@ -825,8 +784,9 @@ class GeometricProcessor(BaseProcessor):
         src_canvas.bind("<Button-1>", canvas_click)
         
         # Register callbacks
+        schedule_preview = self._preview_scheduler(dialog, update_preview)
         for var in src_x_vars + src_y_vars + dst_x_vars + dst_y_vars:
-            var.trace("w", update_preview)
+            var.trace("w", schedule_preview)
         
         # Initial preview
         update_preview()
@@ -0,0 +1,97 @@
+"""
+Histogram Panel
+
+Docked histogram and statistics readout for the main window. It follows
+the displayed image: `show()` only records the image and schedules a
+redraw, which runs after the main canvas has been drawn. Statistics come
+from `ops.sampled_statistics`, a cached subsample bounded to about 130k
+pixels, so an update takes a few milliseconds at any resolution, and zooming
+or stepping back to a recent state does not recompute anything.
+
+Channels are labelled for the image's color space (see Recipe.color_space);
+layouts the panel does not know are shown with plain channel numbers.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+import numpy as np
+
+from . import ops
+from .base_processor import PreviewScheduler
+
+
+class HistogramPanel:
+    """
+    Live histogram of the current image with per-channel statistics.
+
+    Args:
+        parent: Container the panel is created in; call `pack()` to place it
+        width: Plot width in pixels
+        height: Plot height in pixels
+    """
+
+    # Color space -> (label, plot color) per channel
+    CHANNELS = {
+        "BGR": (("B", "#0000FF"), ("G", "#00AA00"), ("R", "#FF0000")),
+        "HSV": (("H", "#AA00AA"), ("S", "#00AAAA"), ("V", "#555555")),
+    }
+    OTHER_CHANNELS = (("0", "#0000FF"), ("1", "#00AA00"), ("2", "#FF0000"), ("3", "#555555"))
+
+    def __init__(self, parent, width=256, height=110):
+        self.width = width
+        self.height = height
+        self.frame = ttk.Frame(parent, style="TFrame")
+        ttk.Label(self.frame, text="Histogram", style="Category.TLabel").pack(anchor=tk.W, pady=(0, 5))
+
+        self.canvas = tk.Canvas(self.frame, width=width, height=height, bg="white",
+                                highlightthickness=1, highlightbackground="#999999")
+        self.canvas.pack(fill=tk.X)
+        self.stats_label = ttk.Label(self.frame, text="No image loaded", font=("Consolas", 9),
+                                     justify=tk.LEFT)
+        self.stats_label.pack(anchor=tk.W, pady=(3, 0))
+
+        self._image = None
+        self._shown = None
+        self._schedule = PreviewScheduler(self.canvas, self._render)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def show(self, image, color_space="BGR"):
+        """Follow `image`, whose channels are in `color_space`; the redraw happens later on the event loop."""
+        self._image = (image, color_space)
+        self._schedule()
+
+    def _render(self):
+        if self._image is None:
+            return
+        image, color_space = self._image
+        if self._shown is not None and self._shown[0] is image and self._shown[1] == color_space:
+            return
+        self._shown = self._image
+        channels = self.CHANNELS.get(color_space, self.OTHER_CHANNELS)
+
+        hists, stats, step = ops.sampled_statistics(image)
+        self.canvas.delete("all")
+
+        # One polyline per channel, each scaled to its own peak
+        hists = hists[:len(channels)]
+        xs = np.arange(256) * (self.width - 1) / 255
+        peaks = np.maximum(hists.max(axis=1, keepdims=True), 1.0)
+        ys = (self.height - 1) - hists / peaks * (self.height - 6)
+        if len(hists) == 1:
+            outline = np.column_stack([xs, ys[0]]).ravel().tolist()
+            self.canvas.create_polygon([xs[0], self.height] + outline + [xs[-1], self.height],
+                                       fill="gray", outline="gray")
+            lines = [f"Mean {stats[0].mean:6.2f}  Std {stats[0].std:6.2f}",
+                     f"Min  {stats[0].min}  Max {stats[0].max}"]
+        else:
+            lines = []
+            for (name, color), channel_ys, s in zip(channels, ys, stats):
+                self.canvas.create_line(np.column_stack([xs, channel_ys]).ravel().tolist(), fill=color)
+                lines.append(f"{name} {s.mean:6.2f} ±{s.std:5.1f}  {s.min}-{s.max}")
+
+        if step > 1:
+            lines.append(f"(sampled 1 in {step}x{step} pixels)")
+        self.stats_label.config(text="\n".join(lines))
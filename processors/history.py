@@ -0,0 +1,184 @@
+"""
+Undo/Redo History
+
+Memory-bounded history of (image, code, recipe steps) states. The frames
+nearest the current position are kept as raw arrays so stepping back and
+forth through recent edits is instant. Older frames are packed into
+lossless in-memory PNGs, and when the total still exceeds the budget the
+oldest packed frames are dropped altogether: those are rebuilt on demand by
+replaying their recipe steps from the nearest earlier frame that is still
+held. The first frame (the loaded image) and every `checkpoint_interval`-th
+frame are dropped last, which bounds how many steps a rebuild has to replay.
+
+Frames kept in a memory map (see backing_store.py) are already on disk:
+they are stored by reference (as read-only views) rather than copied, are
+not counted against the budget and are never packed.
+"""
+
+import cv2
+
+from .backing_store import is_mapped
+from .pipeline import apply_step
+
+
+DEFAULT_BUDGET_MB = 512
+
+
+class _Entry:
+    """One history state. Exactly one of `image`/`packed` is set, or neither if evicted."""
+
+    __slots__ = ("image", "packed", "shape", "dtype", "code", "steps")
+
+    def __init__(self, image, code, steps):
+        self.image = image
+        self.packed = None
+        self.shape = image.shape
+        self.dtype = image.dtype
+        self.code = code
+        self.steps = steps
+
+    @property
+    def nbytes(self):
+        if self.image is not None:
+            return 0 if is_mapped(self.image) else self.image.nbytes
+        if self.packed is not None:
+            return self.packed.nbytes
+        return 0
+
+    @property
+    def held(self):
+        return self.image is not None or self.packed is not None
+
+    def pack(self):
+        if self.image is None or is_mapped(self.image):
+            return
+        ok, buf = cv2.imencode(".png", self.image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        if ok:  # PNG cannot hold every dtype/channel layout; keep those raw
+            self.packed = buf
+            self.image = None
+
+    def decoded(self):
+        if self.image is not None:
+            return self.image
+        return cv2.imdecode(self.packed, cv2.IMREAD_UNCHANGED).reshape(self.shape)
+
+    def unpack(self):
+        if self.image is None and self.packed is not None:
+            self.image = self.decoded()
+            self.packed = None
+        return self.image
+
+
+def _frame(image):
+    """What the history keeps of `image`: a private copy, or a read-only view of a mapped frame."""
+    if not is_mapped(image):
+        return image.copy()
+    frame = image.view()
+    frame.flags.writeable = False
+    return frame
+
+
+class History:
+    """
+    Undo/redo stack with a memory budget.
+
+    Args:
+        budget_mb: Approximate memory allowed for all stored frames
+        hot_frames: Frames on each side of the current position kept raw
+        checkpoint_interval: Every n-th frame is evicted only as a last resort
+    """
+
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB, hot_frames=3, checkpoint_interval=8):
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.hot_frames = hot_frames
+        self.checkpoint_interval = checkpoint_interval
+        self.entries = []
+        self.position = -1
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def nbytes(self):
+        return sum(e.nbytes for e in self.entries)
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return self.position < len(self.entries) - 1
+
+    def reset(self, image, code, steps=()):
+        """Start a new history whose first state is `image`."""
+        self.entries = [_Entry(_frame(image), code, list(steps))]
+        self.position = 0
+
+    def push(self, image, code, steps=()):
+        """Record a new state after the current one, discarding any redo states."""
+        del self.entries[self.position + 1:]
+        self.entries.append(_Entry(_frame(image), code, list(steps)))
+        self.position = len(self.entries) - 1
+        self._enforce_budget()
+
+    def undo(self):
+        """Step back; returns (image, code, steps) or None at the start."""
+        if not self.can_undo():
+            return None
+        return self._move_to(self.position - 1)
+
+    def redo(self):
+        """Step forward; returns (image, code, steps) or None at the end."""
+        if not self.can_redo():
+            return None
+        return self._move_to(self.position + 1)
+
+    def _move_to(self, index):
+        image = self._materialize(index)
+        self.position = index
+        self._enforce_budget()
+        entry = self.entries[index]
+        return image, entry.code, list(entry.steps)
+
+    def _replayable(self, index):
+        # A frame can be rebuilt only if it adds exactly one recorded step to
+        # the frame before it.
+        if index == 0:
+            return False
+        prev, entry = self.entries[index - 1], self.entries[index]
+        return len(entry.steps) == len(prev.steps) + 1
+
+    def _materialize(self, index):
+        entry = self.entries[index]
+        if entry.held:
+            return entry.unpack()
+
+        start = index - 1
+        while not self.entries[start].held:
+            start -= 1
+        image = self.entries[start].decoded()
+        for i in range(start + 1, index + 1):
+            image, _ = apply_step(image, self.entries[i].steps[-1])
+        entry.image = image
+        return image
+
+    def _enforce_budget(self):
+        lo, hi = self.position - self.hot_frames, self.position + self.hot_frames
+        for i, entry in enumerate(self.entries):
+            if not lo <= i <= hi:
+                entry.pack()
+
+        total = self.nbytes
+        if total <= self.budget:
+            return
+
+        # Drop replayable frames oldest first: ordinary frames, then checkpoints
+        for keep_checkpoints in (True, False):
+            for i, entry in enumerate(self.entries):
+                if total <= self.budget:
+                    return
+                if lo <= i <= hi or not entry.held or not self._replayable(i):
+                    continue
+                if keep_checkpoints and i % self.checkpoint_interval == 0:
+                    continue
+                total -= entry.nbytes
+                entry.image = entry.packed = None
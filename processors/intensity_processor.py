@@ -10,6 +10,7 @@ import cv2
 import tkinter as tk
 from tkinter import ttk, messagebox
 import numpy as np
+from . import ops, pipeline
 from .base_processor import BaseProcessor
 
 
@@ -66,75 +67,56 @@ class IntensityProcessor(BaseProcessor):
         # Calculate and display histogram
         def calculate_histogram():
             try:
-                # Display image
+                # Display image (downscale first so only the preview is converted)
+                small = cv2.resize(image, (preview_w, preview_h))
                 if len(image.shape) == 2:  # Grayscale
-                    display_img = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+                    resized = cv2.cvtColor(small, cv2.COLOR_GRAY2RGB)
                 else:
-                    display_img = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+                    resized = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
 
-                resized = cv2.resize(display_img, (preview_w, preview_h))
                 pil_img = self.Image.fromarray(resized)
                 photo = self.ImageTk.PhotoImage(pil_img)
                 img_canvas.create_image(preview_w // 2, preview_h // 2, image=photo)
                 img_canvas.image = photo
 
-                # Calculate histogram
+                # One pass per channel: statistics come from the histogram itself
+                hists, stats = ops.image_statistics(image)
                 hist_canvas.delete("all")
-                
+
+                # One polyline per channel instead of a canvas item per bin
+                # (each channel scaled to its own peak)
+                xs = 10 + np.arange(256) * 1.7
+                peaks = np.maximum(hists.max(axis=1, keepdims=True), 1.0)
+                ys = 290 - hists / peaks * 280
+
                 if len(image.shape) == 2:  # Grayscale
-                    hist = cv2.calcHist([image], [0], None, [256], [0, 256])
-                    
-                    # Normalize histogram for display
-                    max_val = np.max(hist)
-                    hist_normalized = (hist / max_val * 280).astype(int)
-                    
-                    # Draw histogram
-                    for i in range(256):
-                        x = 10 + i * 1.7
-                        y = 290
-                        height = hist_normalized[i][0]
-                        hist_canvas.create_line(x, y, x, y - height, fill="gray", width=2)
-                    
-                    # Statistics
-                    mean_val = np.mean(image)
-                    std_val = np.std(image)
-                    min_val = np.min(image)
-                    max_val = np.max(image)
-                    
+                    outline = np.column_stack([xs, ys[0]]).ravel().tolist()
+                    hist_canvas.create_polygon([xs[0], 290] + outline + [xs[-1], 290],
+                                               fill="gray", outline="gray")
+
+                    s = stats[0]
                     info = f"""Image Statistics (Grayscale):
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Mean:             {mean_val:.2f}
-Standard Dev:     {std_val:.2f}
-Min Value:        {min_val}
-Max Value:        {max_val}
+Mean:             {s.mean:.2f}
+Standard Dev:     {s.std:.2f}
+Min Value:        {s.min}
+Max Value:        {s.max}
 Dimensions:       {w} x {h}
 Total Pixels:     {w * h}
 """
                     
                 else:  # Color image (BGR)
-                    colors = [('blue', 'Blue'), ('green', 'Green'), ('red', 'Red')]
+                    names = ['Blue', 'Green', 'Red']
                     color_codes = ['#0000FF', '#00FF00', '#FF0000']
-                    
+
                     stats_info = []
-                    
-                    for idx, (channel_name, display_name) in enumerate(colors):
-                        hist = cv2.calcHist([image], [idx], None, [256], [0, 256])
-                        max_val = np.max(hist)
-                        hist_normalized = (hist / max_val * 280).astype(int)
-                        
-                        # Draw histogram
-                        for i in range(256):
-                            x = 10 + i * 1.7
-                            y = 290
-                            height = hist_normalized[i][0]
-                            hist_canvas.create_line(x, y, x, y - height, fill=color_codes[idx], width=1)
-                        
-                        # Calculate statistics for this channel
-                        channel_data = image[:, :, idx]
-                        mean_val = np.mean(channel_data)
-                        std_val = np.std(channel_data)
-                        stats_info.append(f"{display_name:6s}: Mean={mean_val:6.2f}  Std={std_val:6.2f}")
-                    
+                    for idx, display_name in enumerate(names):
+                        hist_canvas.create_line(np.column_stack([xs, ys[idx]]).ravel().tolist(),
+                                                fill=color_codes[idx], width=1)
+                        s = stats[idx]
+                        stats_info.append(f"{display_name:6s}: Mean={s.mean:6.2f}  Std={s.std:6.2f}  "
+                                          f"Min={s.min}  Max={s.max}")
+
                     info = f"""Image Statistics (Color - BGR):
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 {stats_info[0]}
@@ -176,31 +158,8 @@ Channels:         3 (BGR)
         def save_histogram():
             """Save histogram as image or return image with histogram overlay"""
             try:
-                # Create code for histogram calculation
-                if len(image.shape) == 2:
-                    code = "# Calculate histogram for grayscale image\n"
-                    code += "hist = cv2.calcHist([image], [0], None, [256], [0, 256])\n"
-                    code += "# Visualize histogram (requires matplotlib)\n"
-                    code += "import matplotlib.pyplot as plt\n"
-                    code += "plt.plot(hist)\n"
-                    code += "plt.title('Grayscale Histogram')\n"
-                    code += "plt.xlabel('Pixel Value')\n"
-                    code += "plt.ylabel('Frequency')\n"
-                    code += "plt.show()\n"
-                else:
-                    code = "# Calculate histogram for color image (BGR)\n"
-                    code += "colors = ('b', 'g', 'r')\n"
-                    code += "for i, color in enumerate(colors):\n"
-                    code += "    hist = cv2.calcHist([image], [i], None, [256], [0, 256])\n"
-                    code += "    plt.plot(hist, color=color)\n"
-                    code += "plt.title('Color Histogram')\n"
-                    code += "plt.xlabel('Pixel Value')\n"
-                    code += "plt.ylabel('Frequency')\n"
-                    code += "plt.legend(['Blue', 'Green', 'Red'])\n"
-                    code += "plt.show()\n"
-                
                 nonlocal result
-                result = (image.copy(), code)
+                result = pipeline.run_op("histogram", image)
                 messagebox.showinfo("Success", "Histogram code generated!")
                 dialog.destroy()
             except Exception as e:
@@ -238,6 +197,7 @@ Channels:         3 (BGR)
 
         result_canvas = tk.Canvas(preview_frame, width=350, height=250, bg="lightgray")
         result_canvas.grid(row=1, column=1, padx=10, pady=5)
+        proxy, _ = self._make_proxy(image, (350, 250))
 
         # Controls
         controls_frame = ttk.Frame(dialog)
@@ -261,56 +221,25 @@ Channels:         3 (BGR)
 
         def update_preview(*args):
             if method_var.get() == "linear":
-                enhanced = cv2.convertScaleAbs(image, alpha=alpha.get(), beta=beta.get())
+                enhanced, _ = ops.linear_contrast(proxy, alpha.get(), beta.get())
             else:  # CLAHE
-                if len(image.shape) == 2:
-                    clahe = cv2.createCLAHE(clipLimit=alpha.get(), tileGridSize=(8, 8))
-                    enhanced = clahe.apply(image)
-                else:
-                    lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
-                    l, a, b = cv2.split(lab)
-                    clahe = cv2.createCLAHE(clipLimit=alpha.get(), tileGridSize=(8, 8))
-                    l = clahe.apply(l)
-                    enhanced = cv2.merge([l, a, b])
-                    enhanced = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
+                enhanced, _ = ops.clahe(proxy, alpha.get())
             
-            self._update_preview_canvas(orig_canvas, image, image)
-            self._update_preview_canvas(result_canvas, enhanced, image)
+            self._update_preview_canvas(orig_canvas, proxy, proxy)
+            self._update_preview_canvas(result_canvas, enhanced, proxy)
 
         def apply_contrast():
             nonlocal result
             if method_var.get() == "linear":
-                enhanced = cv2.convertScaleAbs(image, alpha=alpha.get(), beta=beta.get())
-                code = f"# Linear contrast enhancement\n"
-                code += f"enhanced = cv2.convertScaleAbs(image, alpha={alpha.get():.2f}, beta={beta.get()})\n"
+                result = pipeline.run_op("linear_contrast", image, alpha=alpha.get(), beta=beta.get())
             else:
-                if len(image.shape) == 2:
-                    clahe = cv2.createCLAHE(clipLimit=alpha.get(), tileGridSize=(8, 8))
-                    enhanced = clahe.apply(image)
-                    code = f"# CLAHE enhancement\n"
-                    code += f"clahe = cv2.createCLAHE(clipLimit={alpha.get():.2f}, tileGridSize=(8, 8))\n"
-                    code += f"enhanced = clahe.apply(image)\n"
-                else:
-                    lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
-                    l, a, b = cv2.split(lab)
-                    clahe = cv2.createCLAHE(clipLimit=alpha.get(), tileGridSize=(8, 8))
-                    l = clahe.apply(l)
-                    enhanced = cv2.merge([l, a, b])
-                    enhanced = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
-                    code = f"# CLAHE enhancement on LAB color space\n"
-                    code += f"lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)\n"
-                    code += f"l, a, b = cv2.split(lab)\n"
-                    code += f"clahe = cv2.createCLAHE(clipLimit={alpha.get():.2f}, tileGridSize=(8, 8))\n"
-                    code += f"l = clahe.apply(l)\n"
-                    code += f"enhanced = cv2.merge([l, a, b])\n"
-                    code += f"enhanced = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)\n"
-            
-            result = (enhanced, code)
+                result = pipeline.run_op("clahe", image, clip_limit=alpha.get())
             dialog.destroy()
 
-        method_var.trace("w", update_preview)
-        alpha.trace("w", update_preview)
-        beta.trace("w", update_preview)
+        schedule_preview = self._preview_scheduler(dialog, update_preview)
+        method_var.trace("w", schedule_preview)
+        alpha.trace("w", schedule_preview)
+        beta.trace("w", schedule_preview)
         
         def update_labels(*args):
             alpha_label.config(text=f"{alpha.get():.2f}")
@@ -351,6 +280,7 @@ Channels:         3 (BGR)
 
         result_canvas = tk.Canvas(preview_frame, width=350, height=250, bg="lightgray")
         result_canvas.grid(row=1, column=1, padx=10, pady=5)
+        proxy, _ = self._make_proxy(image, (350, 250))
 
         # Controls
         controls_frame = ttk.Frame(dialog)
@@ -364,32 +294,18 @@ Channels:         3 (BGR)
         c_label.pack(pady=5)
 
         def update_preview(*args):
-            c = c_value.get()
-            normalized = image.astype(np.float32) / 255.0
-            log_img = c * np.log1p(normalized)
-            log_img = np.clip(log_img * 255, 0, 255).astype(np.uint8)
+            log_img, _ = ops.log_transform(proxy, c_value.get())
             
-            self._update_preview_canvas(orig_canvas, image, image)
-            self._update_preview_canvas(result_canvas, log_img, image)
+            self._update_preview_canvas(orig_canvas, proxy, proxy)
+            self._update_preview_canvas(result_canvas, log_img, proxy)
 
         def apply_log():
             nonlocal result
-            c = c_value.get()
-            normalized = image.astype(np.float32) / 255.0
-            log_img = c * np.log1p(normalized)
-            log_img = np.clip(log_img * 255, 0, 255).astype(np.uint8)
-            
-            code = f"# Log transformation\n"
-            code += f"import numpy as np\n"
-            code += f"c = {c:.2f}\n"
-            code += f"normalized = image.astype(np.float32) / 255.0\n"
-            code += f"log_img = c * np.log1p(normalized)\n"
-            code += f"result = np.clip(log_img * 255, 0, 255).astype(np.uint8)\n"
-            
-            result = (log_img, code)
+            result = pipeline.run_op("log_transform", image, c=c_value.get())
             dialog.destroy()
 
-        c_value.trace("w", update_preview)
+        schedule_preview = self._preview_scheduler(dialog, update_preview)
+        c_value.trace("w", schedule_preview)
         
         def update_labels(*args):
             c_label.config(text=f"{c_value.get():.2f}")
@@ -429,6 +345,7 @@ Channels:         3 (BGR)
 
         result_canvas = tk.Canvas(preview_frame, width=350, height=250, bg="lightgray")
         result_canvas.grid(row=1, column=1, padx=10, pady=5)
+        proxy, _ = self._make_proxy(image, (350, 250))
 
         # Controls
         controls_frame = ttk.Frame(dialog)
@@ -449,36 +366,19 @@ Channels:         3 (BGR)
         c_label.pack(pady=5)
 
         def update_preview(*args):
-            g = gamma.get()
-            c = c_value.get()
-            normalized = image.astype(np.float32) / 255.0
-            power_img = c * np.power(normalized, g)
-            power_img = np.clip(power_img * 255, 0, 255).astype(np.uint8)
+            power_img, _ = ops.power_transform(proxy, gamma.get(), c_value.get())
             
-            self._update_preview_canvas(orig_canvas, image, image)
-            self._update_preview_canvas(result_canvas, power_img, image)
+            self._update_preview_canvas(orig_canvas, proxy, proxy)
+            self._update_preview_canvas(result_canvas, power_img, proxy)
 
         def apply_power():
             nonlocal result
-            g = gamma.get()
-            c = c_value.get()
-            normalized = image.astype(np.float32) / 255.0
-            power_img = c * np.power(normalized, g)
-            power_img = np.clip(power_img * 255, 0, 255).astype(np.uint8)
-            
-            code = f"# Power-law (gamma) transformation\n"
-            code += f"import numpy as np\n"
-            code += f"gamma = {g:.2f}\n"
-            code += f"c = {c:.2f}\n"
-            code += f"normalized = image.astype(np.float32) / 255.0\n"
-            code += f"power_img = c * np.power(normalized, gamma)\n"
-            code += f"result = np.clip(power_img * 255, 0, 255).astype(np.uint8)\n"
-            
-            result = (power_img, code)
+            result = pipeline.run_op("power_transform", image, gamma=gamma.get(), c=c_value.get())
             dialog.destroy()
 
-        gamma.trace("w", update_preview)
-        c_value.trace("w", update_preview)
+        schedule_preview = self._preview_scheduler(dialog, update_preview)
+        gamma.trace("w", schedule_preview)
+        c_value.trace("w", schedule_preview)
         
         def update_labels(*args):
             gamma_label.config(text=f"{gamma.get():.2f}")
@@ -0,0 +1,137 @@
+"""
+Image Loader
+
+Decodes image files on a shared thread pool. OpenCV releases the GIL while
+decoding, so several files decode truly in parallel, and callers get
+futures back immediately: a dialog can open as soon as its thumbnails are
+ready while the full-resolution images keep decoding in the background.
+
+Thumbnails use OpenCV's reduced decoders (`IMREAD_REDUCED_COLOR_2/4/8`),
+which for JPEG skip most of the work of a full decode by scaling in the
+DCT domain, and are kept in an on-disk cache (see thumbnail_cache.py) so
+revisiting a dataset does not decode it at all.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from .thumbnail_cache import ThumbnailCache
+
+try:
+    from PIL import Image
+except ImportError:  # only used to read image sizes from file headers
+    Image = None
+
+# Serializes image_size's temporary change to PIL's decompression-bomb limit
+_HEADER_LOCK = threading.Lock()
+
+
+MAX_WORKERS = min(8, os.cpu_count() or 4)
+
+# Reduction factor -> decode flag, largest reduction first
+REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def image_size(path):
+    """(width, height) from the file header, or None if it cannot be read without decoding."""
+    if Image is None:
+        return None
+    # Only the header is read, so PIL's decompression-bomb limit (which would
+    # hide the size of exactly the huge images the backing store is for) is
+    # lifted for this call alone and restored for every other Image.open
+    with _HEADER_LOCK:
+        limit = Image.MAX_IMAGE_PIXELS
+        Image.MAX_IMAGE_PIXELS = None
+        try:
+            with Image.open(path) as img:
+                return img.size
+        except (OSError, ValueError):
+            return None
+        finally:
+            Image.MAX_IMAGE_PIXELS = limit
+
+
+def read_thumbnail(path, size):
+    """
+    Decode `path` so its longer side is at most `size`, as cheaply as possible.
+
+    Returns:
+        tuple: (thumbnail, (width, height) of the full image), or (None, None)
+        if the file cannot be read
+    """
+    full_size = image_size(path)
+    image, factor = None, 1
+    for reduction, flag in REDUCED_FLAGS:
+        if full_size is not None and max(full_size) < size * reduction:
+            continue  # would come out smaller than the thumbnail
+        image = cv2.imread(path, flag)
+        if image is not None and max(image.shape[:2]) >= size:
+            factor = reduction
+            break
+        image = None
+    if image is None:
+        image = cv2.imread(path)
+    if image is None:
+        return None, None
+
+    h, w = image.shape[:2]
+    if full_size is None:
+        full_size = (w * factor, h * factor)
+    scale = min(size / w, size / h, 1.0)
+    if scale < 1.0:
+        image = cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    return image, full_size
+
+
+class ImageLoader:
+    """
+    Thread pool for decoding image files.
+
+    Args:
+        max_workers: Number of decoding threads
+        thumbnail_cache: Optional ThumbnailCache consulted before decoding
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, thumbnail_cache=None):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-loader")
+        self.thumbnail_cache = thumbnail_cache
+
+    def load(self, path):
+        """Future for the full-resolution BGR image at `path` (None if unreadable)."""
+        return self._pool.submit(cv2.imread, path)
+
+    def thumbnail(self, path, size):
+        """Future for `read_thumbnail(path, size)`, served from the cache when possible."""
+        return self._pool.submit(self._cached_thumbnail, path, size)
+
+    def load_all(self, paths):
+        """Decode all `paths` concurrently and wait; unreadable files give None."""
+        return [future.result() for future in [self.load(path) for path in paths]]
+
+    def thumbnails(self, paths, size):
+        """Thumbnails for all `paths`, decoded concurrently; see read_thumbnail."""
+        return [future.result() for future in [self.thumbnail(path, size) for path in paths]]
+
+    def _cached_thumbnail(self, path, size):
+        cache = self.thumbnail_cache
+        key = cache.key(path, size) if cache is not None else None
+        if key is not None:
+            hit = cache.get(key)
+            if hit is not None:
+                return hit
+
+        thumbnail, full_size = read_thumbnail(path, size)
+        if key is not None and thumbnail is not None:
+            cache.put(key, thumbnail, full_size)
+        return thumbnail, full_size
+
+
+# Shared by the dialogs and the pipeline
+LOADER = ImageLoader(thumbnail_cache=ThumbnailCache())
@@ -7,7 +7,7 @@ Handles erosion, dilation, opening, and closing operations.
 import cv2
 import tkinter as tk
 from tkinter import ttk
-import numpy as np
+from . import ops, pipeline
 from .base_processor import BaseProcessor
 
 
@@ -51,6 +51,7 @@ class MorphologyProcessor(BaseProcessor):
         """Apply morphological operations: erode, dilate, open, close"""
         result = None
         dialog, canvas, controls, buttons = self._create_basic_preview_dialog("Morphological Operations", "700x600")
+        proxy, factor = self._make_proxy(image)
         
         op_type = tk.IntVar(value=cv2.MORPH_ERODE)
         k_size = tk.IntVar(value=5)
@@ -61,14 +62,7 @@ class MorphologyProcessor(BaseProcessor):
         op_frame = ttk.LabelFrame(controls, text="Operation Type")
         op_frame.pack(fill=tk.X, pady=5)
         
-        ops = [
-            ("Erode", cv2.MORPH_ERODE),
-            ("Dilate", cv2.MORPH_DILATE),
-            ("Open", cv2.MORPH_OPEN),
-            ("Close", cv2.MORPH_CLOSE),
-        ]
-        
-        for text, val in ops:
+        for text, val in ops.MORPH_OPERATIONS:
             ttk.Radiobutton(op_frame, text=text, variable=op_type, value=val).pack(side=tk.LEFT, padx=10, pady=5)
             
         # Kernel Size
@@ -96,39 +90,25 @@ class MorphologyProcessor(BaseProcessor):
             if k % 2 == 0: k += 1
             k_label.config(text=f"{k}x{k}")
             
-            kernel = np.ones((k, k), np.uint8)
             op = op_type.get()
             iters = int(iterations.get())
             iter_label.config(text=str(iters))
             
             try:
-                morphed = cv2.morphologyEx(image, op, kernel, iterations=iters)
-                self._update_preview_canvas(canvas, morphed, image)
+                morphed, _ = ops.morphology(proxy, op, self._proxy_kernel(k, factor), iters)
+                self._update_preview_canvas(canvas, morphed, proxy)
             except Exception as e:
                 canvas.delete("all")
                 canvas.create_text(250, 150, text=str(e), fill="red")
         
-        op_type.trace("w", update_preview)
-        k_size.trace("w", update_preview)
-        iterations.trace("w", update_preview)
+        schedule_preview = self._preview_scheduler(dialog, update_preview)
+        op_type.trace("w", schedule_preview)
+        k_size.trace("w", schedule_preview)
+        iterations.trace("w", schedule_preview)
         
         def apply_morph():
             nonlocal result
-            k = k_size.get()
-            if k % 2 == 0: k += 1
-            kernel = np.ones((k, k), np.uint8)
-            op = op_type.get()
-            iters = iterations.get()
-            
-            morphed = cv2.morphologyEx(image, op, kernel, iterations=iters)
-            
-            op_name = next(name for name, val in ops if val == op)
-            op_code = f"cv2.MORPH_{op_name.upper()}"
-            
-            code = f"kernel = np.ones(({k}, {k}), np.uint8)\n"
-            code += f"morphed = cv2.morphologyEx(image, {op_code}, kernel, iterations={iters})\n"
-            
-            result = (morphed, code)
+            result = pipeline.run_op("morphology", image, op=op_type.get(), ksize=k_size.get(), iterations=iterations.get())
             dialog.destroy()
             
         ttk.Button(buttons, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
@@ -0,0 +1,997 @@
+"""
+Headless Operation Layer
+
+Pure compute functions behind every dialog in the processors package.
+Nothing in this module touches Tkinter or PIL, so the same operations can be
+driven from scripts, worker pools and benchmarks without a display.
+
+Every operation takes the input image first, followed by its parameters, and
+returns ``(processed_image, code_string)`` exactly like the dialogs do.
+Failures raise ``ValueError`` (or ``cv2.error`` from OpenCV itself) instead of
+showing a message box; the dialogs decide how to report them.
+"""
+
+import threading
+import weakref
+from collections import OrderedDict, namedtuple
+
+import cv2
+import numpy as np
+
+from .bands import run_bands
+from .stitching import (DEFAULT_COMPOSITING_MP, DEFAULT_REGISTRATION_MP, DEFAULT_SEAM_MP,
+                        StitchPipeline)
+
+
+# Threshold types offered by the Global Threshold dialog
+THRESHOLD_TYPES = [
+    ("Binary", cv2.THRESH_BINARY),
+    ("Binary Inverted", cv2.THRESH_BINARY_INV),
+    ("Truncate", cv2.THRESH_TRUNC),
+    ("To Zero", cv2.THRESH_TOZERO),
+    ("To Zero Inverted", cv2.THRESH_TOZERO_INV),
+    ("Otsu", cv2.THRESH_BINARY + cv2.THRESH_OTSU),
+]
+
+# Morphological operations offered by the Morphology dialog
+MORPH_OPERATIONS = [
+    ("Erode", cv2.MORPH_ERODE),
+    ("Dilate", cv2.MORPH_DILATE),
+    ("Open", cv2.MORPH_OPEN),
+    ("Close", cv2.MORPH_CLOSE),
+]
+
+# Fonts offered by the Put Text dialog
+FONTS = [
+    ("Simplex", cv2.FONT_HERSHEY_SIMPLEX),
+    ("Plain", cv2.FONT_HERSHEY_PLAIN),
+    ("Duplex", cv2.FONT_HERSHEY_DUPLEX),
+    ("Complex", cv2.FONT_HERSHEY_COMPLEX),
+    ("Triplex", cv2.FONT_HERSHEY_TRIPLEX),
+    ("Complex Small", cv2.FONT_HERSHEY_COMPLEX_SMALL),
+    ("Script Simplex", cv2.FONT_HERSHEY_SCRIPT_SIMPLEX),
+    ("Script Complex", cv2.FONT_HERSHEY_SCRIPT_COMPLEX),
+]
+
+
+# Comment labels for the cv2.flip modes
+FLIP_NAMES = {1: "Horizontal", 0: "Vertical", -1: "Both"}
+
+
+def odd_kernel(k):
+    """Round a slider value up to the next odd kernel size."""
+    k = int(k)
+    if k % 2 == 0:
+        k += 1
+    return k
+
+
+def to_gray(image):
+    """
+    Convert an image to grayscale if needed.
+
+    Args:
+        image: Input BGR or grayscale image
+
+    Returns:
+        tuple: (gray_image, conversion_code) where conversion_code is empty
+        when the input was already single-channel
+    """
+    if len(image.shape) > 2 and image.shape[2] > 1:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return gray, "# Convert to grayscale first\ngray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)\n"
+    return image, ""
+
+
+# ============================================================================
+# COLOR SPACE CONVERSIONS
+# ============================================================================
+
+def negative(image):
+    """Invert every pixel value."""
+    result = cv2.bitwise_not(image)
+    code = "# Convert to negative\nresult = cv2.bitwise_not(image)\n"
+    return result, code
+
+
+def hsv(image):
+    """Convert BGR to HSV color space."""
+    result = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    code = "# Convert BGR to HSV\nresult = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)\n"
+    return result, code
+
+
+def gray(image):
+    """Convert BGR to Grayscale."""
+    result = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    code = "# Convert BGR to Grayscale\nresult = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)\n"
+    return result, code
+
+
+# ============================================================================
+# GEOMETRIC TRANSFORMATIONS
+# ============================================================================
+
+def rotate_90(image):
+    """Rotate image by 90 degrees clockwise."""
+    return cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE), "cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)\n"
+
+
+def flip(image, mode):
+    """
+    Flip image.
+
+    Args:
+        image: Input image
+        mode: 1 horizontal, 0 vertical, -1 both
+    """
+    flipped = cv2.flip(image, mode)
+    return flipped, f"cv2.flip(image, {mode})  # {FLIP_NAMES[mode]} flip\n"
+
+
+def resize(image, width, height):
+    """Resize image to exact dimensions using area interpolation."""
+    if width <= 0 or height <= 0:
+        raise ValueError("Width and height must be positive values")
+    resized = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+    return resized, f"cv2.resize(image, ({width}, {height}), interpolation=cv2.INTER_AREA)\n"
+
+
+def translate(image, tx, ty):
+    """Shift image by (tx, ty) pixels, keeping the original canvas size."""
+    h, w = image.shape[:2]
+    M = np.array([[1, 0, tx], [0, 1, ty]], dtype=np.float32)
+    moved = cv2.warpAffine(image, M, (w, h))
+
+    code = f"M = np.array([[1, 0, {tx}], [0, 1, {ty}]], dtype=np.float32)\n"
+    code += f"moved_img = cv2.warpAffine(image, M, ({w}, {h}))\n"
+    return moved, code
+
+
+def rotate(image, angle, scale=1.0, center=None):
+    """
+    Rotate image around a center point with optional scaling.
+
+    Args:
+        image: Input image
+        angle: Rotation angle in degrees (counter-clockwise)
+        scale: Isotropic scale factor
+        center: (x, y) rotation center, defaults to the image center
+    """
+    h, w = image.shape[:2]
+    if center is None:
+        center = (w // 2, h // 2)
+    M = cv2.getRotationMatrix2D(center, angle, scale)
+    rotated = cv2.warpAffine(image, M, (w, h))
+
+    code = f"# Rotate image around ({center[0]}, {center[1]}) by {angle} degrees with scale {scale}\n"
+    code += f"M = cv2.getRotationMatrix2D(({center[0]}, {center[1]}), {angle}, {scale})\n"
+    code += f"rotated_img = cv2.warpAffine(image, M, ({w}, {h}))\n"
+    return rotated, code
+
+
+def perspective(image, src_points, dst_points):
+    """
+    Warp image so that four source points map onto four destination points.
+
+    Args:
+        image: Input image
+        src_points: Four (x, y) points in the input image
+        dst_points: Four (x, y) target points
+    """
+    h, w = image.shape[:2]
+    src_pts = np.array(src_points, dtype=np.float32)
+    dst_pts = np.array(dst_points, dtype=np.float32)
+    M = cv2.getPerspectiveTransform(src_pts, dst_pts)
+    warped = cv2.warpPerspective(image, M, (w, h))
+
+    code = "# Perspective transform\n"
+    code += f"src_points = np.float32({src_pts.tolist()})\n"
+    code += f"dst_points = np.float32({dst_pts.tolist()})\n"
+    code += "M = cv2.getPerspectiveTransform(src_points, dst_points)\n"
+    code += f"warped = cv2.warpPerspective(image, M, ({w}, {h}))\n"
+    return warped, code
+
+
+# ============================================================================
+# FILTERS & ENHANCEMENT
+# ============================================================================
+
+def equalize(image):
+    """Histogram equalization (color inputs are converted to grayscale)."""
+    if len(image.shape) > 2 and image.shape[2] > 1:
+        gray_img = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        equalized = cv2.equalizeHist(gray_img)
+        code = "# Convert to grayscale and equalize histogram\n"
+        code += "gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)\n"
+        code += "result = cv2.equalizeHist(gray)\n"
+        return equalized, code
+    equalized = cv2.equalizeHist(image)
+    code = "# Equalize histogram\nresult = cv2.equalizeHist(image)\n"
+    return equalized, code
+
+
+def gaussian_blur(image, ksize):
+    """Gaussian blur with a square kernel (even sizes are rounded up)."""
+    k = odd_kernel(ksize)
+    blurred = cv2.GaussianBlur(image, (k, k), 0)
+    return blurred, f"blurred = cv2.GaussianBlur(image, ({k}, {k}), 0)\n"
+
+
+def median_blur(image, ksize):
+    """Median blur (even sizes are rounded up)."""
+    k = odd_kernel(ksize)
+    blurred = cv2.medianBlur(image, k)
+    return blurred, f"blurred = cv2.medianBlur(image, {k})\n"
+
+
+def canny(image, threshold1, threshold2, aperture_size=3, l2_gradient=False):
+    """Canny edge detection."""
+    edges = cv2.Canny(image, threshold1, threshold2,
+                      apertureSize=aperture_size, L2gradient=l2_gradient)
+    code = f"edges = cv2.Canny(image, {threshold1}, {threshold2}, apertureSize={aperture_size}, L2gradient={l2_gradient})\n"
+    return edges, code
+
+
+# ============================================================================
+# SEGMENTATION
+# ============================================================================
+
+def threshold(image, thresh, maxval, thresh_type):
+    """
+    Global threshold on the grayscale version of the image.
+
+    Args:
+        image: Input image (converted to grayscale if needed)
+        thresh: Threshold value (ignored for Otsu)
+        maxval: Value assigned to pixels passing the threshold
+        thresh_type: One of the values in THRESHOLD_TYPES
+    """
+    gray_img, conversion_note = to_gray(image)
+    ret, thresholded = cv2.threshold(gray_img, thresh, maxval, thresh_type)
+
+    is_otsu = thresh_type & cv2.THRESH_OTSU
+    type_name = "Otsu" if is_otsu else next(name for name, val in THRESHOLD_TYPES if val == thresh_type)
+    thresh_val_str = "0" if is_otsu else str(thresh)
+    type_val_str = "cv2.THRESH_BINARY + cv2.THRESH_OTSU" if is_otsu else f"cv2.THRESH_{type_name.upper().replace(' ', '_')}"
+
+    code = f"{conversion_note}ret, thresholded = cv2.threshold(gray, {thresh_val_str}, {maxval}, {type_val_str})  # {type_name} threshold\n"
+    return thresholded, code
+
+
+def otsu_level(gray_image):
+    """Return the threshold level Otsu's method picks for a grayscale image."""
+    ret, _ = cv2.threshold(gray_image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return ret
+
+
+def adaptive_threshold(image, method, thresh_type, block_size, c):
+    """Adaptive threshold on the grayscale version of the image."""
+    gray_img, conversion_note = to_gray(image)
+    bs = odd_kernel(block_size)
+    adaptive = cv2.adaptiveThreshold(gray_img, 255, method, thresh_type, bs, c)
+
+    method_name = "ADAPTIVE_THRESH_MEAN_C" if method == cv2.ADAPTIVE_THRESH_MEAN_C else "ADAPTIVE_THRESH_GAUSSIAN_C"
+    type_name = "THRESH_BINARY" if thresh_type == cv2.THRESH_BINARY else "THRESH_BINARY_INV"
+
+    code = conversion_note
+    code += "# Apply adaptive threshold\n"
+    code += f"result = cv2.adaptiveThreshold(gray, 255, cv2.{method_name}, cv2.{type_name}, {bs}, {c})\n"
+    return adaptive, code
+
+
+# ============================================================================
+# MORPHOLOGY
+# ============================================================================
+
+def morphology(image, op, ksize, iterations=1):
+    """Erode, dilate, open or close with a square kernel of ones."""
+    k = odd_kernel(ksize)
+    kernel = np.ones((k, k), np.uint8)
+    morphed = cv2.morphologyEx(image, op, kernel, iterations=iterations)
+
+    op_name = next(name for name, val in MORPH_OPERATIONS if val == op)
+    code = f"kernel = np.ones(({k}, {k}), np.uint8)\n"
+    code += f"morphed = cv2.morphologyEx(image, cv2.MORPH_{op_name.upper()}, kernel, iterations={iterations})\n"
+    return morphed, code
+
+
+# ============================================================================
+# INTENSITY TRANSFORMATIONS
+# ============================================================================
+
+def linear_contrast_lut(alpha, beta):
+    """256-entry lookup table equivalent to cv2.convertScaleAbs(image, alpha, beta) on uint8."""
+    return cv2.convertScaleAbs(np.arange(256, dtype=np.uint8), alpha=alpha, beta=beta).reshape(256)
+
+
+def linear_contrast(image, alpha, beta):
+    """Linear contrast/brightness adjustment: saturate(|alpha * image + beta|)."""
+    # On its own this stays convertScaleAbs, whose SIMD path beats cv2.LUT;
+    # the table is for composing it with other point operations.
+    enhanced = cv2.convertScaleAbs(image, alpha=alpha, beta=beta)
+    code = "# Linear contrast enhancement\n"
+    code += f"enhanced = cv2.convertScaleAbs(image, alpha={alpha:.2f}, beta={beta})\n"
+    return enhanced, code
+
+
+def clahe(image, clip_limit, tile_grid_size=(8, 8)):
+    """CLAHE on grayscale images, or on the L channel of LAB for color images."""
+    clahe_op = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
+    if len(image.shape) == 2:
+        enhanced = clahe_op.apply(image)
+        code = "# CLAHE enhancement\n"
+        code += f"clahe = cv2.createCLAHE(clipLimit={clip_limit:.2f}, tileGridSize={tile_grid_size})\n"
+        code += "enhanced = clahe.apply(image)\n"
+        return enhanced, code
+
+    lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
+    l, a, b = cv2.split(lab)
+    l = clahe_op.apply(l)
+    enhanced = cv2.merge([l, a, b])
+    enhanced = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
+    code = "# CLAHE enhancement on LAB color space\n"
+    code += "lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)\n"
+    code += "l, a, b = cv2.split(lab)\n"
+    code += f"clahe = cv2.createCLAHE(clipLimit={clip_limit:.2f}, tileGridSize={tile_grid_size})\n"
+    code += "l = clahe.apply(l)\n"
+    code += "enhanced = cv2.merge([l, a, b])\n"
+    code += "enhanced = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)\n"
+    return enhanced, code
+
+
+# The point transforms below map uint8 to uint8, so for uint8 images they are
+# computed once per possible value and applied with cv2.LUT. Building the
+# table with the same float32 arithmetic as the direct formula keeps the
+# output identical to it (benchmarks/point_ops.py checks every value).
+
+# The float formulas behind the log and power-law transforms. They build the
+# uint8 lookup tables and handle other depths directly, band by band on a
+# thread pool with one band-sized float32 buffer, computing exactly
+#     np.clip(c * f(values.astype(np.float32) / 255.0) * 255, 0, 255).astype(np.uint8)
+
+def _log_band(values, out, c):
+    buf = values.astype(np.float32)
+    np.divide(buf, 255.0, out=buf)
+    np.log1p(buf, out=buf)
+    np.multiply(buf, c, out=buf)
+    np.multiply(buf, 255, out=buf)
+    np.clip(buf, 0, 255, out=buf)
+    np.copyto(out, buf, casting="unsafe")
+
+
+def _power_band(values, out, gamma, c):
+    buf = values.astype(np.float32)
+    np.divide(buf, 255.0, out=buf)
+    np.power(buf, gamma, out=buf)
+    np.multiply(buf, c, out=buf)
+    np.multiply(buf, 255, out=buf)
+    np.clip(buf, 0, 255, out=buf)
+    np.copyto(out, buf, casting="unsafe")
+
+
+def _log_values(values, c, workers=None):
+    out = np.empty(values.shape, dtype=np.uint8)
+    return run_bands(lambda band, out_band: _log_band(band, out_band, c), values, out, workers)
+
+
+def _power_values(values, gamma, c, workers=None):
+    out = np.empty(values.shape, dtype=np.uint8)
+    return run_bands(lambda band, out_band: _power_band(band, out_band, gamma, c), values, out, workers)
+
+
+def log_lut(c):
+    """256-entry lookup table for log_transform."""
+    return _log_values(np.arange(256, dtype=np.uint8), c)
+
+
+def power_lut(gamma, c=1.0):
+    """256-entry lookup table for power_transform."""
+    return _power_values(np.arange(256, dtype=np.uint8), gamma, c)
+
+
+def log_transform(image, c):
+    """Log transform: s = c * log(1 + r) on intensities normalized to [0, 1]."""
+    if image.dtype == np.uint8:
+        log_img = cv2.LUT(image, log_lut(c))
+    else:
+        log_img = _log_values(image, c)
+
+    code = "# Log transformation (lookup table over all 256 intensities)\n"
+    code += "import numpy as np\n"
+    code += f"c = {c:.2f}\n"
+    code += "normalized = np.arange(256, dtype=np.float32) / 255.0\n"
+    code += "lut = np.clip(c * np.log1p(normalized) * 255, 0, 255).astype(np.uint8)\n"
+    code += "result = cv2.LUT(image, lut)\n"
+    return log_img, code
+
+
+def power_transform(image, gamma, c=1.0):
+    """Power-law (gamma) transform: s = c * r^gamma on normalized intensities."""
+    if image.dtype == np.uint8:
+        power_img = cv2.LUT(image, power_lut(gamma, c))
+    else:
+        power_img = _power_values(image, gamma, c)
+
+    code = "# Power-law (gamma) transformation (lookup table over all 256 intensities)\n"
+    code += "import numpy as np\n"
+    code += f"gamma = {gamma:.2f}\n"
+    code += f"c = {c:.2f}\n"
+    code += "normalized = np.arange(256, dtype=np.float32) / 255.0\n"
+    code += "lut = np.clip(c * np.power(normalized, gamma) * 255, 0, 255).astype(np.uint8)\n"
+    code += "result = cv2.LUT(image, lut)\n"
+    return power_img, code
+
+
+def histogram(image):
+    """Return the image unchanged together with code that plots its histogram."""
+    if len(image.shape) == 2:
+        code = "# Calculate histogram for grayscale image\n"
+        code += "hist = cv2.calcHist([image], [0], None, [256], [0, 256])\n"
+        code += "# Visualize histogram (requires matplotlib)\n"
+        code += "import matplotlib.pyplot as plt\n"
+        code += "plt.plot(hist)\n"
+        code += "plt.title('Grayscale Histogram')\n"
+        code += "plt.xlabel('Pixel Value')\n"
+        code += "plt.ylabel('Frequency')\n"
+        code += "plt.show()\n"
+    else:
+        code = "# Calculate histogram for color image (BGR)\n"
+        code += "colors = ('b', 'g', 'r')\n"
+        code += "for i, color in enumerate(colors):\n"
+        code += "    hist = cv2.calcHist([image], [i], None, [256], [0, 256])\n"
+        code += "    plt.plot(hist, color=color)\n"
+        code += "plt.title('Color Histogram')\n"
+        code += "plt.xlabel('Pixel Value')\n"
+        code += "plt.ylabel('Frequency')\n"
+        code += "plt.legend(['Blue', 'Green', 'Red'])\n"
+        code += "plt.show()\n"
+    return image.copy(), code
+
+
+ChannelStats = namedtuple("ChannelStats", "mean std min max")
+
+# Pixel budget of sampled_statistics (about 480x270)
+SAMPLE_PIXELS = 1 << 17
+
+
+def channel_histograms(image):
+    """256-bin histogram of every channel as a float64 array of shape (channels, 256)."""
+    channels = 1 if image.ndim == 2 else image.shape[2]
+    return np.stack([cv2.calcHist([image], [i], None, [256], [0, 256]).ravel() for i in range(channels)]
+                    ).astype(np.float64)
+
+
+def histogram_stats(hist):
+    """
+    Mean, standard deviation, min and max of a uint8 channel from its histogram.
+
+    Needs only the 256 counts, so the image itself is not read again.
+    The standard deviation is the population one, as np.std computes.
+    """
+    values = np.arange(256, dtype=np.float64)
+    total = hist.sum()
+    if total == 0:
+        return ChannelStats(0.0, 0.0, 0, 0)
+    mean = hist @ values / total
+    variance = max(hist @ (values - mean) ** 2 / total, 0.0)
+    occupied = np.flatnonzero(hist)
+    return ChannelStats(mean, variance ** 0.5, int(occupied[0]), int(occupied[-1]))
+
+
+def image_statistics(image):
+    """
+    Per-channel histograms and statistics.
+
+    For uint8 images every statistic is derived from the histograms, which
+    costs one pass over each channel. Other depths fall back to
+    cv2.meanStdDev and cv2.minMaxLoc.
+
+    Returns:
+        tuple: (histograms of shape (channels, 256), list of ChannelStats)
+    """
+    hists = channel_histograms(image)
+    if image.dtype == np.uint8:
+        return hists, [histogram_stats(h) for h in hists]
+
+    mean, std = cv2.meanStdDev(image)
+    channels = cv2.split(image) if image.ndim == 3 else [image]
+    stats = []
+    for i, channel in enumerate(channels):
+        min_val, max_val, _, _ = cv2.minMaxLoc(channel)
+        stats.append(ChannelStats(float(mean[i, 0]), float(std[i, 0]), min_val, max_val))
+    return hists, stats
+
+
+def sampled_statistics(image, max_pixels=SAMPLE_PIXELS):
+    """
+    image_statistics on a regular subsample of at most about `max_pixels` pixels.
+
+    Every step-th row and column is used, so the cost is bounded whatever
+    the resolution; min and max may miss isolated extreme pixels. Results
+    are cached per image in STATS_CACHE, so redrawing the same image (zoom,
+    undo back to a recent state) costs nothing.
+
+    Returns:
+        tuple: (histograms, list of ChannelStats, step)
+    """
+    h, w = image.shape[:2]
+    step = max(1, int(np.ceil(np.sqrt(h * w / max_pixels))))
+
+    def compute():
+        hists, stats = image_statistics(image[::step, ::step])
+        return hists, stats, step
+
+    return STATS_CACHE.get((image,), ("statistics", step), compute)
+
+
+# ============================================================================
+# ADVANCED PROCESSING
+# ============================================================================
+
+class FeatureCache:
+    """
+    Small LRU cache for per-image feature work, keyed by image identity.
+
+    Entries are keyed by the ``id()`` of the input arrays plus a parameter
+    tuple, and hold weak references to the arrays so a recycled id is never
+    mistaken for the same image; an entry is dropped as soon as one of its
+    images is garbage collected. Arrays are assumed not to be modified in
+    place while cached, which holds for everything in this package (every
+    operation returns a new image). Safe to use from worker threads.
+    """
+
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, images, params, compute):
+        """Return the cached value for (images, params), calling `compute()` on a miss."""
+        key = (tuple(id(img) for img in images), params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and all(ref() is img for ref, img in zip(entry[0], images)):
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        value = compute()
+        refs = [weakref.ref(img, lambda _, key=key: self._discard(key)) for img in images]
+        with self._lock:
+            self._entries[key] = (refs, value)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+# Keypoints/descriptors and kNN matches shared by all registration calls
+FEATURE_CACHE = FeatureCache()
+
+# Sampled histograms and statistics of the images shown in the main window
+STATS_CACHE = FeatureCache(maxsize=32)
+
+# Detector settings per method; part of the feature cache key
+DETECTOR_PARAMS = {
+    "orb": (("nfeatures", 5000),),
+    "sift": (),
+}
+
+
+def detect_features(image, method="orb"):
+    """
+    Detect keypoints and compute descriptors, cached per image and detector.
+
+    Returns:
+        tuple: (points, descriptors) with points as an (N, 2) float32 array
+    """
+    params = DETECTOR_PARAMS[method]
+
+    def compute():
+        gray, _ = to_gray(image)
+        if method == "orb":
+            detector = cv2.ORB_create(**dict(params))
+        else:  # SIFT
+            detector = cv2.SIFT_create(**dict(params))
+        keypoints, descriptors = detector.detectAndCompute(gray, None)
+        points = np.float32([kp.pt for kp in keypoints]).reshape(-1, 2)
+        return points, descriptors
+
+    return FEATURE_CACHE.get((image,), ("features", method, params), compute)
+
+
+# 2-NN match set as parallel arrays: indices into the moving image's and the
+# reference's keypoints, and the distances to the first and second neighbour
+KnnMatches = namedtuple("KnnMatches", ["query_idx", "train_idx", "best", "second"])
+
+
+def knn_arrays(pairs):
+    """Convert knnMatch output (lists of cv2.DMatch) into KnnMatches arrays."""
+    pairs = [p for p in pairs if len(p) == 2]
+    return KnnMatches(
+        np.array([m.queryIdx for m, _ in pairs], dtype=np.intp),
+        np.array([m.trainIdx for m, _ in pairs], dtype=np.intp),
+        np.array([m.distance for m, _ in pairs], dtype=np.float64),
+        np.array([n.distance for _, n in pairs], dtype=np.float64),
+    )
+
+
+# Descriptor matcher backends offered for registration
+MATCHERS = [
+    ("Brute Force", "bf"),
+    ("FLANN", "flann"),
+]
+
+FLANN_INDEX_KDTREE = 1
+FLANN_INDEX_LSH = 6
+
+
+def create_matcher(method="orb", matcher="bf", checks=50, trees=5):
+    """
+    Descriptor matcher for a detector.
+
+    "bf" is exact brute force (Hamming for ORB, L2 for SIFT). "flann" is
+    approximate: randomized KD-trees for SIFT, locality sensitive hashing
+    for ORB's binary descriptors. `trees` is the number of KD-trees or hash
+    tables and `checks` the number of leaves visited per query; raising
+    either trades speed for recall.
+    """
+    if matcher == "bf":
+        norm = cv2.NORM_HAMMING if method == "orb" else cv2.NORM_L2
+        return cv2.BFMatcher(norm, crossCheck=False)
+    if method == "orb":
+        index_params = dict(algorithm=FLANN_INDEX_LSH, table_number=trees, key_size=12, multi_probe_level=1)
+    else:
+        index_params = dict(algorithm=FLANN_INDEX_KDTREE, trees=trees)
+    return cv2.FlannBasedMatcher(index_params, dict(checks=checks))
+
+
+def knn_matches(reference, image, method="orb", matcher="bf", checks=50, trees=5):
+    """
+    Two nearest reference descriptors for every descriptor of `image`, cached.
+
+    The DMatch objects are converted to arrays once, here, so the ratio test
+    and point gathering in find_homography are plain masked array operations.
+    Queries for which the matcher found fewer than two neighbours (possible
+    with LSH) are dropped.
+
+    Returns:
+        KnnMatches: query_idx into image, train_idx into reference, distances
+    """
+    params = DETECTOR_PARAMS[method]
+    matcher_params = (matcher,) if matcher == "bf" else (matcher, checks, trees)
+
+    def compute():
+        _, des1 = detect_features(reference, method)
+        _, des2 = detect_features(image, method)
+        if des1 is None or des2 is None or len(des1) < 2:
+            return knn_arrays([])
+        knn = create_matcher(method, matcher, checks, trees)
+        return knn_arrays(knn.knnMatch(des2, des1, k=2))
+
+    return FEATURE_CACHE.get((reference, image), ("knn", method, params, matcher_params), compute)
+
+
+def ratio_test(matches, ratio):
+    """Boolean mask of the matches passing Lowe's ratio test."""
+    return matches.best < ratio * matches.second
+
+
+def find_homography(reference, image, method="orb", ratio=0.75, matcher="bf", checks=50, trees=5):
+    """
+    Estimate the homography that maps `image` onto `reference`.
+
+    Features and kNN matches come from FEATURE_CACHE, so calling this again
+    on the same arrays with a different `ratio` only re-runs the ratio test
+    and RANSAC.
+
+    Args:
+        reference: Reference (fixed) BGR image
+        image: Moving BGR image
+        method: "orb" or "sift"
+        ratio: Lowe ratio-test threshold
+        matcher: "bf" or "flann", see create_matcher
+        checks: FLANN leaves visited per query
+        trees: FLANN KD-trees (SIFT) or LSH tables (ORB)
+
+    Returns:
+        tuple: (H, good_match_count)
+
+    Raises:
+        ValueError: If there are too few matches or no homography is found
+    """
+    pts1, _ = detect_features(reference, method)
+    pts2, _ = detect_features(image, method)
+    matches = knn_matches(reference, image, method, matcher, checks, trees)
+
+    # Apply ratio test
+    good = ratio_test(matches, ratio)
+    good_count = int(np.count_nonzero(good))
+    if good_count < 4:
+        raise ValueError("Not enough matches found")
+
+    src_pts = pts2[matches.query_idx[good]].reshape(-1, 1, 2)
+    dst_pts = pts1[matches.train_idx[good]].reshape(-1, 1, 2)
+
+    H, mask = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, 5.0)
+    if H is None:
+        raise ValueError("Failed to compute homography")
+    return H, good_count
+
+
+def _scaled_gray(image, factor):
+    """Grayscale copy of `image` scaled by `factor`, cached so its features are cached too."""
+    def compute():
+        gray, _ = to_gray(image)
+        if factor >= 1.0:
+            return gray
+        h, w = gray.shape[:2]
+        size = (max(1, round(w * factor)), max(1, round(h * factor)))
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+    return FEATURE_CACHE.get((image,), ("scaled_gray", factor), compute)
+
+
+def _scale_homography(H, ref_factor, moving_factor):
+    """Express a homography between scaled images in the other images' pixels."""
+    S_ref = np.diag([ref_factor, ref_factor, 1.0])
+    S_mov = np.diag([moving_factor, moving_factor, 1.0])
+    return S_ref @ H @ np.linalg.inv(S_mov)
+
+
+def _refine_homography(reference, image, H, anchors, window=15, search=8, min_score=0.7):
+    """
+    Re-estimate H from local template matches around predicted positions.
+
+    For every anchor (a point in `reference`), the moving image is warped by
+    the current H into a small search window around the anchor, and the
+    reference patch at the anchor is located in it by normalized
+    cross-correlation. The offset found turns the anchor into a corrected
+    correspondence; RANSAC over all of them gives the refined homography.
+    Returns None if too few anchors could be matched.
+    """
+    ref_gray, _ = to_gray(reference)
+    mov_gray, _ = to_gray(image)
+    h, w = ref_gray.shape[:2]
+    r, rs = window, window + search
+    size = 2 * rs + 1
+    H_inv = np.linalg.inv(H)
+
+    src, dst = [], []
+    for x, y in np.round(anchors).astype(int):
+        if x < rs or y < rs or x >= w - rs or y >= h - rs:
+            continue
+        template = ref_gray[y - r:y + r + 1, x - r:x + r + 1]
+        if template.std() < 2.0:  # flat patch, no texture to lock on to
+            continue
+
+        # Moving image resampled onto the reference grid around the anchor
+        shift = np.array([[1, 0, rs - x], [0, 1, rs - y], [0, 0, 1]], dtype=np.float64)
+        patch = cv2.warpPerspective(mov_gray, shift @ H, (size, size), flags=cv2.INTER_LINEAR,
+                                    borderMode=cv2.BORDER_REPLICATE)
+        scores = cv2.matchTemplate(patch, template, cv2.TM_CCOEFF_NORMED)
+        _, best, _, (px, py) = cv2.minMaxLoc(scores)
+        if best < min_score or not (0 < px < 2 * search and 0 < py < 2 * search):
+            continue
+
+        # Parabolic sub-pixel peak
+        dx, dy = float(px - search), float(py - search)
+        left, mid, right = scores[py, px - 1], scores[py, px], scores[py, px + 1]
+        up, down = scores[py - 1, px], scores[py + 1, px]
+        den_x, den_y = left - 2 * mid + right, up - 2 * mid + down
+        if den_x < 0:
+            dx += 0.5 * (left - right) / den_x
+        if den_y < 0:
+            dy += 0.5 * (up - down) / den_y
+
+        # Reference content at (x, y) shows up at (x + dx, y + dy) in the warped image
+        mx, my, mw = H_inv @ (x + dx, y + dy, 1.0)
+        src.append((mx / mw, my / mw))
+        dst.append((x, y))
+
+    if len(src) < 8:
+        return None
+    src = np.float32(src).reshape(-1, 1, 2)
+    dst = np.float32(dst).reshape(-1, 1, 2)
+    H_new, _ = cv2.findHomography(src, dst, cv2.RANSAC, 2.0)
+    return H_new
+
+
+def find_homography_pyramid(reference, image, method="orb", ratio=0.75, matcher="bf", checks=50, trees=5,
+                            coarse_size=1024, max_anchors=300):
+    """
+    Coarse-to-fine homography for large images.
+
+    Features are detected and matched only on copies whose long side is
+    `coarse_size`. The estimate is then refined at each finer octave, up to
+    full resolution, by template matching small windows around the
+    positions predicted for the coarse inliers (see _refine_homography), so
+    full-resolution work is limited to a few hundred small patches.
+    Falls back to the coarse estimate if a refinement level fails.
+
+    Returns:
+        tuple: (H, good_match_count) like find_homography
+    """
+    ref_f = min(1.0, coarse_size / max(reference.shape[:2]))
+    mov_f = min(1.0, coarse_size / max(image.shape[:2]))
+    if min(ref_f, mov_f) > 0.5:  # not even one octave to gain
+        return find_homography(reference, image, method, ratio, matcher, checks, trees)
+
+    ref_small, mov_small = _scaled_gray(reference, ref_f), _scaled_gray(image, mov_f)
+    H_small, good_count = find_homography(ref_small, mov_small, method, ratio, matcher, checks, trees)
+
+    # Anchors: reference positions of the coarse matches that agree with H
+    pts1, _ = detect_features(ref_small, method)
+    pts2, _ = detect_features(mov_small, method)
+    matches = knn_matches(ref_small, mov_small, method, matcher, checks, trees)
+    good = ratio_test(matches, ratio)
+    ref_pts = pts1[matches.train_idx[good]]
+    projected = cv2.perspectiveTransform(pts2[matches.query_idx[good]].reshape(-1, 1, 2), H_small).reshape(-1, 2)
+    inliers = np.linalg.norm(projected - ref_pts, axis=1) < 3.0
+    anchors = ref_pts[inliers][:max_anchors] / ref_f
+
+    # Octaves from just above the coarse scale up to full resolution
+    H = _scale_homography(H_small, 1.0 / ref_f, 1.0 / mov_f)
+    level = min(ref_f, mov_f) * 2
+    levels = []
+    while level < 1.0:
+        levels.append(level)
+        level *= 2
+    levels.append(1.0)
+
+    for level in levels:
+        ref_level, mov_level = _scaled_gray(reference, level), _scaled_gray(image, level)
+        H_level = _scale_homography(H, level, level)
+        refined = _refine_homography(ref_level, mov_level, H_level, anchors * level)
+        if refined is None:
+            break
+        H = _scale_homography(refined, 1.0 / level, 1.0 / level)
+
+    return H, good_count
+
+
+def registration_code(method, ratio, matcher="bf", checks=50, trees=5, pyramid=False):
+    """Code snippet reproducing a feature-based registration."""
+    code = f"# Image registration using {method.upper()}\n"
+    code += "import numpy as np\n"
+    code += "ref_gray = cv2.cvtColor(reference, cv2.COLOR_BGR2GRAY)\n"
+    code += "moving_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)\n\n"
+
+    if pyramid:
+        code += "# Match on copies at most 1024 px long; the app also refines H by\n"
+        code += "# template matching at each finer octave\n"
+        code += "s_ref = min(1.0, 1024 / max(ref_gray.shape))\n"
+        code += "s_mov = min(1.0, 1024 / max(moving_gray.shape))\n"
+        code += "ref_gray = cv2.resize(ref_gray, None, fx=s_ref, fy=s_ref, interpolation=cv2.INTER_AREA)\n"
+        code += "moving_gray = cv2.resize(moving_gray, None, fx=s_mov, fy=s_mov, interpolation=cv2.INTER_AREA)\n\n"
+
+    if method == "orb":
+        code += "detector = cv2.ORB_create(nfeatures=5000)\n"
+    else:
+        code += "detector = cv2.SIFT_create()\n"
+
+    if matcher == "bf":
+        norm = "NORM_HAMMING" if method == "orb" else "NORM_L2"
+        code += f"matcher = cv2.BFMatcher(cv2.{norm}, crossCheck=False)\n"
+    elif method == "orb":
+        code += f"index_params = dict(algorithm={FLANN_INDEX_LSH}, table_number={trees}, key_size=12, multi_probe_level=1)\n"
+        code += f"matcher = cv2.FlannBasedMatcher(index_params, dict(checks={checks}))\n"
+    else:
+        code += f"index_params = dict(algorithm={FLANN_INDEX_KDTREE}, trees={trees})\n"
+        code += f"matcher = cv2.FlannBasedMatcher(index_params, dict(checks={checks}))\n"
+
+    code += "kp1, des1 = detector.detectAndCompute(ref_gray, None)\n"
+    code += "kp2, des2 = detector.detectAndCompute(moving_gray, None)\n"
+    code += "matches = matcher.knnMatch(des2, des1, k=2)\n\n"
+    code += f"good_matches = [p[0] for p in matches if len(p) == 2 and p[0].distance < {ratio:.2f} * p[1].distance]\n"
+    code += "src_pts = np.float32([kp2[m.queryIdx].pt for m in good_matches]).reshape(-1, 1, 2)\n"
+    code += "dst_pts = np.float32([kp1[m.trainIdx].pt for m in good_matches]).reshape(-1, 1, 2)\n"
+    code += "H, mask = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, 5.0)\n"
+    if pyramid:
+        code += "H = np.diag([1 / s_ref, 1 / s_ref, 1]) @ H @ np.diag([s_mov, s_mov, 1])\n"
+    code += "h, w = reference.shape[:2]\n"
+    code += "registered = cv2.warpPerspective(image, H, (w, h))\n"
+    return code
+
+
+def register(image, reference, method="orb", ratio=0.75, matcher="bf", checks=50, trees=5, pyramid=False):
+    """
+    Align `image` to `reference` using feature matching and a homography.
+
+    With `pyramid`, features are matched on downsampled copies and the
+    homography is refined coarse-to-fine (see find_homography_pyramid).
+    """
+    estimate = find_homography_pyramid if pyramid else find_homography
+    H, _ = estimate(reference, image, method, ratio, matcher, checks, trees)
+    h, w = reference.shape[:2]
+    registered = cv2.warpPerspective(image, H, (w, h))
+    return registered, registration_code(method, ratio, matcher, checks, trees, pyramid)
+
+
+def stitch(images, mode="panorama", progress=None, registration_mp=DEFAULT_REGISTRATION_MP,
+           seam_mp=DEFAULT_SEAM_MP, compositing_mp=DEFAULT_COMPOSITING_MP, neighbors=0, loop_closure=False,
+           stitcher=None):
+    """
+    Stitch overlapping images into a single panorama.
+
+    Args:
+        images: List of BGR images
+        mode: "panorama" or "scans"
+        progress: Optional callable(fraction, message), called as the
+            stitching stages advance
+        registration_mp: Megapixels per image for feature matching
+        seam_mp: Megapixels per image for seam estimation
+        compositing_mp: Megapixels per image for the result; <= 0 for original
+        neighbors: For ordered images, match each only with the next
+            `neighbors` ones; 0 matches every pair
+        loop_closure: Also match the end of the sequence with its start
+        stitcher: Optional StitchPipeline over the same images, whose cached
+            stages are reused; a new one is used otherwise
+
+    Raises:
+        ValueError: If the images cannot be stitched
+    """
+    if stitcher is None:
+        stitcher = StitchPipeline(images)
+    panorama = stitcher.stitch(mode, registration_mp, seam_mp, compositing_mp, neighbors, loop_closure, progress)
+
+    mode_name = "PANORAMA" if mode == "panorama" else "SCANS"
+    code = "# Image stitching\n"
+    code += f"stitcher = cv2.Stitcher_create(cv2.Stitcher_{mode_name})\n"
+    code += f"stitcher.setRegistrationResol({registration_mp})\n"
+    code += f"stitcher.setSeamEstimationResol({seam_mp})\n"
+    code += f"stitcher.setCompositingResol({compositing_mp})\n"
+    if neighbors > 0:
+        closure = " plus loop closure" if loop_closure else ""
+        code += f"# Matched only the {neighbors} next images in sequence{closure}; cv2.Stitcher\n"
+        code += "# matches all pairs, use cv2.detail.BestOf2NearestRangeMatcher for the same\n"
+    code += "# images = [image1, image2, ...] # List of images to stitch\n"
+    code += "status, panorama = stitcher.stitch(images)\n"
+    code += "if status == cv2.Stitcher_OK:\n"
+    code += "    result = panorama\n"
+    return panorama, code
+
+
+# ============================================================================
+# DRAWING
+# ============================================================================
+
+def line(image, pt1, pt2, color, thickness):
+    """Draw a line; color is a BGR tuple."""
+    new_img = image.copy()
+    cv2.line(new_img, pt1, pt2, color, thickness)
+    return new_img, f"cv2.line(image, pt1={pt1}, pt2={pt2}, color={color}, thickness={thickness})\n"
+
+
+def rectangle(image, pt1, pt2, color, thickness, filled=False):
+    """Draw a rectangle outline, or a filled rectangle when `filled` is set."""
+    new_img = image.copy()
+    thick = -1 if filled else thickness
+    cv2.rectangle(new_img, pt1, pt2, color, thick)
+    fill_text = "filled " if filled else ""
+    return new_img, f"cv2.rectangle(image, pt1={pt1}, pt2={pt2}, color={color}, thickness={thick})  # {fill_text}rectangle\n"
+
+
+def circle(image, center, radius, color, thickness, filled=False):
+    """Draw a circle outline, or a filled disc when `filled` is set."""
+    new_img = image.copy()
+    thick = -1 if filled else thickness
+    cv2.circle(new_img, center, radius, color, thick)
+    fill_text = "filled " if filled else ""
+    return new_img, f"cv2.circle(image, center={center}, radius={radius}, color={color}, thickness={thick})  # {fill_text}circle\n"
+
+
+def put_text(image, text, org, font_face, font_scale, color, thickness):
+    """Render anti-aliased text with one of the Hershey fonts in FONTS."""
+    new_img = image.copy()
+    cv2.putText(new_img, text, org, font_face, font_scale, color, thickness, cv2.LINE_AA)
+    font_name = next(name for name, val in FONTS if val == font_face)
+    code = f'cv2.putText(image, "{text}", {org}, cv2.FONT_HERSHEY_{font_name.upper().replace(" ", "_")}, fontScale={font_scale}, color={color}, thickness={thickness}, lineType=cv2.LINE_AA)  # Text: {text}\n'
+    return new_img, code
@@ -0,0 +1,329 @@
+"""
+Pipeline Replay
+
+A pipeline is an ordered list of steps, each naming an operation from
+`processors.ops` plus its keyword parameters. Pipelines are stored as JSON:
+
+    {
+        "version": 1,
+        "steps": [
+            {"op": "gray", "params": {}},
+            {"op": "gaussian_blur", "params": {"ksize": 5}}
+        ]
+    }
+
+A bare list of steps is accepted as well. Recipes saved from the GUI also
+carry the "source" image path, and may be written as YAML when PyYAML is
+installed (by giving the file a .yaml/.yml extension).
+
+Neighbourhood operations on very large images run tile by tile (see
+tiles.py). When replaying, consecutive point operations (negative,
+contrast, log, gamma, fixed-level threshold) on uint8 images are composed
+into a single 256-entry lookup table, so a run of them touches the image
+only once.
+"""
+
+import json
+import os
+
+import cv2
+import numpy as np
+
+from . import ops, tiles
+from .backing_store import BACKING_STORE, is_mapped
+from .loader import LOADER
+
+try:
+    import yaml
+except ImportError:  # YAML recipes are optional
+    yaml = None
+
+
+PIPELINE_VERSION = 1
+
+
+def _register_from_path(image, reference, method="orb", ratio=0.75, matcher="bf", checks=50, trees=5,
+                        pyramid=False):
+    """Registration step whose reference image is given as a file path."""
+    ref_img = cv2.imread(reference)
+    if ref_img is None:
+        raise ValueError(f"Failed to load reference image: {reference}")
+    return ops.register(image, ref_img, method, ratio, matcher, checks, trees, pyramid)
+
+
+def _stitch_from_paths(image, images, mode="panorama", registration_mp=ops.DEFAULT_REGISTRATION_MP,
+                       seam_mp=ops.DEFAULT_SEAM_MP, compositing_mp=ops.DEFAULT_COMPOSITING_MP, neighbors=0,
+                       loop_closure=False):
+    """Stitching step: the current image followed by the images at `images`."""
+    loaded = [image]
+    for path, img in zip(images, LOADER.load_all(images)):
+        if img is None:
+            raise ValueError(f"Failed to load image: {path}")
+        loaded.append(img)
+    return ops.stitch(loaded, mode, registration_mp=registration_mp, seam_mp=seam_mp,
+                      compositing_mp=compositing_mp, neighbors=neighbors, loop_closure=loop_closure)
+
+
+# Operation id -> callable(image, **params) returning (image, code)
+OPERATIONS = {
+    "negative": ops.negative,
+    "hsv": ops.hsv,
+    "gray": ops.gray,
+    "rotate_90": ops.rotate_90,
+    "flip": ops.flip,
+    "resize": ops.resize,
+    "translate": ops.translate,
+    "rotate": ops.rotate,
+    "perspective": ops.perspective,
+    "equalize": ops.equalize,
+    "gaussian_blur": ops.gaussian_blur,
+    "median_blur": ops.median_blur,
+    "canny": ops.canny,
+    "threshold": ops.threshold,
+    "adaptive_threshold": ops.adaptive_threshold,
+    "morphology": ops.morphology,
+    "linear_contrast": ops.linear_contrast,
+    "clahe": ops.clahe,
+    "log_transform": ops.log_transform,
+    "power_transform": ops.power_transform,
+    "histogram": ops.histogram,
+    "register": _register_from_path,
+    "stitch": _stitch_from_paths,
+    "line": ops.line,
+    "rectangle": ops.rectangle,
+    "circle": ops.circle,
+    "put_text": ops.put_text,
+}
+
+
+# Operations that leave a color image in another channel layout
+COLOR_SPACES = {"hsv": "HSV"}
+
+
+# Operations mapping each uint8 value to another regardless of where it is in
+# the image; runs of them are fused into one lookup table by run_pipeline.
+# Thresholds computed from the image itself (Otsu, triangle) are excluded.
+POINT_OPS = {"negative", "linear_contrast", "log_transform", "power_transform", "threshold"}
+_AUTO_THRESHOLD = cv2.THRESH_OTSU | cv2.THRESH_TRIANGLE
+
+
+def _as_call_params(params):
+    """JSON has no tuples; turn list parameters (points, colors) back into tuples."""
+    return {k: tuple(v) if isinstance(v, list) else v for k, v in params.items()}
+
+
+class StepResult(tuple):
+    """
+    An ``(image, code)`` pair that also remembers the step that produced it.
+
+    Unpacks exactly like the tuples the dialogs have always returned, so
+    callers that only care about the image and code are unaffected.
+    """
+
+    def __new__(cls, image, code, step):
+        obj = super().__new__(cls, (image, code))
+        obj.step = step
+        return obj
+
+
+def _is_yaml(path):
+    return os.path.splitext(path)[1].lower() in (".yaml", ".yml")
+
+
+def _read_document(path):
+    with open(path, "r", encoding="utf-8") as f:
+        if _is_yaml(path):
+            if yaml is None:
+                raise ValueError("PyYAML is required to read YAML recipes (pip install pyyaml)")
+            try:
+                return yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise ValueError(f"Malformed YAML in {path}: {e}") from e
+        return json.load(f)
+
+
+def _validate_steps(steps):
+    if not isinstance(steps, list):
+        raise ValueError("Pipeline must contain a list of steps")
+    for step in steps:
+        if not isinstance(step, dict):
+            raise ValueError(f"Pipeline step must be a mapping with 'op' and 'params': {step!r}")
+        if step.get("op") not in OPERATIONS:
+            raise ValueError(f"Unknown operation in pipeline: {step.get('op')!r}")
+        step.setdefault("params", {})
+        if not isinstance(step["params"], dict):
+            raise ValueError(f"Parameters of {step['op']!r} must be a mapping, not {step['params']!r}")
+    return steps
+
+
+def load_pipeline(path):
+    """
+    Load pipeline steps from a JSON or YAML file.
+
+    Args:
+        path: Path to the pipeline file
+
+    Returns:
+        list: Steps as dicts with "op" and "params" keys
+
+    Raises:
+        ValueError: If the file is malformed or names an unknown operation
+    """
+    return Recipe.load(path).steps
+
+
+def apply_step(image, step):
+    """
+    Apply a single pipeline step and return a StepResult.
+
+    Local operations on images of tiles.TILED_MIN_PIXELS or more, or kept
+    in a memory map, run tile by tile with the same result. For mapped
+    images the result is mapped too, so neither has to fit in RAM.
+    """
+    func = OPERATIONS[step["op"]]
+    params = _as_call_params(step.get("params", {}))
+    halo = tiles.HALOS[step["op"]](**params) if step["op"] in tiles.HALOS else None
+    mapped = is_mapped(image)
+    if halo is not None and (mapped or image.shape[0] * image.shape[1] >= tiles.TILED_MIN_PIXELS):
+        allocate = BACKING_STORE.scratch if mapped else np.empty
+        result, code = tiles.run_tiled(func, image, halo, allocate=allocate, **params)
+    else:
+        result, code = func(image, **params)
+    return StepResult(result, code, step)
+
+
+def run_op(op, image, /, **params):
+    """
+    Run an operation by id, recording it as a step on the returned StepResult.
+
+    `op` and `image` are positional-only, so operations may have parameters
+    with those names (morphology takes `op`).
+    """
+    return apply_step(image, {"op": op, "params": params})
+
+
+def point_lut(step, image):
+    """
+    Lookup table equivalent to `step` on `image`, or None if it is not a point operation.
+
+    The table is obtained by running the operation itself on a ramp of all
+    256 values with the image's channel count, so it matches the operation
+    exactly, code snippet included.
+
+    Returns:
+        tuple: (table, code, to_gray) where to_gray is True if the
+        operation converts `image` to grayscale before mapping values
+    """
+    params = _as_call_params(step.get("params", {}))
+    if step["op"] not in POINT_OPS or image.dtype != np.uint8:
+        return None
+    if step["op"] == "threshold" and params.get("thresh_type", 0) & _AUTO_THRESHOLD:
+        return None
+
+    ramp = np.arange(256, dtype=np.uint8).reshape(1, 256)
+    if image.ndim == 3:
+        ramp = cv2.merge([ramp] * image.shape[2])
+    mapped, code = OPERATIONS[step["op"]](ramp, **params)
+    to_gray = mapped.ndim < ramp.ndim
+    table = mapped[..., 0] if mapped.ndim == 3 else mapped
+    return np.ascontiguousarray(table.reshape(256)), code, to_gray
+
+
+def _lut(image, table):
+    return cv2.LUT(image, table), ""
+
+
+def _per_pixel(func, image, **params):
+    """`func(image, **params)`, tile by tile into a scratch map if `image` is mapped, so it stays out of RAM."""
+    if is_mapped(image):
+        return tiles.run_tiled(func, image, 0, allocate=BACKING_STORE.scratch, **params)
+    return func(image, **params)
+
+
+def run_pipeline(image, steps, fuse=True):
+    """
+    Replay all steps on an image.
+
+    Memory-mapped images stay mapped throughout, as with apply_step.
+
+    Args:
+        image: Input image
+        steps: Pipeline steps
+        fuse: Compose runs of point operations into one lookup table
+
+    Returns:
+        tuple: (final_image, concatenated_code)
+    """
+    code = ""
+    lut = None  # composed table of the pending run of point operations
+    for step in steps:
+        point = point_lut(step, image) if fuse else None
+        if point is None:
+            if lut is not None:
+                (image, _), lut = _per_pixel(_lut, image, table=lut), None
+            image, step_code = apply_step(image, step)
+        else:
+            table, step_code, to_gray = point
+            if to_gray:
+                if lut is not None:
+                    (image, _), lut = _per_pixel(_lut, image, table=lut), None
+                image, _ = _per_pixel(ops.to_gray, image)
+            lut = table if lut is None else table[lut]
+        code += step_code
+
+    if lut is not None:
+        image, _ = _per_pixel(_lut, image, table=lut)
+    return image, code
+
+
+class Recipe:
+    """
+    Structured record of the steps applied to an image.
+
+    Attributes:
+        source: Path of the image the recipe was recorded on (may be None)
+        steps: List of {"op": ..., "params": {...}} dicts
+    """
+
+    def __init__(self, source=None, steps=None):
+        self.source = source
+        self.steps = list(steps) if steps else []
+
+    def copy(self):
+        return Recipe(self.source, self.steps)
+
+    @property
+    def color_space(self):
+        """Channel layout the steps leave a loaded (BGR) image in: "HSV" after an HSV conversion, else "BGR"."""
+        space = "BGR"
+        for step in self.steps:
+            if step["op"] in COLOR_SPACES:
+                space = COLOR_SPACES[step["op"]]
+        return space
+
+    def to_dict(self):
+        return {"version": PIPELINE_VERSION, "source": self.source, "steps": self.steps}
+
+    def save(self, path):
+        """Write the recipe as JSON, or YAML for .yaml/.yml paths."""
+        if _is_yaml(path) and yaml is None:
+            raise ValueError("PyYAML is required to write YAML recipes (pip install pyyaml)")
+
+        data = json.loads(json.dumps(self.to_dict()))  # tuples -> lists
+        with open(path, "w", encoding="utf-8") as f:
+            if _is_yaml(path):
+                yaml.safe_dump(data, f, sort_keys=False)
+            else:
+                json.dump(data, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """Read a recipe (or bare pipeline) from JSON or YAML."""
+        data = _read_document(path)
+        if isinstance(data, dict):
+            return cls(data.get("source"), _validate_steps(data.get("steps")))
+        return cls(None, _validate_steps(data))
+
+    def replay(self, image):
+        """Apply every step to `image`; returns (final_image, code)."""
+        return run_pipeline(image, self.steps)
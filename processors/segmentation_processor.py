@@ -8,6 +8,7 @@ import cv2
 import tkinter as tk
 from tkinter import ttk, messagebox
 import numpy as np
+from . import ops, pipeline
 from .base_processor import BaseProcessor
 
 
@@ -16,12 +17,7 @@ class SegmentationProcessor(BaseProcessor):
     def threshold_image(self, image):
         """Apply global thresholding with interactive preview."""
         # Check if image is grayscale
-        if len(image.shape) > 2 and image.shape[2] > 1:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            conversion_note = "# Convert to grayscale first\ngray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)\n"
-        else:
-            gray = image
-            conversion_note = ""
+        gray, conversion_note = ops.to_gray(image)
 
         result = None
         dialog = tk.Toplevel()
@@ -69,6 +65,8 @@ class SegmentationProcessor(BaseProcessor):
         
         thresh_canvas = tk.Canvas(preview_frame, width=350, height=200, bg="lightgray", bd=1, relief=tk.SOLID)
         thresh_canvas.grid(row=1, column=1, padx=10, pady=5)
+        proxy, _ = self._make_proxy(gray, (350, 200))
+        otsu = []  # full resolution Otsu level, computed on first use
         
         # Create controls
         ttk.Label(controls_frame, text="Threshold Value:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
@@ -87,14 +85,7 @@ class SegmentationProcessor(BaseProcessor):
         controls_frame.columnconfigure(1, weight=1) # Make slider fill space
         
         # Threshold types
-        thresh_types = [
-            ("Binary", cv2.THRESH_BINARY),
-            ("Binary Inverted", cv2.THRESH_BINARY_INV),
-            ("Truncate", cv2.THRESH_TRUNC),
-            ("To Zero", cv2.THRESH_TOZERO),
-            ("To Zero Inverted", cv2.THRESH_TOZERO_INV),
-            ("Otsu", cv2.THRESH_BINARY + cv2.THRESH_OTSU), # Thêm Otsu
-        ]
+        thresh_types = ops.THRESHOLD_TYPES
         
         ttk.Label(type_frame, text="Threshold Type:").pack(anchor=tk.W)
         
@@ -125,17 +116,21 @@ class SegmentationProcessor(BaseProcessor):
                 thresh_scale.config(state="normal")
             
             # Apply threshold
-            ret, thresholded = cv2.threshold(gray, threshold, maxval, thtype)
+            thresholded, _ = ops.threshold(proxy, threshold, maxval, thtype)
             
-            # If Otsu, update the slider to show the threshold it found
+            # If Otsu, update the slider to show the threshold it found on the
+            # full image. Only write on change: the write re-triggers the preview.
             if thtype & cv2.THRESH_OTSU:
-                thresh_value.set(int(ret))
+                if not otsu:
+                    otsu.append(int(ops.otsu_level(gray)))
+                if int(thresh_value.get()) != otsu[0]:
+                    thresh_value.set(otsu[0])
             
             # Display original gray image
-            h, w = gray.shape[:2]
+            h, w = proxy.shape[:2]
             scale = min(350/w, 200/h)
             dim = (int(w*scale), int(h*scale))
-            gray_small = cv2.resize(gray, dim, interpolation=cv2.INTER_AREA)
+            gray_small = cv2.resize(proxy, dim, interpolation=cv2.INTER_AREA)
             
             # === SỬA PIL IMPORT ===
             img1 = self.Image.fromarray(gray_small)
@@ -159,9 +154,10 @@ class SegmentationProcessor(BaseProcessor):
             thresh_canvas.image = img2_tk
         
         # Register callbacks
-        thresh_value.trace("w", update_preview)
-        max_value.trace("w", update_preview)
-        thresh_type.trace("w", update_preview)
+        schedule_preview = self._preview_scheduler(dialog, update_preview)
+        thresh_value.trace("w", schedule_preview)
+        max_value.trace("w", schedule_preview)
+        thresh_type.trace("w", schedule_preview)
         
         try:
             # === SỬA PIL IMPORT ===
@@ -174,19 +170,9 @@ class SegmentationProcessor(BaseProcessor):
             def threshold_ok():
                 nonlocal result
                 try:
-                    threshold = thresh_value.get()
-                    maxval = max_value.get()
-                    thtype = thresh_type.get()
-                    
                     # Apply threshold
-                    ret, thresholded = cv2.threshold(gray, threshold, maxval, thtype)
-                    
-                    # Get threshold type name for code comment
-                    type_name = "Otsu" if thtype & cv2.THRESH_OTSU else next(name for name, val in thresh_types if val == thtype)
-                    thresh_val_str = "0" if thtype & cv2.THRESH_OTSU else str(threshold) # Use 0 for thresh if Otsu
-                    type_val_str = "cv2.THRESH_BINARY + cv2.THRESH_OTSU" if thtype & cv2.THRESH_OTSU else f"cv2.THRESH_{type_name.upper().replace(' ', '_')}"
-                    
-                    result = (thresholded, f"{conversion_note}ret, thresholded = cv2.threshold(gray, {thresh_val_str}, {maxval}, {type_val_str})  # {type_name} threshold\n")
+                    result = pipeline.run_op("threshold", image, thresh=thresh_value.get(), maxval=max_value.get(),
+                                             thresh_type=thresh_type.get())
                     dialog.destroy()
                 except Exception as e:
                     messagebox.showerror("Error", f"Failed to apply threshold: {str(e)}")
@@ -207,12 +193,7 @@ class SegmentationProcessor(BaseProcessor):
     def adaptive_threshold_dialog(self, image):
         """Apply adaptive thresholding with preview dialog."""
         # Check if image is grayscale
-        if len(image.shape) > 2 and image.shape[2] > 1:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            conversion_note = "# Convert to grayscale first\ngray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)\n"
-        else:
-            gray = image
-            conversion_note = ""
+        gray, _ = ops.to_gray(image)
 
         result = None
         dialog = tk.Toplevel()
@@ -239,6 +220,7 @@ class SegmentationProcessor(BaseProcessor):
 
         result_canvas = tk.Canvas(preview_frame, width=350, height=250, bg="lightgray")
         result_canvas.grid(row=1, column=1, padx=10, pady=5)
+        proxy, factor = self._make_proxy(gray, (350, 250))
 
         # Controls
         controls_frame = ttk.Frame(dialog)
@@ -276,30 +258,22 @@ class SegmentationProcessor(BaseProcessor):
             block_label.config(text=str(bs))
             c_label.config(text=str(int(c_value.get())))
             
-            adaptive = cv2.adaptiveThreshold(gray, 255, method_var.get(), thresh_type.get(), bs, c_value.get())
-            self._update_preview_canvas(orig_canvas, gray, gray)
-            self._update_preview_canvas(result_canvas, adaptive, gray)
+            adaptive, _ = ops.adaptive_threshold(proxy, method_var.get(), thresh_type.get(),
+                                                 self._proxy_kernel(bs, factor, minimum=3), c_value.get())
+            self._update_preview_canvas(orig_canvas, proxy, proxy)
+            self._update_preview_canvas(result_canvas, adaptive, proxy)
 
         def apply_adaptive():
             nonlocal result
-            bs = block_size.get()
-            if bs % 2 == 0:
-                bs += 1
-            adaptive = cv2.adaptiveThreshold(gray, 255, method_var.get(), thresh_type.get(), bs, c_value.get())
-            
-            method_name = "ADAPTIVE_THRESH_MEAN_C" if method_var.get() == cv2.ADAPTIVE_THRESH_MEAN_C else "ADAPTIVE_THRESH_GAUSSIAN_C"
-            type_name = "THRESH_BINARY" if thresh_type.get() == cv2.THRESH_BINARY else "THRESH_BINARY_INV"
-            
-            code = conversion_note
-            code += f"# Apply adaptive threshold\n"
-            code += f"result = cv2.adaptiveThreshold(gray, 255, cv2.{method_name}, cv2.{type_name}, {bs}, {c_value.get()})\n"
-            result = (adaptive, code)
+            result = pipeline.run_op("adaptive_threshold", image, method=method_var.get(), thresh_type=thresh_type.get(),
+                                     block_size=block_size.get(), c=c_value.get())
             dialog.destroy()
 
-        method_var.trace("w", update_preview)
-        thresh_type.trace("w", update_preview)
-        block_size.trace("w", update_preview)
-        c_value.trace("w", update_preview)
+        schedule_preview = self._preview_scheduler(dialog, update_preview)
+        method_var.trace("w", schedule_preview)
+        thresh_type.trace("w", schedule_preview)
+        block_size.trace("w", schedule_preview)
+        c_value.trace("w", schedule_preview)
 
         buttons_frame = ttk.Frame(dialog)
         buttons_frame.pack(fill=tk.X, padx=20, pady=10)
@@ -0,0 +1,335 @@
+"""
+Stitching Pipeline
+
+The stages `cv2.Stitcher` runs in one call, spelled out with `cv2.detail`
+so their results can be kept between runs: feature finding, pairwise
+matching, camera estimation, seam estimation and compositing. Each stage
+works at its own resolution, given in megapixels per input image like the
+Stitcher's registration/seam/compositing resolutions.
+
+Features are cached per image and matches per image pair; the later stages
+keep their last few results together with the settings they were computed
+from. A run recomputes only from the first stage whose inputs changed, so
+previewing again is nearly free, switching mode reuses the features, and
+changing the compositing resolution only re-blends.
+
+For ordered sweeps, `neighbors` limits matching to each image's next few
+images in sequence, so the number of matched pairs grows linearly with the
+number of images instead of quadratically; `loop_closure` also matches the
+last images against the first for sequences that come back to the start.
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+
+DEFAULT_REGISTRATION_MP = 0.6
+DEFAULT_SEAM_MP = 0.1
+DEFAULT_COMPOSITING_MP = -1  # original resolution
+CONFIDENCE_THRESHOLD = 1.0
+BLEND_STRENGTH = 5  # percent of the panorama size used for multi-band blending
+KEPT_RESULTS = 2  # settings remembered per stage, e.g. both modes
+
+# Component choices matching cv2.Stitcher_PANORAMA and cv2.Stitcher_SCANS
+MODES = {
+    "panorama": {"warper": "spherical", "affine": False, "wave_correct": True,
+                 "exposure": cv2.detail.ExposureCompensator_GAIN_BLOCKS},
+    "scans": {"warper": "affine", "affine": True, "wave_correct": False,
+              "exposure": cv2.detail.ExposureCompensator_NO},
+}
+
+
+def _scale_for(image, megapix):
+    """Scale bringing `image` to `megapix` megapixels (never up); <= 0 means original."""
+    if megapix <= 0:
+        return 1.0
+    h, w = image.shape[:2]
+    return min(1.0, np.sqrt(megapix * 1e6 / (h * w)))
+
+
+def _scaled_intrinsics(camera, aspect):
+    """Camera matrix for images `aspect` times the size the camera was estimated at."""
+    K = camera.K().astype(np.float32)
+    K[0, 0] *= aspect
+    K[0, 2] *= aspect
+    K[1, 1] *= aspect
+    K[1, 2] *= aspect
+    return K
+
+
+def _copy_matches(info, src, dst):
+    """MatchesInfo with its images renumbered, leaving the cached original intact."""
+    copy = cv2.detail.MatchesInfo()
+    copy.src_img_idx, copy.dst_img_idx = src, dst
+    copy.matches = info.matches
+    copy.inliers_mask = info.inliers_mask
+    copy.num_inliers = info.num_inliers
+    copy.H = info.H
+    copy.confidence = info.confidence
+    return copy
+
+
+def _copy_features(features, index):
+    copy = cv2.detail.ImageFeatures()
+    copy.img_idx = index
+    copy.img_size = features.img_size
+    copy.keypoints = features.keypoints
+    copy.descriptors = features.descriptors
+    return copy
+
+
+def _no_progress(fraction=None, message=""):
+    pass
+
+
+class StitchPipeline:
+    """
+    Staged, cached stitcher for a fixed list of images.
+
+    Safe to call from worker threads; concurrent runs are serialized, and a
+    run stopped part way (e.g. by a cancelled task) keeps every stage it
+    completed.
+
+    Args:
+        images: BGR or grayscale images, in order
+
+    Attributes:
+        kept: Indices of the images used by the last run; images without
+            confident matches to the rest are left out
+    """
+
+    def __init__(self, images):
+        self.images = [cv2.cvtColor(img, cv2.COLOR_GRAY2BGR) if img.ndim == 2 else img for img in images]
+        self._features = {}  # (image index, registration_mp) -> ImageFeatures
+        self._pairs = {}     # (mode, registration_mp, i, j) -> MatchesInfo
+        self._stages = {}    # stage name -> {settings key: result}
+        self._lock = threading.Lock()
+        self.kept = []
+
+    def stitch(self, mode="panorama", registration_mp=DEFAULT_REGISTRATION_MP, seam_mp=DEFAULT_SEAM_MP,
+               compositing_mp=DEFAULT_COMPOSITING_MP, neighbors=0, loop_closure=False, progress=None):
+        """
+        Stitch the images, reusing every stage whose inputs are unchanged.
+
+        Args:
+            mode: "panorama" or "scans"
+            registration_mp: Resolution for feature finding and matching
+            seam_mp: Resolution for exposure compensation and seam finding
+            compositing_mp: Resolution of the result; <= 0 for original
+            neighbors: Match each image only with the next `neighbors`
+                images in order; 0 matches every pair
+            loop_closure: With `neighbors`, also match across the end of the
+                sequence back to its start
+            progress: Optional callable(fraction, message)
+
+        Returns:
+            numpy.ndarray: The BGR panorama
+
+        Raises:
+            ValueError: If the images cannot be stitched
+        """
+        progress = progress or _no_progress
+        settings = MODES[mode]
+        with self._lock:
+            features = self._find_features(registration_mp, progress)
+
+            pairs = self.pairs(neighbors, loop_closure)
+            key = (mode, registration_mp)
+            pairwise = self._match(features, key, pairs, settings["affine"], progress)
+
+            progress(0.5, "Estimating camera parameters...")
+            key += (tuple(pairs),)
+            cameras = self._stage("cameras", key, lambda: self._estimate(features, pairwise, settings))
+            self.kept = list(cameras[0])
+
+            key += (seam_mp,)
+            seams = self._stage("seams", key, lambda: self._find_seams(cameras, registration_mp, seam_mp,
+                                                                       settings, progress))
+
+            key += (compositing_mp,)
+            panorama = self._stage("panorama", key, lambda: self._compose(cameras, seams, registration_mp,
+                                                                          compositing_mp, settings, progress))
+        progress(1.0, "Done")
+        return panorama
+
+    def _stage(self, name, key, compute):
+        """Result of stage `name` for `key`, the full set of settings it depends on."""
+        results = self._stages.setdefault(name, {})
+        if key not in results:
+            value = compute()
+            if len(results) >= KEPT_RESULTS:
+                del results[next(iter(results))]
+            results[key] = value
+        return results[key]
+
+    def pairs(self, neighbors=0, loop_closure=False):
+        """Image pairs (i, j), i < j, to match; see `stitch`."""
+        n = len(self.images)
+        if neighbors <= 0 or neighbors >= n - 1:
+            return [(i, j) for i in range(n) for j in range(i + 1, n)]
+
+        pairs = set()
+        for i in range(n):
+            for step in range(1, neighbors + 1):
+                j = i + step
+                if j >= n:
+                    if not loop_closure:
+                        break
+                    j -= n
+                pairs.add((min(i, j), max(i, j)))
+        return sorted(pairs)
+
+    def _find_features(self, registration_mp, progress):
+        work_scale = _scale_for(self.images[0], registration_mp)
+        finder = None
+        features = []
+        for i, image in enumerate(self.images):
+            key = (i, registration_mp)
+            if key not in self._features:
+                progress(0.25 * i / len(self.images), f"Finding features in image {i + 1}/{len(self.images)}...")
+                if finder is None:
+                    finder = cv2.ORB_create()
+                small = cv2.resize(image, None, fx=work_scale, fy=work_scale, interpolation=cv2.INTER_LINEAR_EXACT)
+                found = cv2.detail.computeImageFeatures2(finder, small)
+                found.img_idx = i
+                self._features[key] = found
+            features.append(self._features[key])
+        return features
+
+    def _match(self, features, key, pairs, affine, progress):
+        """Pairwise matches for `pairs` (i < j), as the n*n list cv2.detail expects."""
+        n = len(features)
+        missing = [(i, j) for i, j in pairs if key + (i, j) not in self._pairs]
+        if missing:
+            progress(0.25, f"Matching {len(missing)} image pairs...")
+            if affine:
+                matcher = cv2.detail_AffineBestOf2NearestMatcher(False, False)
+            else:
+                matcher = cv2.detail_BestOf2NearestMatcher(False)
+            mask = np.zeros((n, n), np.uint8)
+            for i, j in missing:
+                mask[i, j] = 1
+            found = matcher.apply2(features, mask)
+            matcher.collectGarbage()
+            for i, j in missing:
+                self._pairs[key + (i, j)] = found[i * n + j]
+                self._pairs[key + (j, i)] = found[j * n + i]
+
+        pairwise = []
+        for i in range(n):
+            for j in range(n):
+                info = self._pairs.get(key + (i, j))
+                if info is None:
+                    info = cv2.detail.MatchesInfo()
+                    info.src_img_idx = info.dst_img_idx = -1
+                pairwise.append(info)
+        return pairwise
+
+    def _estimate(self, features, pairwise, settings):
+        """Cameras for the largest group of confidently connected images."""
+        n = len(features)
+        keep = [int(i) for i in np.ravel(cv2.detail.leaveBiggestComponent(features, pairwise,
+                                                                           CONFIDENCE_THRESHOLD))]
+        if len(keep) < 2:
+            raise ValueError("Need more images")
+
+        # Renumber the kept images 0..k-1, as the estimators index by position
+        features = [_copy_features(features[i], a) for a, i in enumerate(keep)]
+        pairwise = [_copy_matches(pairwise[i * n + j], a, b) if i != j else cv2.detail.MatchesInfo()
+                    for a, i in enumerate(keep) for b, j in enumerate(keep)]
+
+        if settings["affine"]:
+            estimator = cv2.detail_AffineBasedEstimator()
+            adjuster = cv2.detail_BundleAdjusterAffinePartial()
+        else:
+            estimator = cv2.detail_HomographyBasedEstimator()
+            adjuster = cv2.detail_BundleAdjusterRay()
+
+        ok, cameras = estimator.apply(features, pairwise, None)
+        if not ok:
+            raise ValueError("Homography estimation failed")
+        for camera in cameras:
+            camera.R = camera.R.astype(np.float32)
+
+        adjuster.setConfThresh(CONFIDENCE_THRESHOLD)
+        refine_mask = np.zeros((3, 3), np.uint8)
+        refine_mask[0, :] = 1  # focal, skew, ppx
+        refine_mask[1, 1:] = 1  # aspect, ppy
+        adjuster.setRefinementMask(refine_mask)
+        ok, cameras = adjuster.apply(features, pairwise, cameras)
+        if not ok:
+            raise ValueError("Camera parameters adjustment failed")
+
+        if settings["wave_correct"]:
+            rotations = cv2.detail.waveCorrect([np.copy(c.R) for c in cameras], cv2.detail.WAVE_CORRECT_HORIZ)
+            for camera, R in zip(cameras, rotations):
+                camera.R = R
+
+        focals = sorted(c.focal for c in cameras)
+        middle = len(focals) // 2
+        warped_scale = focals[middle] if len(focals) % 2 else (focals[middle - 1] + focals[middle]) / 2
+        return keep, cameras, warped_scale
+
+    def _warp_all(self, cameras, scale, aspect, settings, progress, start, span, what):
+        """Warp the kept images and their masks at `scale`; returns (corners, images, masks)."""
+        keep, cams, warped_scale = cameras
+        warper = cv2.PyRotationWarper(settings["warper"], warped_scale * aspect)
+        corners, images, masks = [], [], []
+        for n, (i, camera) in enumerate(zip(keep, cams)):
+            progress(start + span * n / len(keep), f"{what} image {n + 1}/{len(keep)}...")
+            image = self.images[i]
+            if scale != 1.0:
+                image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR_EXACT)
+            K = _scaled_intrinsics(camera, aspect)
+            corner, warped = warper.warp(image, K, camera.R, cv2.INTER_LINEAR, cv2.BORDER_REFLECT)
+            mask = np.full(image.shape[:2], 255, np.uint8)
+            _, warped_mask = warper.warp(mask, K, camera.R, cv2.INTER_NEAREST, cv2.BORDER_CONSTANT)
+            corners.append(corner)
+            images.append(warped)
+            masks.append(warped_mask)
+        return corners, images, masks
+
+    def _find_seams(self, cameras, registration_mp, seam_mp, settings, progress):
+        seam_scale = _scale_for(self.images[0], seam_mp)
+        aspect = seam_scale / _scale_for(self.images[0], registration_mp)
+        corners, images, masks = self._warp_all(cameras, seam_scale, aspect, settings, progress,
+                                                0.55, 0.1, "Warping for seams,")
+
+        progress(0.65, "Compensating exposure...")
+        compensator = cv2.detail.ExposureCompensator_createDefault(settings["exposure"])
+        compensator.feed(corners=corners, images=images, masks=masks)
+        progress(0.67, "Finding seams...")
+        seam_finder = cv2.detail_GraphCutSeamFinder("COST_COLOR")
+        masks = seam_finder.find([img.astype(np.float32) for img in images], corners, masks)
+        return compensator, [cv2.UMat.get(m) if isinstance(m, cv2.UMat) else m for m in masks]
+
+    def _compose(self, cameras, seams, registration_mp, compositing_mp, settings, progress):
+        compensator, seam_masks = seams
+        compose_scale = _scale_for(self.images[0], compositing_mp)
+        aspect = compose_scale / _scale_for(self.images[0], registration_mp)
+        corners, images, masks = self._warp_all(cameras, compose_scale, aspect, settings, progress,
+                                                0.7, 0.2, "Compositing")
+
+        progress(0.9, "Blending...")
+        sizes = [(img.shape[1], img.shape[0]) for img in images]
+        roi = cv2.detail.resultRoi(corners=corners, sizes=sizes)
+        blend_width = np.sqrt(roi[2] * roi[3]) * BLEND_STRENGTH / 100
+        if blend_width < 1:
+            blender = cv2.detail.Blender_createDefault(cv2.detail.Blender_NO)
+        else:
+            blender = cv2.detail_MultiBandBlender()
+            blender.setNumBands(int(np.log2(blend_width) - 1))
+        blender.prepare(roi)
+
+        for n, (corner, image, mask) in enumerate(zip(corners, images, masks)):
+            compensator.apply(n, corner, image, mask)
+            # Seam masks were found at seam resolution; bring them up and keep
+            # only the part covered by this image
+            seam = cv2.dilate(seam_masks[n], None)
+            seam = cv2.resize(seam, (mask.shape[1], mask.shape[0]), interpolation=cv2.INTER_LINEAR_EXACT)
+            blender.feed(image.astype(np.int16), cv2.bitwise_and(seam, mask), corner)
+
+        panorama, _ = blender.blend(None, None)
+        return np.clip(panorama, 0, 255).astype(np.uint8)
@@ -0,0 +1,119 @@
+"""
+Background Tasks
+
+Runs heavy operations (stitching, registration, large warps) on a worker
+thread so the Tk main loop keeps redrawing and handling input. The worker
+never touches Tk: progress and results go through a queue that the main
+thread drains with `after()` polling, and the callbacks run there.
+
+OpenCV releases the GIL inside its long calls, so a running task does not
+stall the interface. Cancellation is cooperative: the task is asked to stop
+at its next progress report, and from the moment `cancel()` returns no
+callback for the task will run, so the dialog can move on immediately even
+if an OpenCV call is still finishing in the background (`alive` tells
+whether it still is).
+"""
+
+import queue
+import threading
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task's progress callback once the task is cancelled."""
+
+
+class BackgroundTask:
+    """
+    Run `func(*args, progress=..., **kwargs)` on a daemon thread.
+
+    `progress(fraction, message)` may be called by the task at any point;
+    fraction is in [0, 1] or None when unknown. It raises TaskCancelled
+    after `cancel()`, which is how long tasks notice they should stop.
+
+    Args:
+        widget: Tk widget used for `after()` polling; the task is cancelled
+            if it is destroyed
+        func: Callable doing the work; must not touch Tk
+        on_done: Called with the return value of `func`
+        on_error: Called with the exception raised by `func`
+        on_progress: Called with (fraction, message)
+        poll_ms: Queue polling interval
+    """
+
+    def __init__(self, widget, func, *args, on_done=None, on_error=None, on_progress=None,
+                 poll_ms=50, **kwargs):
+        self.widget = widget
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.poll_ms = poll_ms
+
+        self._queue = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = None
+        self._poll_id = None
+        self._finished = False
+        widget.bind("<Destroy>", lambda e: self.cancel() if e.widget is widget else None, add="+")
+
+    @property
+    def running(self):
+        return self._thread is not None and not self._finished
+
+    @property
+    def alive(self):
+        """Whether the worker thread is still executing, which it may be for a while after `cancel()`."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the worker thread and begin polling for its messages."""
+        self._thread = threading.Thread(target=self._work, daemon=True)
+        self._thread.start()
+        self._poll_id = self.widget.after(self.poll_ms, self._poll)
+        return self
+
+    def cancel(self):
+        """Ask the task to stop and drop any result it still produces."""
+        self._cancel.set()
+        self._finished = True
+        if self._poll_id is not None:
+            self.widget.after_cancel(self._poll_id)
+            self._poll_id = None
+
+    def _report(self, fraction=None, message=""):
+        if self._cancel.is_set():
+            raise TaskCancelled()
+        self._queue.put(("progress", (fraction, message)))
+
+    def _work(self):
+        try:
+            value = self.func(*self.args, progress=self._report, **self.kwargs)
+        except TaskCancelled:
+            return
+        except Exception as e:
+            self._queue.put(("error", e))
+        else:
+            self._queue.put(("done", value))
+
+    def _poll(self):
+        self._poll_id = None
+        while not self._finished:
+            try:
+                kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == "progress":
+                if self.on_progress:
+                    self.on_progress(*payload)
+                continue
+
+            self._finished = True
+            callback = self.on_done if kind == "done" else self.on_error
+            if callback:
+                callback(payload)
+
+        if not self._finished:
+            self._poll_id = self.widget.after(self.poll_ms, self._poll)
@@ -0,0 +1,143 @@
+"""
+Thumbnail Cache
+
+Keeps decoded thumbnails on disk so reopening a dataset shows its previews
+without decoding the images again. Entries are keyed by a hash of the file
+contents and the thumbnail size, so renamed or copied files still hit and
+edited files miss. Each entry is a small .npz holding the thumbnail and the
+full image size.
+
+The cache is bounded in bytes: reads refresh an entry's modification time,
+and once the total exceeds the budget the least recently used entries are
+deleted. Any filesystem error just turns into a cache miss; the cache
+never keeps an image from loading.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+
+DEFAULT_MAX_MB = 64
+
+
+def default_directory():
+    """Per-user cache directory, following XDG_CACHE_HOME when it is set."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "image-processing-studio", "thumbnails")
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Hex digest of the contents of `path`."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ThumbnailCache:
+    """
+    Size-bounded LRU cache of thumbnails on disk.
+
+    Args:
+        directory: Where entries are stored; created on first write
+        max_mb: Total size allowed for all entries
+    """
+
+    def __init__(self, directory=None, max_mb=DEFAULT_MAX_MB):
+        self.directory = directory or default_directory()
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._total = None  # bytes on disk, scanned on first write
+        self._lock = threading.Lock()
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".npz")
+
+    def key(self, path, size):
+        """Cache key for the `size` thumbnail of the file at `path`, or None if unreadable."""
+        try:
+            return f"{file_digest(path)}-{size}"
+        except OSError:
+            return None
+
+    def get(self, key):
+        """(thumbnail, (width, height)) stored under `key`, or None."""
+        entry = self._entry_path(key)
+        try:
+            with np.load(entry) as data:
+                thumbnail, full_size = data["thumbnail"], tuple(int(v) for v in data["size"])
+            os.utime(entry)  # mark as recently used
+        except (OSError, KeyError, ValueError):
+            return None
+        return thumbnail, full_size
+
+    def put(self, key, thumbnail, full_size):
+        """Store an entry, then evict least recently used entries over the budget."""
+        entry = self._entry_path(key)
+        tmp = None
+        try:
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            # Write to a temporary file first so readers never see half an entry
+            fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(entry))
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, thumbnail=thumbnail, size=np.array(full_size))
+            os.replace(tmp, entry)
+            written = os.path.getsize(entry)
+        except OSError:
+            if tmp is not None and os.path.exists(tmp):
+                os.remove(tmp)
+            return
+
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _, size, _ in self._entries())
+            else:
+                self._total += written
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def clear(self):
+        """Delete every entry."""
+        with self._lock:
+            for path, _, _ in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total = 0
+
+    def _entries(self):
+        """(path, bytes, last use) for every entry on disk."""
+        entries = []
+        try:
+            buckets = [d.path for d in os.scandir(self.directory) if d.is_dir()]
+        except OSError:
+            return entries
+        for bucket in buckets:
+            try:
+                for item in os.scandir(bucket):
+                    if item.name.endswith(".npz"):
+                        stat = item.stat()
+                        entries.append((item.path, stat.st_size, stat.st_mtime))
+            except OSError:
+                continue
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        # Evict down to 90% so a full cache does not rescan on every write
+        target = self.max_bytes * 0.9
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._total = total
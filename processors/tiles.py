@@ -0,0 +1,115 @@
+"""
+Tiled Execution
+
+Runs neighbourhood operations (blurs, morphology, adaptive threshold) on
+large images one tile at a time. Each tile is processed together with a
+halo of surrounding pixels as wide as the operation's reach, and only its
+interior is kept. Every output pixel therefore sees exactly the neighbours
+it would in the whole image, and tiles on the image border meet the same
+border handling, so the result is bit-identical to a single call.
+
+Tiles run on a thread pool (OpenCV releases the GIL) and write straight
+into the output, so the operation's own temporary buffers are the size of
+a tile instead of the whole image. The output can be a memory map (see
+backing_store.py), in which case neither input nor output has to fit in
+RAM. `pipeline.apply_step` tiles the operations listed in HALOS
+automatically from TILED_MIN_PIXELS up, and always for mapped images.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from . import ops
+
+
+TILE_SIZE = 1024
+# Default thread count, read at call time (batch workers lower it to 1)
+TILE_WORKERS = os.cpu_count() or 4
+
+# Images with at least this many pixels are tiled by pipeline.apply_step
+TILED_MIN_PIXELS = 1 << 24
+
+
+def _morphology_halo(op, ksize, iterations=1):
+    reach = ops.odd_kernel(ksize) // 2 * iterations
+    # Opening and closing are an erosion and a dilation, each with that reach
+    return reach if op in (cv2.MORPH_ERODE, cv2.MORPH_DILATE) else 2 * reach
+
+
+def _threshold_halo(thresh, maxval, thresh_type):
+    # Otsu and triangle levels come from the whole image's histogram
+    return None if thresh_type & (cv2.THRESH_OTSU | cv2.THRESH_TRIANGLE) else 0
+
+
+# Operation id -> callable(**params) giving the halo in pixels, or None if
+# those parameters make the operation non-local. Only operations whose
+# output pixels depend on a bounded neighbourhood belong here (Canny's
+# hysteresis and histogram equalization do not); per-pixel ones need none.
+HALOS = {
+    "negative": lambda: 0,
+    "gray": lambda: 0,
+    "hsv": lambda: 0,
+    "linear_contrast": lambda alpha, beta: 0,
+    "log_transform": lambda c: 0,
+    "power_transform": lambda gamma, c=1.0: 0,
+    "threshold": _threshold_halo,
+    "gaussian_blur": lambda ksize: ops.odd_kernel(ksize) // 2,
+    "median_blur": lambda ksize: ops.odd_kernel(ksize) // 2,
+    "morphology": _morphology_halo,
+    "adaptive_threshold": lambda method, thresh_type, block_size, c: ops.odd_kernel(block_size) // 2,
+}
+
+
+def tile_grid(shape, tile_size=TILE_SIZE):
+    """(y0, y1, x0, x1) of the tiles covering an image of `shape`, row by row."""
+    h, w = shape[:2]
+    return [(y, min(y + tile_size, h), x, min(x + tile_size, w))
+            for y in range(0, h, tile_size) for x in range(0, w, tile_size)]
+
+
+def run_tiled(func, image, halo, tile_size=TILE_SIZE, workers=None, allocate=np.empty, **params):
+    """
+    Apply `func(image, **params)` tile by tile.
+
+    Args:
+        func: Operation returning (image, code) whose output pixels depend
+            only on input pixels within `halo`
+        image: Input image
+        halo: Context each tile needs on every side, in pixels
+        tile_size: Tile edge length, halo excluded
+        workers: Number of threads (default TILE_WORKERS)
+        allocate: Called as allocate(shape, dtype) for the output array,
+            whose type is taken from the first tile
+        **params: Passed to `func`
+
+    Returns:
+        tuple: (result, code) exactly as `func(image, **params)` would
+    """
+    h, w = image.shape[:2]
+    tiles = tile_grid(image.shape, tile_size)
+
+    def process(tile):
+        y0, y1, x0, x1 = tile
+        hy0, hx0 = max(0, y0 - halo), max(0, x0 - halo)
+        hy1, hx1 = min(h, y1 + halo), min(w, x1 + halo)
+        result, code = func(image[hy0:hy1, hx0:hx1], **params)
+        return result[y0 - hy0:y1 - hy0, x0 - hx0:x1 - hx0], code
+
+    def fill(tile):
+        y0, y1, x0, x1 = tile
+        out[y0:y1, x0:x1] = process(tile)[0]
+
+    # The first tile fixes the output type (adaptive threshold returns gray)
+    first, code = process(tiles[0])
+    out = allocate((h, w) + first.shape[2:], first.dtype)
+    y0, y1, x0, x1 = tiles[0]
+    out[y0:y1, x0:x1] = first
+
+    with ThreadPoolExecutor(max_workers=workers or TILE_WORKERS, thread_name_prefix="tile") as pool:
+        for _ in pool.map(fill, tiles[1:]):
+            pass  # re-raises the first failure
+    return out, code
+